@@ -3,8 +3,11 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from functools import wraps
 import logging
-from models import APIKey, PriceEstimate
+from models import APIKey
 from price_estimator import PriceEstimator
+from pin_index import PinCodeError
+from audit import record_estimate
+from profiler import profile_request
 from app import limiter
 
 api_bp = Blueprint('api', __name__)
@@ -29,15 +32,18 @@ def require_api_key(f):
 @api_bp.route('/estimate', methods=['POST', 'GET'])
 @limiter.limit("50 per hour")
 @require_api_key
+@profile_request
 def api_estimate():
     """
     API endpoint for price estimation
     
     POST/GET /api/estimate
     Parameters:
-    - state: string (required)
-    - city: string (required)
+    - state: string (required unless pin_code is given)
+    - city: string (required unless pin_code is given)
     - locality: string (optional)
+    - pin_code: string (optional; resolves state, city and locality)
+    - latitude, longitude: float (optional; used when the locality is unknown)
     - plot_size_sqft: float (default: 1000)
     - road_width_ft: float (default: 20)
     - nearby_schools: boolean (default: false)
@@ -45,6 +51,8 @@ def api_estimate():
     - commercial_area: boolean (default: false)
     - year: integer (default: current year)
     - area_type: string (default: residential)
+    - price_bands: boolean, add Monte Carlo P10/P50/P90 prices (default: false)
+    - learned_model: boolean, add the learned model's price when one is trained (default: false)
     """
     
     try:
@@ -57,91 +65,76 @@ def api_estimate():
         # Validate required parameters
         state = data.get('state')
         city = data.get('city')
+        pin_code = data.get('pin_code')
         
-        if not state or not city:
+        if not pin_code and (not state or not city):
             return jsonify({
                 'error': 'Missing required parameters',
                 'required': ['state', 'city'],
-                'message': 'State and city are required for price estimation'
+                'message': 'State and city (or pin_code) are required for price estimation'
             }), 400
         
         # Extract optional parameters with defaults
         locality = data.get('locality')
         
-        try:
-            plot_size = float(data.get('plot_size_sqft', 1000))
-            road_width = float(data.get('road_width_ft', 20))
-            year = int(data.get('year', 2024))
-        except ValueError:
-            return jsonify({
-                'error': 'Invalid parameter types',
-                'message': 'plot_size_sqft, road_width_ft must be numbers, year must be integer'
-            }), 400
-        
-        # Validate ranges
-        if plot_size <= 0:
-            return jsonify({'error': 'plot_size_sqft must be greater than 0'}), 400
-        
-        if road_width < 0:
-            return jsonify({'error': 'road_width_ft cannot be negative'}), 400
+        factors, error = parse_factors(data)
+        if error:
+            return error
         
-        if year < 2020 or year > 2030:
-            return jsonify({'error': 'year must be between 2020 and 2030'}), 400
-        
-        nearby_schools = data.get('nearby_schools', '').lower() in ['true', '1', 'yes']
-        nearby_metro = data.get('nearby_metro', '').lower() in ['true', '1', 'yes']
-        commercial_area = data.get('commercial_area', '').lower() in ['true', '1', 'yes']
-        area_type = data.get('area_type', 'residential')
-        
-        # Validate area_type
-        valid_area_types = ['residential', 'commercial', 'agricultural', 'industrial']
-        if area_type not in valid_area_types:
-            return jsonify({
-                'error': 'Invalid area_type',
-                'valid_types': valid_area_types
-            }), 400
+        coordinates, error = parse_coordinates(data)
+        if error:
+            return error
+        latitude, longitude = coordinates
         
         # Calculate estimate
         estimator = PriceEstimator()
-        result = estimator.estimate_price(
-            state=state,
-            city_name=city,
-            locality_name=locality,
-            plot_size_sqft=plot_size,
-            road_width_ft=road_width,
-            nearby_schools=nearby_schools,
-            nearby_metro=nearby_metro,
-            commercial_area=commercial_area,
-            year=year,
-            area_type=area_type
-        )
+        factors.update(latitude=latitude, longitude=longitude,
+                       price_bands=_flag(data.get('price_bands', '')))
+        if pin_code:
+            try:
+                result = estimator.estimate_by_pin(pin_code, state=state, city_name=city,
+                                                   locality_name=locality, **factors)
+            except PinCodeError as e:
+                return jsonify(e.to_dict()), 409 if e.candidates else 404
+            
+            matches = result['pin_code']['matches']
+            state, city = matches[0]['state'], matches[0]['city']
+            locality = matches[0]['locality'] if len(matches) == 1 else None
+        else:
+            result = estimator.estimate_price(state=state, city_name=city, locality_name=locality, **factors)
         
-        # Save estimate to database
-        estimate_record = PriceEstimate(
-            state=state,
-            city=city,
-            locality=locality,
-            plot_size_sqft=plot_size,
-            road_width_ft=road_width,
-            nearby_schools=nearby_schools,
-            nearby_metro=nearby_metro,
-            commercial_area=commercial_area,
-            year=year,
-            estimated_price_per_sqft=result['estimated_price_per_sqft'],
-            total_estimated_price=result['total_estimated_price'],
-            confidence_score=result['confidence_score'],
-            api_key=g.api_key.key,
+        if _flag(data.get('learned_model', '')):
+            result['learned_model'] = estimator.estimate_learned([dict(
+                factors, state=state, city_name=city, locality_name=locality)])[0]
+        
+        # Save estimate to the audit log
+        estimate_record = record_estimate(
+            {
+                'state': state,
+                'city': city,
+                'locality': locality,
+                'plot_size_sqft': factors['plot_size_sqft'],
+                'road_width_ft': factors['road_width_ft'],
+                'nearby_schools': factors['nearby_schools'],
+                'nearby_metro': factors['nearby_metro'],
+                'commercial_area': factors['commercial_area'],
+                'year': factors['year'],
+                'pin_code': pin_code,
+                'latitude': latitude,
+                'longitude': longitude
+            },
+            result,
+            api_key=g.api_key,
             ip_address=request.remote_addr
         )
         
-        from app import db
-        db.session.add(estimate_record)
-        db.session.commit()
-        
         # Update API key last used
+        from app import db
         from datetime import datetime
-        g.api_key.last_used = datetime.utcnow()
-        db.session.commit()
+        from db_routing import bookkeeping_writes
+        with bookkeeping_writes():
+            g.api_key.last_used = datetime.utcnow()
+            db.session.commit()
         
         # Return result
         return jsonify({
@@ -161,6 +154,345 @@ def api_estimate():
             'message': 'An error occurred while processing your request'
         }), 500
 
+VALID_AREA_TYPES = ['residential', 'commercial', 'agricultural', 'industrial']
+
+def _flag(value):
+    return str(value).strip().lower() in ['true', '1', 'yes']
+
+def parse_factors(data):
+    """
+    Plot and infrastructure inputs shared by the estimate-style endpoints.
+    Returns (factors, None) or (None, error response).
+    """
+    try:
+        factors = {
+            'plot_size_sqft': float(data.get('plot_size_sqft', 1000)),
+            'road_width_ft': float(data.get('road_width_ft', 20)),
+            'nearby_schools': _flag(data.get('nearby_schools', '')),
+            'nearby_metro': _flag(data.get('nearby_metro', '')),
+            'commercial_area': _flag(data.get('commercial_area', '')),
+            'year': int(data.get('year', 2024)),
+            'area_type': data.get('area_type', 'residential')
+        }
+    except (TypeError, ValueError):
+        return None, (jsonify({
+            'error': 'Invalid parameter types',
+            'message': 'plot_size_sqft, road_width_ft must be numbers, year must be integer'
+        }), 400)
+    
+    if factors['plot_size_sqft'] <= 0:
+        return None, (jsonify({'error': 'plot_size_sqft must be greater than 0'}), 400)
+    if factors['road_width_ft'] < 0:
+        return None, (jsonify({'error': 'road_width_ft cannot be negative'}), 400)
+    if factors['year'] < 2020 or factors['year'] > 2030:
+        return None, (jsonify({'error': 'year must be between 2020 and 2030'}), 400)
+    if factors['area_type'] not in VALID_AREA_TYPES:
+        return None, (jsonify({'error': 'Invalid area_type', 'valid_types': VALID_AREA_TYPES}), 400)
+    return factors, None
+
+def parse_coordinates(data):
+    """
+    Optional latitude/longitude pair. Returns ((latitude, longitude), None)
+    or (None, error response); the pair is (None, None) when not given.
+    """
+    try:
+        latitude = float(data['latitude']) if data.get('latitude') not in (None, '') else None
+        longitude = float(data['longitude']) if data.get('longitude') not in (None, '') else None
+    except (TypeError, ValueError):
+        return None, (jsonify({'error': 'latitude and longitude must be numbers'}), 400)
+    if (latitude is None) != (longitude is None):
+        return None, (jsonify({'error': 'latitude and longitude must be given together'}), 400)
+    if latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None, (jsonify({'error': 'latitude or longitude out of range'}), 400)
+    return (latitude, longitude), None
+
+@api_bp.route('/projection', methods=['POST', 'GET'])
+@limiter.limit("50 per hour")
+@require_api_key
+def api_projection():
+    """
+    Estimated price for each of several years, for one or more locations
+    
+    POST/GET /api/projection
+    Parameters:
+    - state, city, locality: string, one location
+    - locations: list of {state, city, locality, latitude, longitude}
+      (JSON only) to compare several locations instead
+    - years: list or comma-separated string (default: 2020-2030)
+    - plot_size_sqft, road_width_ft, nearby_schools, nearby_metro,
+      commercial_area, area_type: as for /api/estimate, shared by all locations
+    """
+    from config import Config
+    
+    data = (request.get_json(silent=True) or request.form.to_dict()) if request.method == 'POST' else request.args.to_dict()
+    
+    locations = data.get('locations') or [{
+        'state': data.get('state'), 'city': data.get('city'), 'locality': data.get('locality'),
+        'latitude': data.get('latitude'), 'longitude': data.get('longitude')
+    }]
+    if not isinstance(locations, list) or not all(isinstance(location, dict) for location in locations):
+        return jsonify({'error': 'locations must be a list of objects'}), 400
+    if len(locations) > Config.PROJECTION_MAX_LOCATIONS:
+        return jsonify({'error': f'At most {Config.PROJECTION_MAX_LOCATIONS} locations per request'}), 400
+    if not all(location.get('state') and location.get('city') for location in locations):
+        return jsonify({
+            'error': 'Missing required parameters',
+            'required': ['state', 'city'],
+            'message': 'Every location needs a state and city'
+        }), 400
+    
+    years = data.get('years') or list(Config.PROJECTION_YEARS)
+    try:
+        if isinstance(years, str):
+            years = years.split(',')
+        years = sorted({int(year) for year in years})
+    except (TypeError, ValueError):
+        return jsonify({'error': 'years must be a list of integers'}), 400
+    if years[0] < 2020 or years[-1] > 2030:
+        return jsonify({'error': 'years must be between 2020 and 2030'}), 400
+    
+    factors, error = parse_factors(data)
+    if error:
+        return error
+    factors.pop('year')
+    
+    requests = []
+    for location in locations:
+        coordinates, error = parse_coordinates(location)
+        if error:
+            return error
+        latitude, longitude = coordinates
+        requests.append(dict(factors, state=location['state'], city_name=location['city'],
+                             locality_name=location.get('locality'),
+                             latitude=latitude, longitude=longitude))
+    
+    results = PriceEstimator().project_batch(requests, years)
+    
+    return jsonify({
+        'success': True,
+        'data': [dict(result, state=location['state'], city=location['city'],
+                      locality=location.get('locality'))
+                 for location, result in zip(locations, results)],
+        'metadata': {
+            'api_version': '1.0',
+            'years': years
+        }
+    })
+
+@api_bp.route('/what-if', methods=['POST', 'GET'])
+@limiter.limit("50 per hour")
+@require_api_key
+def api_what_if():
+    """
+    Estimates for every combination of the given input values
+    
+    POST/GET /api/what-if
+    Parameters:
+    - state, city: string (required); locality, latitude, longitude (optional)
+    - plot_size_sqft, road_width_ft, nearby_schools, nearby_metro,
+      commercial_area, area_type, year: a value, or a list of values
+      (JSON list or comma-separated string) to vary along that axis
+    
+    Prices come back as flat lists in row-major order over "axes"
+    (the last axis varies fastest), with the grid "shape".
+    """
+    from config import Config
+    from price_estimator import GRID_AXES
+    
+    data = (request.get_json(silent=True) or request.form.to_dict()) if request.method == 'POST' else request.args.to_dict()
+    
+    state = data.get('state')
+    city = data.get('city')
+    if not state or not city:
+        return jsonify({
+            'error': 'Missing required parameters',
+            'required': ['state', 'city']
+        }), 400
+    
+    coordinates, error = parse_coordinates(data)
+    if error:
+        return error
+    latitude, longitude = coordinates
+    
+    axes = {}
+    for name in GRID_AXES:
+        given = data.get(name)
+        if given is None or given == '':
+            continue
+        values = given if isinstance(given, list) else str(given).split(',')
+        parsed = []
+        for value in values:
+            factors, error = parse_factors({name: value.strip() if isinstance(value, str) else value})
+            if error:
+                return error
+            parsed.append(factors[name])
+        axes[name] = parsed
+    
+    cells = 1
+    for values in axes.values():
+        cells *= len(values)
+    if cells > Config.WHAT_IF_MAX_CELLS:
+        return jsonify({'error': f'Grid has {cells} cells; the limit is {Config.WHAT_IF_MAX_CELLS}'}), 400
+    
+    result = PriceEstimator().estimate_grid(state, city, locality_name=data.get('locality'),
+                                            latitude=latitude, longitude=longitude, **axes)
+    
+    return jsonify({
+        'success': True,
+        'data': result,
+        'metadata': {
+            'api_version': '1.0',
+            'cells': cells
+        }
+    })
+
+@api_bp.route('/budget-search', methods=['POST', 'GET'])
+@limiter.limit("100 per hour")
+@require_api_key
+def api_budget_search():
+    """
+    Localities whose estimate fits a budget
+    
+    POST/GET /api/budget-search
+    Parameters:
+    - budget: float, total price in INR (required)
+    - state, city: string (optional filters; a city without a state
+      matches the first city of that name)
+    - plot_size_sqft, road_width_ft, nearby_schools, nearby_metro,
+      commercial_area, year, area_type: as for /api/estimate
+    - sort: price_desc (default, closest to budget first) or price_asc
+    - offset: integer (default 0), limit: integer (default 20, max 100)
+    """
+    from budget_search import budget_index
+    from config import Config
+    
+    data = (request.get_json(silent=True) or request.form.to_dict()) if request.method == 'POST' else request.args.to_dict()
+    
+    try:
+        budget = float(data['budget'])
+        offset = int(data.get('offset', 0))
+        limit = int(data.get('limit', 20))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'budget is required and must be a number; offset and limit must be integers'}), 400
+    
+    if budget <= 0 or offset < 0 or not 1 <= limit <= Config.BUDGET_SEARCH_MAX_LIMIT:
+        return jsonify({'error': f'budget must be positive, offset non-negative and limit 1-{Config.BUDGET_SEARCH_MAX_LIMIT}'}), 400
+    
+    sort = data.get('sort', 'price_desc')
+    if sort not in ['price_desc', 'price_asc']:
+        return jsonify({'error': 'sort must be price_desc or price_asc'}), 400
+    
+    factors, error = parse_factors(data)
+    if error:
+        return error
+    
+    total, matches = budget_index().within_budget(
+        budget, factors, state=data.get('state'), city=data.get('city'),
+        offset=offset, limit=limit, cheapest_first=sort == 'price_asc'
+    )
+    
+    return jsonify({
+        'success': True,
+        'data': [{
+            'locality': locality.name,
+            'city': city.name,
+            'state': city.state,
+            'pin_code': locality.pin_code,
+            'estimated_price_per_sqft': round(price_per_sqft, 2),
+            'total_estimated_price': round(price_per_sqft * factors['plot_size_sqft'], 2),
+            'confidence_score': PriceEstimator.LOCALITY_CONFIDENCE
+        } for locality, city, price_per_sqft in matches],
+        'pagination': {
+            'offset': offset,
+            'limit': limit,
+            'total': total
+        }
+    })
+
+@api_bp.route('/comps', methods=['POST', 'GET'])
+@limiter.limit("100 per hour")
+@require_api_key
+def api_comps():
+    """
+    Most similar past estimates in the same city, as supporting evidence
+    
+    POST/GET /api/comps
+    Parameters:
+    - state, city: string (required)
+    - locality: string (optional, estimates elsewhere rank lower)
+    - plot_size_sqft, road_width_ft, nearby_schools, nearby_metro,
+      commercial_area, year: as for /api/estimate
+    - k: integer (default 10, max 100)
+    
+    The first comps request in each worker loads the whole estimates log
+    (hot table, compact log and archives) into the index before
+    answering, so it is slower than the rest; later requests only read
+    new rows.
+    """
+    from comps import comps_index
+    from config import Config
+    
+    data = (request.get_json(silent=True) or request.form.to_dict()) if request.method == 'POST' else request.args.to_dict()
+    state = data.get('state')
+    city = data.get('city')
+    if not state or not city:
+        return jsonify({'error': 'state and city are required'}), 400
+    
+    try:
+        k = int(data.get('k', Config.COMPS_DEFAULT_K))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'k must be an integer'}), 400
+    if not 1 <= k <= Config.COMPS_MAX_K:
+        return jsonify({'error': f'k must be 1-{Config.COMPS_MAX_K}'}), 400
+    
+    factors, error = parse_factors(data)
+    if error:
+        return error
+    
+    total, comps = comps_index.query(
+        state, city, plot_size_sqft=factors['plot_size_sqft'], road_width_ft=factors['road_width_ft'],
+        nearby_schools=factors['nearby_schools'], nearby_metro=factors['nearby_metro'],
+        commercial_area=factors['commercial_area'], year=factors['year'],
+        locality=data.get('locality') or None, k=k
+    )
+    
+    return jsonify({
+        'success': True,
+        'data': comps,
+        'searched': total
+    })
+
+@api_bp.route('/price-distribution', methods=['GET'])
+@limiter.limit("100 per hour")
+@require_api_key
+def api_price_distribution():
+    """
+    Distribution of estimated price per sqft per city, from the merged
+    quantile sketches (not a scan of the estimates log)
+    
+    GET /api/price-distribution
+    Parameters:
+    - state, city: string (optional filters)
+    - limit: integer, cities listed, most estimates first (default 20, max 500)
+    """
+    from price_sketches import price_sketches
+    from config import Config
+    
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= Config.SKETCH_MAX_CITIES:
+        return jsonify({'error': f'limit must be 1-{Config.SKETCH_MAX_CITIES}'}), 400
+    
+    distribution = price_sketches.distribution(
+        state=request.args.get('state'), city=request.args.get('city'), limit=limit)
+    
+    return jsonify({
+        'success': True,
+        'data': distribution
+    })
+
 @api_bp.route('/cities', methods=['GET'])
 @limiter.limit("100 per hour")
 @require_api_key
@@ -222,6 +554,23 @@ def api_localities():
         } for locality in localities]
     })
 
+@api_bp.route('/metrics', methods=['GET'])
+@limiter.exempt
+def api_metrics():
+    """Prometheus-style metrics for all workers, behind METRICS_TOKEN"""
+    import hmac
+    from flask import Response
+    from config import Config
+    from metrics import metrics
+    
+    if not Config.METRICS_TOKEN:
+        return jsonify({'error': 'Metrics are disabled, set METRICS_TOKEN to enable them'}), 404
+    given = request.headers.get('Authorization', '').encode()
+    if not hmac.compare_digest(given, f'Bearer {Config.METRICS_TOKEN}'.encode()):
+        return jsonify({'error': 'Invalid metrics token'}), 401
+    
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @api_bp.route('/health', methods=['GET'])
 def api_health():
     """Health check endpoint"""
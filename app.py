@@ -7,14 +7,18 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
+from db_routing import RoutingSession, router
+from metrics import metrics
+import query_tracking
+from config import Config
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging (DEBUG logging is costly, enable it explicitly)
+logging.basicConfig(level=Config.LOG_LEVEL)
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
 
 # Create the app
 app = Flask(__name__)
@@ -27,7 +31,8 @@ CORS(app, origins=["*"])
 # Configure rate limiting
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=["100 per hour"]
+    default_limits=["100 per hour"],
+    enabled=Config.RATELIMIT_ENABLED
 )
 limiter.init_app(app)
 
@@ -41,16 +46,31 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 # Initialize extensions
 db.init_app(app)
+metrics.init_app(app)
+query_tracking.init_app(app)
 
 with app.app_context():
     # Import models to ensure tables are created
     import models
     db.create_all()
     
+    # Bring existing databases up to date with new optional columns
+    from schema import add_missing_columns
+    from archive import add_missing_partition_columns
+    add_missing_columns(db.engine, db.metadata)
+    add_missing_partition_columns()
+    
     # Seed initial data if database is empty
     from seed_data import seed_initial_data
     seed_initial_data()
 
+# Route reads to the replica once the primary is ready
+router.init_app(app)
+
+# Flush buffered price sketches in the background and at exit
+from price_sketches import price_sketches
+price_sketches.init_app(app)
+
 # Register blueprints
 from routes import main_bp
 from api import api_bp
@@ -59,3 +79,9 @@ from auth import auth_bp
 app.register_blueprint(main_bp)
 app.register_blueprint(api_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/admin')
+
+# Register CLI commands
+from commands import estimates_cli, prices_cli
+
+app.cli.add_command(estimates_cli)
+app.cli.add_command(prices_cli)
@@ -0,0 +1,183 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import MetaData, select, insert, delete, func, inspect, literal, text
+from models import PriceEstimate, EstimateRollup, EstimateRequest
+from app import db
+from config import Config
+
+ARCHIVE_PREFIX = 'price_estimate_archive_'
+
+_archive_metadata = MetaData()
+
+def partition_name(moment):
+    """Name of the monthly archive table holding estimates from moment"""
+    return f"{ARCHIVE_PREFIX}{moment.year:04d}{moment.month:02d}"
+
+def archive_table(name):
+    """Table object for an archive partition, same columns as PriceEstimate"""
+    table = _archive_metadata.tables.get(name)
+    if table is None:
+        table = PriceEstimate.__table__.to_metadata(_archive_metadata, name=name)
+    return table
+
+def archive_partitions():
+    """Existing archive partition names, newest month first"""
+    names = inspect(db.engine).get_table_names()
+    return sorted((name for name in names if name.startswith(ARCHIVE_PREFIX)), reverse=True)
+
+def add_missing_partition_columns():
+    """
+    Bring existing archive partitions up to PriceEstimate's current
+    columns, so archiving and exports keep working after it gains one.
+    """
+    from schema import add_missing_columns
+
+    for name in archive_partitions():
+        archive_table(name)
+    return add_missing_columns(db.engine, _archive_metadata)
+
+def _month_bounds(moment):
+    start = datetime(moment.year, moment.month, 1)
+    if moment.month == 12:
+        end = datetime(moment.year + 1, 1, 1)
+    else:
+        end = datetime(moment.year, moment.month + 1, 1)
+    return start, end
+
+def compact_estimates(cutoff=None, batch_size=None):
+    """
+    Move estimates created before cutoff from the hot PriceEstimate table
+    into monthly archive partitions, keeping per-city monthly rollups.
+    Rows move in id-ordered batches so each transaction stays short, and
+    only months that hold rows get a partition.
+
+    Retention applies to the wide PriceEstimate log only. Requests logged
+    with COMPACT_AUDIT stay in EstimateRequest, whose rows are small and
+    share their EstimateResult, so they are not archived.
+    """
+    if cutoff is None:
+        cutoff = datetime.utcnow() - timedelta(days=Config.ESTIMATE_RETENTION_DAYS)
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    hot = PriceEstimate.__table__
+    stats = {'archived': 0, 'partitions': []}
+
+    start = None
+    while True:
+        # Jump straight to the next month with rows, skipping empty ones
+        query = select(func.min(hot.c.created_at)).where(hot.c.created_at < cutoff)
+        if start is not None:
+            query = query.where(hot.c.created_at >= start)
+        oldest = db.session.execute(query).scalar()
+        if oldest is None:
+            break
+        start, end = _month_bounds(oldest)
+        name = partition_name(start)
+        moved = _archive_month(hot, archive_table(name), start, min(end, cutoff), batch_size)
+        if moved:
+            stats['archived'] += moved
+            stats['partitions'].append(name)
+        start = end
+
+    logging.info(f"Archived {stats['archived']} estimates into {len(stats['partitions'])} partitions")
+    return stats
+
+def _archive_month(hot, archive, start, end, batch_size):
+    in_month = (hot.c.created_at >= start) & (hot.c.created_at < end)
+    month = start.strftime('%Y-%m')
+    moved = 0
+
+    while True:
+        ids = db.session.execute(
+            select(hot.c.id).where(in_month).order_by(hot.c.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        if not moved:
+            archive.create(db.session.connection(), checkfirst=True)
+
+        try:
+            _update_rollups(hot, month, ids)
+            db.session.execute(
+                insert(archive).from_select(
+                    [column.name for column in hot.columns],
+                    select(*hot.columns).where(hot.c.id.in_(ids))
+                )
+            )
+            db.session.execute(delete(hot).where(hot.c.id.in_(ids)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        moved += len(ids)
+
+    return moved
+
+def _update_rollups(hot, month, ids):
+    grouped = db.session.execute(
+        select(
+            hot.c.state,
+            hot.c.city,
+            func.count(),
+            func.sum(hot.c.estimated_price_per_sqft),
+            func.sum(hot.c.total_estimated_price),
+            func.min(hot.c.estimated_price_per_sqft),
+            func.max(hot.c.estimated_price_per_sqft)
+        ).where(hot.c.id.in_(ids)).group_by(hot.c.state, hot.c.city)
+    ).all()
+
+    existing = {
+        (rollup.state, rollup.city): rollup
+        for rollup in EstimateRollup.query.filter_by(month=month).all()
+    }
+
+    for state, city, count, per_sqft_sum, total_sum, min_price, max_price in grouped:
+        rollup = existing.get((state, city))
+        if rollup is None:
+            rollup = EstimateRollup(month=month, state=state, city=city,
+                                    estimate_count=0, price_per_sqft_sum=0.0,
+                                    total_price_sum=0.0)
+            db.session.add(rollup)
+            existing[(state, city)] = rollup
+
+        rollup.estimate_count += count
+        rollup.price_per_sqft_sum += per_sqft_sum or 0.0
+        rollup.total_price_sum += total_sum or 0.0
+        if min_price is not None:
+            rollup.min_price_per_sqft = min(min_price, rollup.min_price_per_sqft or min_price)
+        if max_price is not None:
+            rollup.max_price_per_sqft = max(max_price, rollup.max_price_per_sqft or max_price)
+
+def count_estimates():
+    """Total estimates across the hot table, compact audit log and archive"""
+    hot_count = PriceEstimate.query.count() + EstimateRequest.query.count()
+    archived = db.session.query(func.sum(EstimateRollup.estimate_count)).scalar()
+    return hot_count + (archived or 0)
+
+def iter_estimates(batch_size=None):
+    """
+    Yield estimate rows newest first within each source: the compact
+    audit log (re-expanded), the hot table, then every archive partition.
+    Rows are streamed rather than loaded all at once. Each row's source
+    is 'compact' (id is an EstimateRequest id) or 'wide' (a PriceEstimate
+    id, kept when archived), since the two id sequences overlap.
+    """
+    from audit import compact_estimates_select
+
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    queries = [compact_estimates_select().add_columns(literal('compact').label('source'))
+               .order_by(EstimateRequest.created_at.desc())]
+    for table in [PriceEstimate.__table__] + [archive_table(name) for name in archive_partitions()]:
+        queries.append(select(table, literal('wide').label('source')).order_by(table.c.created_at.desc()))
+
+    for query in queries:
+        result = db.session.execute(query, execution_options={'yield_per': batch_size})
+        for row in result:
+            yield row
+
+def vacuum_database():
+    """Reclaim space freed by compaction (SQLite only)"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text('VACUUM'))
+    return True
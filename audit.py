@@ -0,0 +1,260 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import PriceEstimate, EstimateResult, EstimateRequest, APIKey
+from live_feed import estimate_feed
+from comps import comps_index
+from price_sketches import price_sketches
+from metrics import metrics
+from db_routing import bookkeeping_writes
+from app import db
+from config import Config
+
+# Input and output fields that make up an estimate's identity
+CONTENT_FIELDS = [
+    'state', 'city', 'locality', 'plot_size_sqft', 'road_width_ft',
+    'nearby_schools', 'nearby_metro', 'commercial_area', 'year',
+    'estimated_price_per_sqft', 'total_estimated_price', 'confidence_score',
+    'pin_code', 'latitude', 'longitude'
+]
+
+# Fields added after the first results were stored. They enter the hash
+# only when set, so results logged before them keep their hashes.
+OPTIONAL_CONTENT_FIELDS = {'pin_code', 'latitude', 'longitude'}
+
+class _ResultIdCache:
+    """Bounded LRU of content hash -> EstimateResult.id"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, content_hash):
+        result_id = self._entries.get(content_hash)
+        if result_id is not None:
+            self._entries.move_to_end(content_hash)
+        metrics.inc('cache_requests_total', cache='audit_result_ids',
+                    result='miss' if result_id is None else 'hit')
+        return result_id
+
+    def put(self, content_hash, result_id):
+        self._entries[content_hash] = result_id
+        self._entries.move_to_end(content_hash)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+_result_ids = _ResultIdCache(Config.AUDIT_HASH_CACHE_SIZE)
+
+# Session.info key for result ids not yet committed, per cache
+PENDING_RESULT_IDS = 'audit_pending_result_ids'
+
+def content_hash(fields):
+    """Stable 128-bit hash of an estimate's inputs and outputs"""
+    canonical = '\x1f'.join(
+        repr(fields.get(name)) if name not in OPTIONAL_CONTENT_FIELDS else f'{name}={fields[name]!r}'
+        for name in CONTENT_FIELDS
+        if name not in OPTIONAL_CONTENT_FIELDS or fields.get(name) is not None
+    )
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+def estimate_fields(inputs, result):
+    """Normalized content fields from estimator inputs and its result"""
+    return {
+        'state': inputs['state'],
+        'city': inputs['city'],
+        'locality': inputs.get('locality') or None,
+        'plot_size_sqft': float(inputs['plot_size_sqft']),
+        'road_width_ft': float(inputs['road_width_ft']) if inputs.get('road_width_ft') is not None else None,
+        'nearby_schools': bool(inputs.get('nearby_schools')),
+        'nearby_metro': bool(inputs.get('nearby_metro')),
+        'commercial_area': bool(inputs.get('commercial_area')),
+        'year': int(inputs['year']),
+        'estimated_price_per_sqft': result['estimated_price_per_sqft'],
+        'total_estimated_price': result['total_estimated_price'],
+        'confidence_score': result['confidence_score'],
+        'pin_code': inputs.get('pin_code') or None,
+        'latitude': float(inputs['latitude']) if inputs.get('latitude') is not None else None,
+        'longitude': float(inputs['longitude']) if inputs.get('longitude') is not None else None
+    }
+
+def record_estimate(inputs, result, api_key=None, ip_address=None):
+    """
+    Persist an estimate to the audit log, publish it to the live feed and
+    add it to the comps index and the per-city price sketches.
+
+    Returns a PriceEstimate carrying id and created_at. In compact audit
+    mode that object is a transient view rebuilt from the stored result
+    and request rows; the wide row itself is never written.
+    """
+    fields = estimate_fields(inputs, result)
+
+    with bookkeeping_writes():
+        if Config.COMPACT_AUDIT:
+            request_row = _store_compact(db.session, fields, api_key.id if api_key else None, ip_address)
+            db.session.commit()
+            record = PriceEstimate(
+                id=request_row.id,
+                api_key=api_key.key if api_key else None,
+                ip_address=ip_address,
+                created_at=request_row.created_at,
+                **fields
+            )
+        else:
+            record = PriceEstimate(
+                api_key=api_key.key if api_key else None,
+                ip_address=ip_address,
+                **fields
+            )
+            db.session.add(record)
+            db.session.commit()
+
+        estimate_feed.publish(record)
+        comps_index.add(record)
+        price_sketches.add(record)
+    return record
+
+def _store_compact(session, fields, api_key_id, ip_address, cache=None):
+    cache = cache or _result_ids
+    digest = content_hash(fields)
+    # Ids found or stored in this transaction reach the cache only once it
+    # commits, so a rollback can't leave the cache pointing at a lost row
+    pending = session.info.setdefault(PENDING_RESULT_IDS, {}).setdefault(cache, {})
+    result_id = cache.get(digest) or pending.get(digest)
+
+    if result_id is None:
+        result_id = session.execute(
+            select(EstimateResult.id).filter_by(content_hash=digest)
+        ).scalar()
+
+        if result_id is None:
+            try:
+                with session.begin_nested():
+                    stored = EstimateResult(content_hash=digest, **fields)
+                    session.add(stored)
+                result_id = stored.id
+            except IntegrityError:
+                # Another worker stored the same result first
+                result_id = session.execute(
+                    select(EstimateResult.id).filter_by(content_hash=digest)
+                ).scalar_one()
+
+        pending[digest] = result_id
+
+    request_row = EstimateRequest(
+        result_id=result_id,
+        api_key_id=api_key_id,
+        ip_address=ip_address,
+        created_at=datetime.utcnow()
+    )
+    session.add(request_row)
+    return request_row
+
+@event.listens_for(Session, 'after_commit')
+def _cache_committed_result_ids(session):
+    if session.in_nested_transaction():
+        return  # a savepoint was released, the outer transaction is still open
+    for cache, entries in session.info.pop(PENDING_RESULT_IDS, {}).items():
+        for digest, result_id in entries.items():
+            cache.put(digest, result_id)
+
+@event.listens_for(Session, 'after_transaction_end')
+def _drop_uncommitted_result_ids(session, transaction):
+    # Whatever is left when the outermost transaction ends was rolled back
+    if transaction.parent is None:
+        session.info.pop(PENDING_RESULT_IDS, None)
+
+def compact_estimates_select():
+    """
+    Select compact audit rows re-expanded to the PriceEstimate column
+    layout, so exports treat them like any other estimate row.
+    """
+    return select(
+        EstimateRequest.id.label('id'),
+        *[getattr(EstimateResult, name).label(name) for name in CONTENT_FIELDS],
+        APIKey.key.label('api_key'),
+        EstimateRequest.ip_address.label('ip_address'),
+        EstimateRequest.created_at.label('created_at')
+    ).join(
+        EstimateResult, EstimateRequest.result_id == EstimateResult.id
+    ).outerjoin(
+        APIKey, EstimateRequest.api_key_id == APIKey.id
+    )
+
+def recent_estimates(limit=10):
+    """
+    Newest logged estimates across the wide table and the compact audit
+    log, in one UNION ALL query.
+    """
+    hot = PriceEstimate.__table__
+    wide = select(
+        hot.c.id,
+        *[hot.c[name] for name in CONTENT_FIELDS],
+        hot.c.api_key,
+        hot.c.ip_address,
+        hot.c.created_at
+    )
+    combined = wide.union_all(compact_estimates_select()).subquery()
+    return db.session.execute(
+        select(combined).order_by(combined.c.created_at.desc()).limit(limit)
+    ).all()
+
+def compare_storage(total_rows=20000, distinct_results=500):
+    """
+    Insert the same synthetic request stream into a wide PriceEstimate
+    table and into the compact schema, each in its own temporary SQLite
+    file. Returns insert throughput and file size for both.
+    """
+    fields_pool = [
+        {
+            'state': 'Maharashtra', 'city': 'Pune', 'locality': f'Locality {i % 50}',
+            'plot_size_sqft': 1000.0 + (i % 20) * 100, 'road_width_ft': 20.0,
+            'nearby_schools': bool(i % 2), 'nearby_metro': bool(i % 3 == 0),
+            'commercial_area': False, 'year': 2024,
+            'estimated_price_per_sqft': 16000.0 + i, 'total_estimated_price': (16000.0 + i) * 1000,
+            'confidence_score': 0.9
+        }
+        for i in range(distinct_results)
+    ]
+    report = {}
+
+    for mode in ('wide', 'compact'):
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        engine = create_engine(f'sqlite:///{path}')
+        try:
+            db.metadata.create_all(engine)
+            cache = _ResultIdCache(Config.AUDIT_HASH_CACHE_SIZE)
+            started = time.perf_counter()
+            with Session(engine) as session:
+                for i in range(total_rows):
+                    fields = fields_pool[(i * 7919) % distinct_results]
+                    if mode == 'wide':
+                        session.add(PriceEstimate(ip_address='10.0.0.1', api_key=None, **fields))
+                    else:
+                        _store_compact(session, fields, None, '10.0.0.1', cache=cache)
+                    if i % 1000 == 999:
+                        session.commit()
+                session.commit()
+            elapsed = time.perf_counter() - started
+            report[mode] = {
+                'rows': total_rows,
+                'seconds': round(elapsed, 3),
+                'rows_per_second': round(total_rows / elapsed, 1) if elapsed else None,
+                'file_bytes': os.path.getsize(path)
+            }
+        finally:
+            engine.dispose()
+            os.remove(path)
+
+    logging.info(f"Audit storage comparison: {report}")
+    return report
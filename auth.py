@@ -44,25 +44,110 @@ def logout():
 @auth_bp.route('/dashboard')
 @admin_required
 def dashboard():
-    from app import db
+    from archive import count_estimates
+    from audit import recent_estimates
+    from price_sketches import price_sketches
     
     # Get statistics
     total_cities = City.query.count()
     total_localities = Locality.query.count()
-    total_estimates = PriceEstimate.query.count()
+    total_estimates = count_estimates()
     total_api_keys = APIKey.query.filter_by(is_active=True).count()
     
-    # Recent estimates
-    recent_estimates = PriceEstimate.query.order_by(
-        PriceEstimate.created_at.desc()
-    ).limit(10).all()
+    # Recent estimates, including those in the compact audit log
+    recent = recent_estimates(limit=10)
+    
+    # Price distribution of the busiest cities, from the quantile sketches
+    price_distribution = price_sketches.distribution(limit=10)['cities']
     
     return render_template('admin/dashboard.html',
                          total_cities=total_cities,
                          total_localities=total_localities,
                          total_estimates=total_estimates,
                          total_api_keys=total_api_keys,
-                         recent_estimates=recent_estimates)
+                         recent_estimates=recent,
+                         price_distribution=price_distribution)
+
+@auth_bp.route('/live-estimates')
+@admin_required
+def live_estimates():
+    """
+    Server-sent events stream of new price estimates.
+
+    Each open stream holds a request thread for as long as it is open, so
+    it is only served by threaded or async workers (gunicorn gthread,
+    gevent or eventlet, or the threaded dev server). On a sync worker it
+    would block the whole worker, and the endpoint refuses with 503.
+    LIVE_FEED_MAX_SUBSCRIBERS should stay below a gthread worker's
+    --threads so the API keeps threads to serve. The feed fans out within
+    one worker process: a dashboard sees the estimates served by the
+    worker it is connected to.
+    """
+    from flask import Response
+    from live_feed import estimate_feed, event_stream
+    
+    if not request.environ.get('wsgi.multithread'):
+        response = jsonify({'error': 'The live feed needs threaded or async workers '
+                                     '(e.g. gunicorn --worker-class gthread --threads 8)'})
+        response.status_code = 503
+        return response
+    
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = estimate_feed.subscribe(last_event_id=last_event_id)
+    if subscription is None:
+        response = jsonify({'error': 'Too many live dashboard connections'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    
+    response = Response(event_stream(subscription), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@auth_bp.route('/profile', methods=['GET', 'POST'])
+@admin_required
+def profile():
+    """
+    POST starts sampling every thread's stack on this worker for N seconds
+    in a background thread and returns 202 straight away. GET returns the
+    finished profile in collapsed format (feed to flamegraph.pl or
+    speedscope), or 202 while it is still running. Profiles are per worker
+    process: with several workers, fetch from the worker that started it
+    (its pid is in the response).
+    """
+    from flask import Response
+    from config import Config
+    from profiler import background_profile, format_collapsed
+    
+    worker = {'pid': os.getpid()}
+    if request.method == 'GET':
+        if background_profile.running:
+            return jsonify({'status': 'running', 'seconds': background_profile.seconds, **worker}), 202
+        if background_profile.samples is None:
+            return jsonify({'error': 'No profile has been taken on this worker', **worker}), 404
+        response = Response(format_collapsed(background_profile.samples), mimetype='text/plain')
+        response.headers['Content-Disposition'] = f'attachment; filename=profile-{os.getpid()}.collapsed'
+        return response
+    
+    try:
+        seconds = float(request.args.get('seconds', 5))
+        interval_ms = float(request.args.get('interval_ms', Config.PROFILE_SAMPLE_INTERVAL * 1000))
+    except ValueError:
+        return jsonify({'error': 'seconds and interval_ms must be numbers'}), 400
+    
+    if not 0 < seconds <= Config.PROFILE_MAX_SECONDS:
+        return jsonify({'error': f'seconds must be between 0 and {Config.PROFILE_MAX_SECONDS}'}), 400
+    if interval_ms < 1:
+        return jsonify({'error': 'interval_ms must be at least 1'}), 400
+    
+    if not background_profile.start(seconds, interval=interval_ms / 1000.0):
+        return jsonify({'error': 'A profile is already running on this worker', **worker}), 409
+    
+    response = jsonify({'status': 'running', 'seconds': seconds, **worker})
+    response.status_code = 202
+    response.headers['Location'] = url_for('auth.profile')
+    return response
 
 @auth_bp.route('/data-management')
 @admin_required
@@ -108,6 +193,8 @@ def upload_csv():
                 success, message = data_manager.import_localities_csv(file_path)
             elif data_type == 'multipliers':
                 success, message = data_manager.import_multipliers_csv(file_path)
+            elif data_type == 'price_history':
+                success, message = data_manager.import_price_history_csv(file_path)
             else:
                 success, message = False, 'Invalid data type'
             
@@ -141,7 +228,9 @@ def update_city():
             city.growth_rate = float(growth_rate)
             
             from app import db
+            from pricing_snapshot import pricing_snapshot
             db.session.commit()
+            pricing_snapshot.invalidate()
             flash('City updated successfully', 'success')
         else:
             flash('City not found', 'error')
@@ -0,0 +1,88 @@
+import heapq
+import re
+from bisect import bisect_left
+from pricing_snapshot import pricing_snapshot
+from config import Config
+
+_SPACES = re.compile(r'\s+')
+
+def normalize(text):
+    return _SPACES.sub(' ', (text or '').casefold()).strip()
+
+class AutocompleteIndex:
+    """
+    Prefix index over city names, locality names (each word start counts)
+    and pin codes, built from a PricingSnapshot.
+
+    Entries are numbered in rank order (bigger city first; within a city
+    the city itself, then localities and pin codes by price), so a lower
+    number is a better match. Short prefixes match many
+    entries; their best max_results are precomputed in a dict. Longer
+    prefixes are answered from a sorted key array by binary search,
+    scanning only the matching range.
+    """
+
+    def __init__(self, snapshot, max_results=None, depth=None):
+        self.max_results = max_results or Config.AUTOCOMPLETE_MAX_RESULTS
+        self.depth = depth or Config.AUTOCOMPLETE_INDEX_DEPTH
+        self.version = snapshot.version
+
+        entries = []
+        for city in snapshot.cities:
+            entries.append(({normalize(city.name)}, (-(city.population or 0), 0, -city.base_price_per_sqft), {
+                'type': 'city', 'name': city.name, 'city': city.name, 'state': city.state, 'tier': city.tier
+            }))
+        for locality in snapshot.localities:
+            city = snapshot.cities_by_id.get(locality.city_id)
+            if city is None:
+                continue
+            name = normalize(locality.name)
+            words = name.split(' ')
+            keys = {' '.join(words[i:]) for i in range(len(words))}
+            entries.append((keys, (-(city.population or 0), 1, -locality.price_per_sqft), {
+                'type': 'locality', 'name': locality.name, 'city': city.name, 'state': city.state,
+                'tier': city.tier, 'pin_code': locality.pin_code
+            }))
+            if locality.pin_code:
+                entries.append(({locality.pin_code.strip()}, (-(city.population or 0), 2, -locality.price_per_sqft), {
+                    'type': 'pin_code', 'name': locality.pin_code, 'locality': locality.name,
+                    'city': city.name, 'state': city.state, 'tier': city.tier
+                }))
+
+        entries.sort(key=lambda entry: (entry[1], entry[2]['name']))
+        self.results = [entry[2] for entry in entries]
+
+        pairs = sorted((key, rank) for rank, (keys, _, _) in enumerate(entries) for key in keys)
+        self.keys = [key for key, _ in pairs]
+        self.ranks = [rank for _, rank in pairs]
+
+        # Best matches for every short prefix; entries arrive best first
+        self.top = {}
+        for rank, (keys, _, _) in enumerate(entries):
+            prefixes = {key[:length] for key in keys for length in range(1, min(len(key), self.depth) + 1)}
+            for prefix in prefixes:
+                best = self.top.setdefault(prefix, [])
+                if len(best) < self.max_results:
+                    best.append(rank)
+
+    @classmethod
+    def build(cls, snapshot):
+        return cls(snapshot)
+
+    def search(self, prefix, limit=None):
+        limit = self.max_results if limit is None else min(limit, self.max_results)
+        prefix = normalize(prefix)
+        if not prefix or limit < 1:
+            return []
+
+        if len(prefix) <= self.depth:
+            ranks = self.top.get(prefix, [])[:limit]
+        else:
+            start = bisect_left(self.keys, prefix)
+            end = bisect_left(self.keys, prefix + '\uffff', start)
+            ranks = heapq.nsmallest(limit, set(self.ranks[start:end]))
+        return [self.results[rank] for rank in ranks]
+
+def autocomplete_index(snapshot=None):
+    snapshot = snapshot or pricing_snapshot.current()
+    return snapshot.derived('autocomplete', AutocompleteIndex.build)
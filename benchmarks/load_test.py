@@ -0,0 +1,326 @@
+"""
+Closed-loop HTTP load generator for the estimate endpoints.
+
+Each of --concurrency clients sends a request, waits for the response and
+immediately sends the next, for --duration seconds. By default a gunicorn
+instance is started on a throwaway SQLite file (rate limiting disabled);
+pass --url to target a server that is already running:
+
+    python benchmarks/load_test.py --workers 4 --concurrency 16 --duration 30
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --api-key KEY \\
+        --replay estimates.csv --mix api_estimate=70,api_localities=20,web_estimate=10
+
+--replay takes a CSV from the admin estimate export (or synthetic_data.py)
+and draws request parameters from its rows, so the distribution of cities
+and localities matches production traffic. Reports throughput, p50/p95/p99
+latency and error rate per endpoint, optionally as JSON with --output.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+# Add the parent directory to the path to import modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+DEFAULT_MIX = 'api_estimate=50,api_cities=10,api_localities=20,web_estimate=20'
+ENDPOINTS = ['api_estimate', 'api_cities', 'api_localities', 'web_estimate']
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {name} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+def _flag(value):
+    return str(value).strip().lower() in ['true', '1', 'yes', 'on']
+
+def load_replay_rows(path, limit=None):
+    """Request parameters from an estimates CSV (export column names)"""
+    rows = []
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            if not row.get('state') or not row.get('city'):
+                continue
+            rows.append({
+                'state': row['state'],
+                'city': row['city'],
+                'locality': row.get('locality') or '',
+                'plot_size_sqft': row.get('plot_size_sqft') or 1000,
+                'road_width_ft': row.get('road_width_ft') or 20,
+                'nearby_schools': _flag(row.get('nearby_schools')),
+                'nearby_metro': _flag(row.get('nearby_metro')),
+                'commercial_area': _flag(row.get('commercial_area')),
+                'year': row.get('year') or 2024
+            })
+            if limit and len(rows) >= limit:
+                break
+    return rows
+
+class RequestFactory:
+    """Builds (method, path, body, headers) for each endpoint from a sample row"""
+
+    def __init__(self, rows, api_key):
+        self.rows = rows
+        self.api_key = api_key
+
+    def build(self, endpoint, rng):
+        row = rng.choice(self.rows)
+        headers = {'X-API-Key': self.api_key} if self.api_key else {}
+
+        if endpoint == 'api_estimate':
+            payload = dict(row)
+            for name in ('nearby_schools', 'nearby_metro', 'commercial_area'):
+                payload[name] = 'true' if row[name] else 'false'
+            headers['Content-Type'] = 'application/json'
+            return 'POST', '/api/estimate', json.dumps(payload).encode(), headers
+
+        if endpoint == 'api_cities':
+            return 'GET', '/api/cities?' + urllib.parse.urlencode({'state': row['state']}), None, headers
+
+        if endpoint == 'api_localities':
+            query = urllib.parse.urlencode({'city': row['city'], 'state': row['state']})
+            return 'GET', '/api/localities?' + query, None, headers
+
+        form = {
+            'state': row['state'], 'city': row['city'], 'locality': row['locality'],
+            'plot_size': row['plot_size_sqft'], 'road_width': row['road_width_ft'], 'year': row['year']
+        }
+        for name in ('nearby_schools', 'nearby_metro', 'commercial_area'):
+            if row[name]:
+                form[name] = 'on'
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        return 'POST', '/estimate', urllib.parse.urlencode(form).encode(), headers
+
+class LoadTest:
+    def __init__(self, base_url, factory, mix, concurrency, duration, warmup=2.0, timeout=30, seed=1):
+        self.base_url = base_url.rstrip('/')
+        self.factory = factory
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.timeout = timeout
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.latencies = {name: [] for name in self.endpoints}
+        self.errors = {name: {} for name in self.endpoints}
+
+    def _client(self, index, measure_from, deadline):
+        rng = random.Random(self.seed * 1000 + index)
+        latencies = {name: [] for name in self.endpoints}
+        errors = {name: {} for name in self.endpoints}
+
+        while time.monotonic() < deadline:
+            endpoint = rng.choices(self.endpoints, self.weights)[0]
+            method, path, body, headers = self.factory.build(endpoint, rng)
+            request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+
+            started = time.monotonic()
+            outcome = None
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                    status = response.status
+                if status >= 400:
+                    outcome = str(status)
+            except urllib.error.HTTPError as e:
+                outcome = str(e.code)
+            except (urllib.error.URLError, OSError) as e:
+                outcome = type(getattr(e, 'reason', e)).__name__
+            elapsed = time.monotonic() - started
+
+            if started < measure_from:
+                continue
+            latencies[endpoint].append(elapsed)
+            if outcome:
+                errors[endpoint][outcome] = errors[endpoint].get(outcome, 0) + 1
+
+        with self.lock:
+            for name in self.endpoints:
+                self.latencies[name].extend(latencies[name])
+                for outcome, count in errors[name].items():
+                    self.errors[name][outcome] = self.errors[name].get(outcome, 0) + count
+
+    def run(self):
+        start = time.monotonic()
+        measure_from = start + self.warmup
+        deadline = measure_from + self.duration
+        threads = [threading.Thread(target=self._client, args=(i, measure_from, deadline), daemon=True)
+                   for i in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report()
+
+    def report(self):
+        results = {}
+        every = []
+        total_errors = 0
+        for name in self.endpoints:
+            ordered = sorted(self.latencies[name])
+            every.extend(ordered)
+            errors = sum(self.errors[name].values())
+            total_errors += errors
+            results[name] = self._summary(ordered, errors)
+            results[name]['error_codes'] = self.errors[name]
+        results['all'] = self._summary(sorted(every), total_errors)
+        return results
+
+    def _summary(self, ordered, errors):
+        count = len(ordered)
+        return {
+            'requests': count,
+            'errors': errors,
+            'error_rate': round(errors / count, 4) if count else 0.0,
+            'throughput_rps': round(count / self.duration, 2),
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 2) if count else None,
+            'p95_ms': round(percentile(ordered, 0.95) * 1000, 2) if count else None,
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 2) if count else None,
+            'max_ms': round(ordered[-1] * 1000, 2) if count else None
+        }
+
+def print_report(results):
+    print(f"\n{'endpoint':16} {'requests':>9} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    for name, stats in results.items():
+        if not stats['requests']:
+            print(f"{name:16} {0:>9}")
+            continue
+        print(f"{name:16} {stats['requests']:>9} {stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.2f} "
+              f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['error_rate']:>8.2%}")
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def prepare_database(workdir):
+    """Seed a throwaway database and return (env, api_key, sample rows)"""
+    env = dict(os.environ)
+    env['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    env['RATELIMIT_ENABLED'] = 'false'
+    env.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.update(env)
+
+    from app import app, db
+    from models import APIKey, City, Locality
+
+    with app.app_context():
+        api_key = APIKey.query.filter_by(is_active=True).first().key
+        pairs = db.session.query(Locality.name, City.name, City.state).join(City).all()
+    rows = [{
+        'state': state, 'city': city, 'locality': locality,
+        'plot_size_sqft': 1200, 'road_width_ft': 30,
+        'nearby_schools': True, 'nearby_metro': False, 'commercial_area': False, 'year': 2024
+    } for locality, city, state in pairs]
+    return env, api_key, rows
+
+def start_gunicorn(env, workers, threads, port):
+    command = [sys.executable, '-m', 'gunicorn', '--preload', '--workers', str(workers),
+               '--threads', str(threads), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+               'main:app']
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("gunicorn did not become ready within 30s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Target an already running server instead of starting gunicorn')
+    parser.add_argument('--api-key', help='API key for --url targets (default: the seeded key)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent closed-loop clients')
+    parser.add_argument('--duration', type=float, default=20, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=2, help='Unmeasured seconds before measuring')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Endpoint weights (default {DEFAULT_MIX})')
+    parser.add_argument('--replay', help='Estimates CSV to draw request parameters from')
+    parser.add_argument('--replay-limit', type=int, default=200000, help='Rows to read from --replay')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for request selection')
+    parser.add_argument('--output', help='Write JSON results here')
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    process = None
+    rows = []
+    api_key = args.api_key
+
+    if args.url:
+        base_url = args.url
+    else:
+        workdir = tempfile.mkdtemp(prefix='lpe-load-')
+        env, seeded_key, rows = prepare_database(workdir)
+        api_key = api_key or seeded_key
+        port = _free_port()
+        process = start_gunicorn(env, args.workers, args.threads, port)
+        base_url = f'http://127.0.0.1:{port}'
+        print(f"Started gunicorn with {args.workers} worker(s) on {base_url} (database in {workdir})")
+
+    if args.replay:
+        rows = load_replay_rows(args.replay, limit=args.replay_limit)
+    if not rows:
+        raise SystemExit("No request parameters: pass --replay when using --url")
+
+    try:
+        print(f"Running {args.concurrency} client(s) for {args.duration}s against {base_url}")
+        test = LoadTest(base_url, RequestFactory(rows, api_key), mix, args.concurrency,
+                        args.duration, warmup=args.warmup, seed=args.seed)
+        results = test.run()
+    finally:
+        if process:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({
+                'meta': {
+                    'created_at': datetime.utcnow().isoformat(),
+                    'url': base_url,
+                    'workers': None if args.url else args.workers,
+                    'threads': None if args.url else args.threads,
+                    'concurrency': args.concurrency,
+                    'duration': args.duration,
+                    'mix': mix,
+                    'replay': args.replay
+                },
+                'results': results
+            }, handle, indent=2)
+        print(f"Results written to {args.output}")
+    return 1 if results['all']['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
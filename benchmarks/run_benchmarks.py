@@ -0,0 +1,383 @@
+"""
+Benchmark suite for the estimator, API and data-manager hot paths.
+
+Runs against a throwaway SQLite file seeded from data/, writes results as
+JSON and can compare them against a stored baseline:
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --compare baseline.json --threshold 0.2
+
+Exits with status 1 when any benchmark's mean regresses by more than the
+threshold. CSV import/export runs at 10k, 100k and 1M rows by default;
+use --quick or --sizes for shorter runs. --synthetic-cities loads a seeded
+national-scale dataset (see synthetic_data.py) on top of the shipped CSVs so
+lookups and exports run against realistic table sizes.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+QUICK_SIZES = [1000, 10000]
+BATCH_SIZES = [10, 100, 1000]
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    mean = statistics.fmean(ordered)
+    return {
+        'iterations': len(ordered),
+        'mean_ms': round(mean * 1000, 4),
+        'median_ms': round(statistics.median(ordered) * 1000, 4),
+        'p95_ms': round(ordered[p95_index] * 1000, 4),
+        'min_ms': round(ordered[0] * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4),
+        'ops_per_sec': round(1 / mean, 2) if mean else None
+    }
+
+def measure(fn, iterations, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+class BenchmarkSuite:
+    def __init__(self, app, db, sizes, iterations, only=None):
+        self.app = app
+        self.db = db
+        self.sizes = sizes
+        self.iterations = iterations
+        self.only = only
+        self.results = {}
+
+    def run(self, name, fn, iterations=None, warmup=1):
+        if self.only and self.only not in name:
+            return
+        print(f"  {name} ...", end='', flush=True)
+        self.results[name] = measure(fn, iterations or self.iterations, warmup=warmup)
+        print(f" {self.results[name]['mean_ms']:.3f} ms")
+
+    def load_synthetic(self, cities, estimates, seed):
+        from synthetic_data import SyntheticDataset
+
+        with self.app.app_context():
+            stats = SyntheticDataset(seed=seed, cities=cities).load_into_db(self.db, estimates=estimates)
+        print(f"Loaded synthetic dataset: {stats}")
+        return stats
+
+    def run_all(self):
+        with self.app.app_context():
+            self.bench_estimator()
+            self.bench_batches()
+            self.bench_learned_model()
+            self.bench_api()
+            self.bench_dashboard()
+            self.bench_csv_import()
+            self.bench_csv_export()
+            self.bench_comps()
+            self.bench_sketches()
+        return self.results
+
+    def bench_estimator(self):
+        from price_estimator import PriceEstimator
+
+        estimator = PriceEstimator()
+        self.run('estimator.hit', lambda: estimator.estimate_price(
+            state='Maharashtra', city_name='Mumbai', locality_name='Bandra West',
+            road_width_ft=25, nearby_metro=True
+        ))
+        self.run('estimator.locality_miss', lambda: estimator.estimate_price(
+            state='Maharashtra', city_name='Mumbai', locality_name='No Such Locality'
+        ))
+        self.run('estimator.fallback', lambda: estimator.estimate_price(
+            state='Maharashtra', city_name='No Such City'
+        ))
+
+    def bench_batches(self):
+        from models import Locality, City
+        from price_estimator import PriceEstimator
+
+        pairs = self.db.session.query(Locality.name, City.name, City.state).join(City).all()
+        estimator = PriceEstimator()
+        for size in BATCH_SIZES:
+            requests = [{
+                'state': pairs[i % len(pairs)][2],
+                'city_name': pairs[i % len(pairs)][1],
+                'locality_name': pairs[i % len(pairs)][0],
+                'plot_size_sqft': 1000 + (i % 10) * 250,
+                'road_width_ft': (i % 5) * 10,
+                'nearby_metro': i % 2 == 0
+            } for i in range(size)]
+            self.run(f'estimator.batch_{size}', lambda: estimator.estimate_batch(requests),
+                     iterations=max(3, self.iterations // size))
+
+    def bench_learned_model(self):
+        """Learned model load and predict times, next to estimator.hit / estimator.batch_*"""
+        try:
+            import sklearn  # noqa: F401
+        except ImportError:
+            print("  learned.* skipped: scikit-learn is not installed")
+            return
+        import learned_model
+        from models import Locality, City
+
+        path = os.path.join(tempfile.mkdtemp(prefix='lpe-model-'), 'pricing_model.joblib')
+        self.run('learned.train', lambda: learned_model.train_model(path), iterations=1, warmup=0)
+
+        def cold_load():
+            learned_model._loaded.clear()
+            return learned_model.load_model(path)
+        self.run('learned.load', cold_load, iterations=min(self.iterations, 20))
+
+        model = learned_model.load_model(path)
+        single = [{'state': 'Maharashtra', 'city_name': 'Mumbai', 'locality_name': 'Bandra West',
+                   'road_width_ft': 25, 'nearby_metro': True}]
+        self.run('learned.predict_1', lambda: model.predict_batch(single))
+
+        pairs = self.db.session.query(Locality.name, City.name, City.state).join(City).all()
+        for size in BATCH_SIZES:
+            requests = [{
+                'state': pairs[i % len(pairs)][2],
+                'city_name': pairs[i % len(pairs)][1],
+                'locality_name': pairs[i % len(pairs)][0],
+                'plot_size_sqft': 1000 + (i % 10) * 250,
+                'road_width_ft': (i % 5) * 10,
+                'nearby_metro': i % 2 == 0
+            } for i in range(size)]
+            self.run(f'learned.batch_{size}', lambda: model.predict_batch(requests),
+                     iterations=max(3, self.iterations // size))
+
+    def bench_api(self):
+        from app import limiter
+        from models import APIKey
+
+        limiter.enabled = False
+        client = self.app.test_client()
+        headers = {'X-API-Key': APIKey.query.filter_by(is_active=True).first().key}
+        payload = {'state': 'Karnataka', 'city': 'Bangalore', 'locality': 'Koramangala',
+                   'road_width_ft': 30, 'nearby_schools': 'true'}
+
+        def call():
+            response = client.post('/api/estimate', json=payload, headers=headers)
+            assert response.status_code == 200, response.status_code
+
+        self.run('api.estimate', call)
+
+    def bench_dashboard(self):
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['admin_logged_in'] = True
+
+        def call():
+            response = client.get('/admin/dashboard')
+            assert response.status_code == 200, response.status_code
+
+        self.run('admin.dashboard', call)
+
+    def bench_csv_import(self):
+        from data_manager import DataManager
+        from models import City, Locality
+
+        cities = [(city.name, city.state) for city in City.query.all()]
+        for size in self.sizes:
+            name = f'csv.import_localities_{size}'
+            if self.only and self.only not in name:
+                continue
+            handle, path = tempfile.mkstemp(suffix='.csv')
+            with os.fdopen(handle, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(['name', 'city_name', 'state', 'price_per_sqft',
+                                 'location_multiplier', 'area_type', 'pin_code'])
+                for i in range(size):
+                    city_name, state = cities[i % len(cities)]
+                    writer.writerow([f'Bench Locality {i}', city_name, state, 5000 + i % 997,
+                                     1.0, 'residential', f'{100000 + i % 899999}'])
+            try:
+                self.run(name, lambda: self._check(DataManager().import_localities_csv(path)),
+                         iterations=1, warmup=0)
+            finally:
+                os.remove(path)
+                Locality.query.filter(Locality.name.like('Bench Locality %')).delete(synchronize_session=False)
+                self.db.session.commit()
+
+    def bench_csv_export(self):
+        from sqlalchemy import insert
+        from data_manager import DataManager
+        from models import PriceEstimate
+
+        inserted = 0
+        for size in self.sizes:
+            name = f'csv.export_estimates_{size}'
+            if self.only and self.only not in name:
+                continue
+            while inserted < size:
+                chunk = min(50000, size - inserted)
+                self.db.session.execute(insert(PriceEstimate), [{
+                    'state': 'Maharashtra', 'city': 'Pune', 'locality': 'Baner',
+                    'plot_size_sqft': 1200.0, 'road_width_ft': 30.0, 'nearby_schools': True,
+                    'nearby_metro': False, 'commercial_area': False, 'year': 2024,
+                    'estimated_price_per_sqft': 18000.0 + (inserted + i) % 1000,
+                    'total_estimated_price': 21600000.0, 'confidence_score': 0.9,
+                    'ip_address': '127.0.0.1', 'created_at': datetime.utcnow()
+                } for i in range(chunk)])
+                self.db.session.commit()
+                inserted += chunk
+            self.run(name, lambda: DataManager().export_estimates_csv(), iterations=1, warmup=0)
+
+    def bench_comps(self):
+        """Comps index load and queries, over max(sizes) logged estimates in one city"""
+        from sqlalchemy import insert
+        from comps import CompsIndex
+        from models import PriceEstimate
+
+        names = ('comps.load', 'comps.query_k10', 'comps.query_miss', 'comps.add')
+        if self.only and not any(self.only in name for name in names):
+            return
+        existing = PriceEstimate.query.count()
+        for start in range(existing, max(self.sizes), 50000):
+            self.db.session.execute(insert(PriceEstimate), [{
+                'state': 'Maharashtra', 'city': 'Pune', 'locality': f'Locality {i % 40}',
+                'plot_size_sqft': 600.0 + (i * 37) % 4000, 'road_width_ft': float(10 + i % 50),
+                'nearby_schools': i % 2 == 0, 'nearby_metro': i % 3 == 0, 'commercial_area': i % 7 == 0,
+                'year': 2020 + i % 11, 'estimated_price_per_sqft': 15000.0 + i % 5000,
+                'total_estimated_price': 18000000.0, 'confidence_score': 0.9,
+                'ip_address': '127.0.0.1', 'created_at': datetime.utcnow()
+            } for i in range(start, min(start + 50000, max(self.sizes)))])
+            self.db.session.commit()
+
+        index = CompsIndex()
+
+        def load():
+            index.reset()
+            index.ensure_current()
+        self.run('comps.load', load, iterations=1, warmup=0)
+        print(f"  comps index: {index.size} estimates")
+        self.run('comps.query_k10', lambda: index.query(
+            'Maharashtra', 'Pune', plot_size_sqft=1500, road_width_ft=30, nearby_schools=True,
+            locality='Baner', k=10))
+        self.run('comps.query_miss', lambda: index.query('Maharashtra', 'No Such City'))
+
+        estimate = PriceEstimate(
+            id=index._watermarks['wide'] + 1, state='Maharashtra', city='Pune', locality='Baner',
+            plot_size_sqft=1200.0, road_width_ft=30.0, nearby_schools=True, nearby_metro=False,
+            commercial_area=False, year=2024, estimated_price_per_sqft=18000.0,
+            total_estimated_price=21600000.0, confidence_score=0.9, created_at=datetime.utcnow()
+        )
+        self.run('comps.add', lambda: index._extend([estimate]))
+
+    def bench_sketches(self):
+        """Price sketch rebuild from the log, then reads and flushes that do not scan it"""
+        from models import PriceEstimate
+        from price_sketches import SketchStore
+
+        store = SketchStore(flush_seconds=3600)
+        self.run('sketches.rebuild', store.rebuild, iterations=1, warmup=0)
+        self.run('sketches.distribution', lambda: store.distribution(limit=20))
+        self.run('sketches.city', lambda: store.distribution(state='Maharashtra', city='Pune'))
+
+        estimate = PriceEstimate(state='Maharashtra', city='Pune', estimated_price_per_sqft=18000.0)
+
+        def flush_100():
+            for _ in range(100):
+                store.add(estimate)
+            store.flush()
+        self.run('sketches.add_100_and_flush', flush_100)
+
+    def _check(self, outcome):
+        success, message = outcome
+        assert success, message
+
+def compare(results, baseline, threshold):
+    """Print a comparison table; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':40} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name in sorted(results):
+        if name not in baseline:
+            print(f"{name:40} {'-':>12} {results[name]['mean_ms']:>12.3f} {'new':>8}")
+            continue
+        before = baseline[name]['mean_ms']
+        after = results[name]['mean_ms']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:40} {before:>12.3f} {after:>12.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write JSON results')
+    parser.add_argument('--compare', help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative mean slowdown that counts as a regression (default 0.2)')
+    parser.add_argument('--iterations', type=int, default=200, help='Iterations per micro-benchmark')
+    parser.add_argument('--sizes', help='Comma-separated CSV row counts (default 10000,100000,1000000)')
+    parser.add_argument('--quick', action='store_true', help='Small CSV sizes and fewer iterations')
+    parser.add_argument('--only', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--synthetic-cities', type=int, default=0,
+                        help='Load a synthetic dataset with this many cities before running')
+    parser.add_argument('--synthetic-estimates', type=int, default=0,
+                        help='Logged estimates to add with the synthetic dataset')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the synthetic dataset')
+    args = parser.parse_args(argv)
+
+    if args.sizes:
+        sizes = [int(size) for size in args.sizes.split(',')]
+    else:
+        sizes = QUICK_SIZES if args.quick else DEFAULT_SIZES
+    iterations = min(args.iterations, 50) if args.quick else args.iterations
+
+    workdir = tempfile.mkdtemp(prefix='lpe-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    from app import app, db
+
+    print(f"Running benchmarks (database in {workdir})")
+    suite = BenchmarkSuite(app, db, sizes, iterations, only=args.only)
+    dataset = None
+    if args.synthetic_cities:
+        dataset = suite.load_synthetic(args.synthetic_cities, args.synthetic_estimates, args.seed)
+    results = suite.run_all()
+
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'iterations': iterations,
+            'synthetic': dataset
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
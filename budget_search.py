@@ -0,0 +1,116 @@
+import numpy as np
+from price_estimator import PriceEstimator
+from pricing_snapshot import pricing_snapshot
+from price_history import price_trends
+from config import Config
+
+class BudgetIndex:
+    """
+    Localities sorted by price for reverse "what fits my budget" queries.
+
+    A locality estimate is base price x city location multiplier x year
+    trend (fitted or static) x factors shared by every locality (infrastructure, area type).
+    The first three are precomputed per year and sorted, globally, within
+    each state and within each city, so a query divides the budget by
+    plot size and the shared factors, binary-searches the cut-off and
+    slices the page it needs.
+    """
+
+    def __init__(self, snapshot, estimator, years=None):
+        years = years or Config.BUDGET_SEARCH_YEARS
+        self.estimator = estimator
+        trends = price_trends(snapshot)
+        self.localities = []
+        city_ids = []
+        base = []
+        location = []
+        growth = []
+        fitted = []
+        for locality in snapshot.localities:
+            city = snapshot.cities_by_id.get(locality.city_id)
+            if city is None:
+                continue
+            self.localities.append((locality, city))
+            city_ids.append(city.id)
+            base.append(locality.price_per_sqft)
+            location.append(estimator._calculate_location_multiplier(city, locality.name))
+            growth.append(city.growth_rate or 0.0)
+            trend = trends.for_location(city.id, locality.id)
+            fitted.append(trend.rate if trend else np.nan)
+
+        self.city_keys = {(city.name, city.state): city.id for city in snapshot.cities}
+        # A city name alone resolves to its first city, as /api/localities does
+        for city in snapshot.cities:
+            self.city_keys.setdefault((city.name, None), city.id)
+        states = sorted({city.state for city in snapshot.cities})
+        state_numbers = {state: number for number, state in enumerate(states)}
+        city_ids = np.array(city_ids, dtype=np.int64)
+        state_ids = np.array([state_numbers[city.state] for _, city in self.localities], dtype=np.int64)
+        base = np.array(base, dtype=np.float64)
+        location = np.array(location, dtype=np.float64)
+        growth = np.array(growth, dtype=np.float64)
+        fitted = np.array(fitted, dtype=np.float64)
+
+        self.scopes = {}
+        for year in years:
+            adjusted = base * location * estimator._calculate_year_trend_factor(year, growth, fitted)
+            order = np.argsort(adjusted, kind='stable')
+            self.scopes[(year, None)] = (order, adjusted[order], 0, len(order))
+
+            for name, groups, labels in (('state', state_ids, states), ('city', city_ids, None)):
+                order = np.lexsort((adjusted, groups))
+                grouped = groups[order]
+                values = adjusted[order]
+                starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]]) if len(order) else []
+                for start, end in zip(starts, list(starts[1:]) + [len(order)]):
+                    group = int(grouped[start])
+                    key = labels[group] if labels else group
+                    self.scopes[(year, name, key)] = (order, values, int(start), int(end))
+
+    @classmethod
+    def build(cls, snapshot):
+        return cls(snapshot, PriceEstimator())
+
+    def search(self, max_adjusted_price, year, state=None, city=None,
+               offset=0, limit=20, cheapest_first=False):
+        """
+        Localities whose year-adjusted price per sqft is at most
+        max_adjusted_price, most expensive first unless cheapest_first.
+        Returns (total, [(LocalityRow, CityRow, adjusted_price)]).
+        """
+        if city:
+            scope = self.scopes.get((year, 'city', self.city_keys.get((city, state))))
+        elif state:
+            scope = self.scopes.get((year, 'state', state))
+        else:
+            scope = self.scopes.get((year, None))
+        if scope is None:
+            return 0, []
+
+        order, values, start, end = scope
+        cut = start + int(np.searchsorted(values[start:end], max_adjusted_price, side='right'))
+        total = cut - start
+        if cheapest_first:
+            positions = range(start + offset, min(start + offset + limit, cut))
+        else:
+            positions = range(cut - 1 - offset, max(cut - 1 - offset - limit, start - 1), -1)
+
+        return total, [(*self.localities[order[position]], float(values[position])) for position in positions]
+
+    def within_budget(self, budget, factors, state=None, city=None, offset=0, limit=20,
+                      cheapest_first=False):
+        """
+        Localities whose total estimate for the plot described by factors
+        (as for estimate_price) is at most budget. Returns (total,
+        [(LocalityRow, CityRow, price_per_sqft)]).
+        """
+        shared = self.estimator.site_multiplier(**factors)
+        plot_size = factors.get('plot_size_sqft', 1000)
+        total, matches = self.search(budget / (plot_size * shared), factors.get('year', self.estimator.base_year),
+                                     state=state, city=city, offset=offset, limit=limit,
+                                     cheapest_first=cheapest_first)
+        return total, [(locality, city_row, adjusted * shared) for locality, city_row, adjusted in matches]
+
+def budget_index(snapshot=None):
+    snapshot = snapshot or pricing_snapshot.current()
+    return snapshot.derived('budget_index', BudgetIndex.build)
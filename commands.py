@@ -0,0 +1,172 @@
+import click
+from flask.cli import AppGroup
+
+estimates_cli = AppGroup('estimates', help='Maintenance tasks for the estimate log.')
+prices_cli = AppGroup('prices', help='Maintenance tasks for locality and city prices.')
+
+@estimates_cli.command('compact')
+@click.option('--days', type=int, default=None,
+              help='Archive estimates older than this many days (default: ESTIMATE_RETENTION_DAYS).')
+@click.option('--vacuum', is_flag=True, help='Run VACUUM afterwards to shrink the SQLite file.')
+def compact_command(days, vacuum):
+    """Move old estimates into monthly archive partitions.
+
+    Applies to the wide estimate log; requests stored with COMPACT_AUDIT
+    are not archived.
+    """
+    from datetime import datetime, timedelta
+    from archive import compact_estimates, vacuum_database
+    
+    cutoff = datetime.utcnow() - timedelta(days=days) if days is not None else None
+    stats = compact_estimates(cutoff=cutoff)
+    click.echo(f"Archived {stats['archived']} estimates into {len(stats['partitions'])} partitions")
+    
+    if vacuum and vacuum_database():
+        click.echo("Database vacuumed")
+
+@estimates_cli.command('compare-audit')
+@click.option('--rows', type=int, default=20000, help='Requests to insert into each schema.')
+@click.option('--distinct', type=int, default=500, help='Distinct input/result combinations.')
+def compare_audit_command(rows, distinct):
+    """Compare wide and compact audit storage on a synthetic request stream."""
+    from audit import compare_storage
+    
+    report = compare_storage(total_rows=rows, distinct_results=distinct)
+    for mode, stats in report.items():
+        click.echo(f"{mode:8} {stats['rows_per_second']:>10} rows/s  {stats['file_bytes']:>12} bytes")
+
+@estimates_cli.command('generate')
+@click.option('--seed', type=int, default=42, help='Random seed; the same seed gives the same data.')
+@click.option('--cities', type=int, default=500, help='Number of cities.')
+@click.option('--localities-per-city', type=int, default=40, help='Average localities per city.')
+@click.option('--estimates', type=int, default=100000, help='Logged estimates to generate.')
+@click.option('--csv-dir', type=click.Path(file_okay=False), default=None,
+              help='Write CSVs here instead of loading into the database.')
+def generate_command(seed, cities, localities_per_city, estimates, csv_dir):
+    """Generate a synthetic national-scale dataset."""
+    from app import db
+    from synthetic_data import SyntheticDataset
+    
+    dataset = SyntheticDataset(seed=seed, cities=cities, localities_per_city=localities_per_city)
+    if csv_dir:
+        dataset.write_csvs(csv_dir, estimates=estimates)
+        click.echo(f"Wrote {len(dataset.cities)} cities, {len(dataset.localities)} localities "
+                   f"and {estimates} estimates to {csv_dir}")
+        return
+    
+    stats = dataset.load_into_db(db, estimates=estimates)
+    click.echo(f"Loaded {stats['cities']} cities, {stats['localities']} localities "
+               f"and {stats['estimates']} estimates in {stats['seconds']}s")
+
+@estimates_cli.command('replay')
+@click.option('--csv', 'csv_path', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Replay an estimates CSV export instead of the database log.')
+@click.option('--workers', type=int, default=1, help='Worker processes.')
+@click.option('--batch-size', type=int, default=1000, help='Estimates per batch.')
+@click.option('--tolerance', type=float, default=1e-6, help='Relative difference allowed per value.')
+@click.option('--limit', type=int, default=None, help='Replay at most this many estimates.')
+def replay_command(csv_path, workers, batch_size, tolerance, limit):
+    """Recompute logged estimates and report price mismatches."""
+    from replay import iter_cases_from_csv, iter_cases_from_db, replay_estimates
+    
+    cases = iter_cases_from_csv(csv_path, limit) if csv_path else iter_cases_from_db(limit)
+    report = replay_estimates(cases, workers=workers, batch_size=batch_size, tolerance=tolerance)
+    
+    click.echo(f"Replayed {report['rows']} estimates in {report['seconds']}s "
+               f"({report['rows_per_second']} rows/s)")
+    click.echo(f"Mismatches: {report['mismatches']} ({report['mismatch_rate']:.4%})")
+    for example in report['examples']:
+        changes = ', '.join(f"{name} {values['stored']} -> {values['replayed']}"
+                            for name, values in example['fields'].items())
+        if 'error' in example:
+            changes = example['error']['error']
+        click.echo(f"  #{example['id']} {example['city']}, {example['state']} "
+                   f"{example['locality'] or '-'} {example['year']}: {changes}")
+    if report['mismatches']:
+        raise click.exceptions.Exit(1)
+
+@estimates_cli.command('geo-resolve')
+@click.argument('input_csv', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_csv', type=click.Path(dir_okay=False))
+def geo_resolve_command(input_csv, output_csv):
+    """Match parcels (latitude, longitude columns) to nearby localities."""
+    import csv
+    import time
+    import numpy as np
+    from spatial_index import spatial_index
+    
+    started = time.perf_counter()
+    with open(input_csv, newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    
+    # Rows with blank, malformed or out-of-range coordinates are written unresolved
+    points = {}
+    for number, row in enumerate(rows):
+        try:
+            latitude, longitude = float(row.get('latitude')), float(row.get('longitude'))
+        except (TypeError, ValueError):
+            continue
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            points[number] = (latitude, longitude)
+    
+    index = spatial_index()
+    coordinates = np.array(list(points.values()), dtype=np.float64).reshape(-1, 2)
+    indices, distances = index.query(coordinates[:, 0], coordinates[:, 1])
+    prices, nearest_km, counts = index.weighted_prices(indices, distances)
+    resolved = dict(zip(points, zip(indices[:, 0], nearest_km, prices, counts)))
+    resolved_at = time.perf_counter()
+    
+    fieldnames = list(rows[0].keys()) if rows else ['latitude', 'longitude']
+    fieldnames += ['nearest_locality', 'nearest_km', 'neighbors', 'blended_price_per_sqft']
+    with open(output_csv, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        for number, row in enumerate(rows):
+            nearest, distance, price, count = resolved.get(number, (-1, 0.0, 0.0, None))
+            row['nearest_locality'] = index.localities[nearest].name if nearest >= 0 else ''
+            row['nearest_km'] = round(float(distance), 3) if count else ''
+            row['neighbors'] = int(count) if count is not None else ''
+            row['blended_price_per_sqft'] = round(float(price), 2) if count else ''
+            writer.writerow(row)
+    
+    matched = int((counts > 0).sum())
+    click.echo(f"Resolved {matched} of {len(rows)} parcels against {index.size} localities "
+               f"in {resolved_at - started:.2f}s; {len(rows) - len(points)} without valid coordinates")
+
+@estimates_cli.command('rebuild-sketches')
+@click.option('--batch-size', type=int, default=None, help='Estimates per sketch update.')
+def rebuild_sketches_command(batch_size):
+    """Recompute the per-city price sketches from the whole estimate log."""
+    from price_sketches import price_sketches
+    
+    stats = price_sketches.rebuild(batch_size=batch_size)
+    click.echo(f"Rebuilt sketches for {stats['cities']} cities from {stats['estimates']} estimates")
+
+@estimates_cli.command('train-model')
+@click.option('--output', type=click.Path(dir_okay=False), default=None,
+              help='Where to save the model (default: LEARNED_MODEL_PATH).')
+@click.option('--chunk-size', type=int, default=None, help='Rows per partial_fit chunk.')
+@click.option('--epochs', type=int, default=1, help='Passes over the training data.')
+@click.option('--limit', type=int, default=None, help='Use at most this many logged estimates.')
+@click.option('--no-estimates', is_flag=True, help='Train on localities and price history only.')
+def train_model_command(output, chunk_size, epochs, limit, no_estimates):
+    """Train the learned pricing model offline and save its artifact."""
+    from learned_model import train_model
+    
+    model, stats = train_model(output, chunk_size=chunk_size, epochs=epochs,
+                               include_estimates=not no_estimates, estimate_limit=limit)
+    click.echo(f"Trained on {stats['rows']} rows x {stats['epochs']} epoch(s) in {stats['seconds']}s; "
+               f"RMSE of log price {stats['rmse_log_price']}")
+
+@prices_cli.command('recalibrate')
+@click.option('--full', is_flag=True, help='Use every price series, not only those changed since the last run.')
+@click.option('--dry-run', is_flag=True, help='Show the changes without writing them.')
+def recalibrate_command(full, dry_run):
+    """Recalibrate locality base prices from recent price history (run on a schedule)."""
+    from recalibration import recalibrate_localities
+    
+    stats = recalibrate_localities(full=full, dry_run=dry_run)
+    for locality_id, old, new in stats['changes']:
+        click.echo(f"locality {locality_id}: {old:.2f} -> {new:.2f}")
+    click.echo(f"{'Would update' if dry_run else 'Updated'} {stats['updated']} of {stats['series']} localities "
+               f"({stats['clamped']} clamped, {stats['skipped']} with too few observations)")
@@ -0,0 +1,287 @@
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select, func
+from models import PriceEstimate, EstimateRequest
+from metrics import metrics
+from app import db
+from config import Config
+
+# Columns of a partition's feature matrix; distances weigh each by
+# Config.COMPS_WEIGHTS (plot size is compared on a log scale)
+FEATURES = ['plot_size', 'road_width', 'nearby_schools', 'nearby_metro', 'commercial_area', 'year']
+# Compared in place of a missing road width (the /api/estimate default)
+DEFAULT_ROAD_WIDTH_FT = 20.0
+
+# created_at is naive UTC; kept as seconds since this in a float array
+_EPOCH = datetime(1970, 1, 1)
+
+def _seconds(moment):
+    return (moment - _EPOCH).total_seconds() if moment is not None else math.nan
+
+class _CityPartition:
+    """
+    Column arrays for one city's estimates, grown by doubling. features
+    holds the inputs as logged; scaled holds them weighted and centred for
+    search, with each row's squared norm cached in norms.
+    """
+
+    def __init__(self, weights, center, capacity=64):
+        self.weights = weights
+        self.center = center
+        self.center_missing = np.array([0.0, DEFAULT_ROAD_WIDTH_FT, 0.0, 0.0, 0.0, 0.0])
+        self.size = 0
+        self.features = np.empty((capacity, len(FEATURES)), dtype=np.float64)
+        self.scaled = np.empty((capacity, len(FEATURES)), dtype=np.float64)
+        self.norms = np.empty(capacity, dtype=np.float64)
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.localities = np.empty(capacity, dtype=np.int32)
+        self.prices = np.empty((capacity, 2), dtype=np.float64)
+        self.created = np.empty(capacity, dtype=np.float64)
+        self.coordinates = np.empty((capacity, 2), dtype=np.float64)
+        self.locality_names = []
+        self.locality_codes = {}
+
+    def _grow(self, needed):
+        capacity = max(len(self.ids) * 2, needed)
+        for name in ('features', 'scaled', 'norms', 'ids', 'localities', 'prices', 'created', 'coordinates'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def locality_code(self, name):
+        if not name:
+            return -1
+        code = self.locality_codes.get(name)
+        if code is None:
+            code = self.locality_codes[name] = len(self.locality_names)
+            self.locality_names.append(name)
+        return code
+
+    def extend(self, rows):
+        """Append (id, locality, features, (price_per_sqft, total), created, (lat, lon)) tuples"""
+        if self.size + len(rows) > len(self.ids):
+            self._grow(self.size + len(rows))
+        end = self.size + len(rows)
+        self.ids[self.size:end] = [row[0] for row in rows]
+        self.localities[self.size:end] = [self.locality_code(row[1]) for row in rows]
+        features = np.array([row[2] for row in rows], dtype=np.float64)
+        self.features[self.size:end] = features
+        scaled = (np.where(np.isnan(features), self.center_missing, features) - self.center) * self.weights
+        self.scaled[self.size:end] = scaled
+        self.norms[self.size:end] = np.einsum('ij,ij->i', scaled, scaled)
+        self.prices[self.size:end] = [row[3] for row in rows]
+        self.created[self.size:end] = [row[4] for row in rows]
+        self.coordinates[self.size:end] = [row[5] for row in rows]
+        self.size = end
+
+class CompsIndex:
+    """
+    Comparable past estimates ("comps") for appraisers.
+
+    Estimates are partitioned by (state, city) into column arrays of plot
+    size, road width, amenity flags and year. A query ranks its city's
+    partition by weighted distance in one vectorized pass and keeps the
+    nearest k with argpartition, so cost grows with the size of one city
+    rather than the whole log.
+
+    The index is loaded from the estimates log (compact log, hot table and
+    archives) on first use. After that, record_estimate() adds each new
+    estimate as it is written, and queries pick up rows written by other
+    workers by reading ids above the last one loaded from each table,
+    at most every Config.COMPS_REFRESH_SECONDS. Each catch-up re-reads the
+    last Config.COMPS_CATCH_UP_WINDOW ids below that too, so a row whose
+    transaction committed after a higher id's is still picked up; ids
+    already indexed in that window are remembered and skipped.
+    """
+
+    def __init__(self, weights=None, refresh_seconds=None):
+        weights = weights or Config.COMPS_WEIGHTS
+        self.weights = np.array([weights[name] for name in FEATURES], dtype=np.float64)
+        # Years are centred on the base year so squared norms stay small
+        self.center = np.array([0.0, 0.0, 0.0, 0.0, 0.0, Config.BASE_YEAR])
+        self.locality_weight = weights['locality']
+        self.refresh_seconds = (Config.COMPS_REFRESH_SECONDS if refresh_seconds is None
+                                else refresh_seconds)
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next query loads the log again"""
+        with self._lock:
+            self.partitions = {}
+            self.loaded = False
+            self.size = 0
+            # Highest id loaded from the database, per table, and ids
+            # indexed within the catch-up window below it or above it
+            self._watermarks = {'compact': 0, 'wide': 0}
+            self._recent_ids = {'compact': set(), 'wide': set()}
+            self._refreshed_at = 0.0
+
+    @staticmethod
+    def _row(estimate):
+        road_width = estimate.road_width_ft
+        latitude, longitude = getattr(estimate, 'latitude', None), getattr(estimate, 'longitude', None)
+        return (
+            (estimate.state, estimate.city),
+            (estimate.id, estimate.locality,
+             (math.log(estimate.plot_size_sqft), road_width if road_width is not None else math.nan,
+              float(bool(estimate.nearby_schools)), float(bool(estimate.nearby_metro)),
+              float(bool(estimate.commercial_area)), float(estimate.year)),
+             (estimate.estimated_price_per_sqft, estimate.total_estimated_price),
+             _seconds(estimate.created_at),
+             (math.nan if latitude is None else latitude, math.nan if longitude is None else longitude))
+        )
+
+    def _extend(self, estimates):
+        grouped = {}
+        for estimate in estimates:
+            key, row = self._row(estimate)
+            grouped.setdefault(key, []).append(row)
+        for key, rows in grouped.items():
+            partition = self.partitions.get(key)
+            if partition is None:
+                partition = self.partitions[key] = _CityPartition(self.weights, self.center)
+            partition.extend(rows)
+            self.size += len(rows)
+
+    def _sources(self):
+        from audit import compact_estimates_select
+        from archive import archive_partitions, archive_table
+
+        hot = PriceEstimate.__table__
+        return (
+            [('compact', EstimateRequest.id, compact_estimates_select()), ('wide', hot.c.id, select(hot))],
+            [select(archive_table(name)) for name in archive_partitions()]
+        )
+
+    def _load(self):
+        started = time.perf_counter()
+        live, archived = self._sources()
+        queries = []
+        for source, id_column, query in live:
+            # Rows above this id arrive through add() or the next catch-up
+            top = db.session.execute(select(func.max(id_column))).scalar() or 0
+            self._watermarks[source] = top
+            queries.append((source, query.where(id_column <= top)))
+        queries.extend((None, query) for query in archived)
+
+        for source, query in queries:
+            result = db.session.execute(query, execution_options={'yield_per': Config.ARCHIVE_BATCH_SIZE})
+            for chunk in result.partitions():
+                self._extend(chunk)
+                if source:
+                    floor = self._watermarks[source] - Config.COMPS_CATCH_UP_WINDOW
+                    self._recent_ids[source].update(row.id for row in chunk if row.id > floor)
+        self.loaded = True
+        self._refreshed_at = time.monotonic()
+        metrics.observe('comps_index_load_seconds', time.perf_counter() - started)
+        logging.info(f"Comps index loaded {self.size} estimates in {len(self.partitions)} cities")
+
+    def _catch_up(self):
+        live, _ = self._sources()
+        window = Config.COMPS_CATCH_UP_WINDOW
+        for source, id_column, query in live:
+            rows = db.session.execute(
+                query.where(id_column > self._watermarks[source] - window).order_by(id_column)
+            ).all()
+            if not rows:
+                continue
+            recent = self._recent_ids[source]
+            new = [row for row in rows if row.id not in recent]
+            # Advance even when add() already indexed every row read
+            top = max(self._watermarks[source], rows[-1].id)
+            self._watermarks[source] = top
+            self._recent_ids[source] = {id for id in recent if id > top - window}
+            if new:
+                self._extend(new)
+                self._recent_ids[source].update(row.id for row in new if row.id > top - window)
+        self._refreshed_at = time.monotonic()
+
+    def ensure_current(self):
+        with self._lock:
+            if not self.loaded:
+                self._load()
+            elif time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+                self._catch_up()
+
+    def add(self, estimate):
+        """
+        Index a PriceEstimate just written by this worker. Ignored until
+        the index has been loaded, since loading reads it from the log.
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            source = 'compact' if Config.COMPACT_AUDIT else 'wide'
+            recent = self._recent_ids[source]
+            if estimate.id <= self._watermarks[source] - Config.COMPS_CATCH_UP_WINDOW or estimate.id in recent:
+                return
+            recent.add(estimate.id)
+            self._extend([estimate])
+
+    def query(self, state, city, plot_size_sqft=1000, road_width_ft=20, nearby_schools=False,
+              nearby_metro=False, commercial_area=False, year=None, locality=None, k=None):
+        """
+        The k past estimates in the same city nearest to the given inputs,
+        nearest first, as (total in city, [dict]). An estimate in another
+        locality than the one asked for is Config.COMPS_WEIGHTS['locality']
+        further away; a missing road width is compared as 20 ft.
+        """
+        k = k or Config.COMPS_DEFAULT_K
+        self.ensure_current()
+        target = (np.array([math.log(plot_size_sqft), road_width_ft, float(bool(nearby_schools)),
+                            float(bool(nearby_metro)), float(bool(commercial_area)),
+                            float(year or Config.BASE_YEAR)]) - self.center) * self.weights
+
+        with self._lock:
+            partition = self.partitions.get((state, city))
+            if partition is None:
+                return 0, []
+            n = partition.size
+            # |x - q|^2 = |x|^2 - 2 x.q + |q|^2: one matrix-vector product
+            # over the partition; |q|^2 is the same for every row so it only
+            # matters for the distances reported
+            scores = partition.norms[:n] - 2.0 * (partition.scaled[:n] @ target)
+            code = partition.locality_codes.get(locality, -2) if locality else None
+            if code is not None:
+                scores += (partition.localities[:n] != code) * self.locality_weight ** 2
+
+            take = min(k, n)
+            nearest = np.argpartition(scores, take - 1)[:take] if take < n else np.arange(n)
+            # Exact distances for the rows kept; ties go to the newest estimate
+            distances = np.square(partition.scaled[nearest] - target).sum(axis=1)
+            if code is not None:
+                distances += (partition.localities[nearest] != code) * self.locality_weight ** 2
+            order = np.lexsort((-partition.created[nearest], distances))
+            return n, [self._comp(partition, index, distance)
+                       for index, distance in zip(nearest[order].tolist(), distances[order].tolist())]
+
+    @staticmethod
+    def _comp(partition, index, distance):
+        features = partition.features[index]
+        code = int(partition.localities[index])
+        created = partition.created[index]
+        latitude, longitude = partition.coordinates[index]
+        return {
+            'id': int(partition.ids[index]),
+            'locality': partition.locality_names[code] if code >= 0 else None,
+            'plot_size_sqft': round(math.exp(features[0]), 2),
+            'road_width_ft': None if math.isnan(features[1]) else float(features[1]),
+            'nearby_schools': bool(features[2]),
+            'nearby_metro': bool(features[3]),
+            'commercial_area': bool(features[4]),
+            'year': int(features[5]),
+            'estimated_price_per_sqft': float(partition.prices[index, 0]),
+            'total_estimated_price': float(partition.prices[index, 1]),
+            'created_at': None if math.isnan(created) else (_EPOCH + timedelta(seconds=created)).isoformat(),
+            'latitude': None if math.isnan(latitude) else float(latitude),
+            'longitude': None if math.isnan(longitude) else float(longitude),
+            'distance': round(math.sqrt(distance), 4)
+        }
+
+comps_index = CompsIndex()
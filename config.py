@@ -5,21 +5,153 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///land_price_estimator.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Optional read replica. Plain SELECTs go to the replica; writes and
+    # reads after a recent write go to the primary. A SQLite replica URL is
+    # treated as a local stand-in and refreshed from the primary file.
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_SYNC_SECONDS = int(os.environ.get('REPLICA_SYNC_SECONDS', 5))
+    REPLICA_MAX_LAG_SECONDS = int(os.environ.get('REPLICA_MAX_LAG_SECONDS', 10))
+    
     # Security
     SECRET_KEY = os.environ.get('SESSION_SECRET', 'dev-secret-key-change-in-production')
     
     # Rate limiting
     RATELIMIT_STORAGE_URL = os.environ.get('REDIS_URL', 'memory://')
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() in ['true', '1', 'yes']
     
     # Admin credentials
     ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@landprice.com')
     
+    # Metrics. With METRICS_DIR set, each gunicorn worker writes its
+    # snapshot there and /api/metrics sums all live workers; snapshots
+    # not refreshed for METRICS_STALE_SECONDS are ignored. /api/metrics
+    # is disabled until METRICS_TOKEN is set and needs it as a bearer token.
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_SECONDS = 10
+    METRICS_STALE_SECONDS = int(os.environ.get('METRICS_STALE_SECONDS', 900))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Per-request query tracking
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 50))
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ['true', '1', 'yes']
+    
+    # On-demand profiling for admins
+    PROFILE_MAX_SECONDS = 30
+    PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+    PROFILE_TOP_FUNCTIONS = 40
+    
+    # Logging
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    
+    # In-memory pricing snapshot: how often a worker checks the pricing
+    # tables for changes made elsewhere
+    SNAPSHOT_CHECK_SECONDS = float(os.environ.get('SNAPSHOT_CHECK_SECONDS', 5))
+    
+    # Location autocomplete: results per query, and prefix length up to
+    # which the best matches are precomputed
+    AUTOCOMPLETE_MAX_RESULTS = 10
+    AUTOCOMPLETE_INDEX_DEPTH = 6
+    
+    # Estimates from coordinates: blend this many nearest localities
+    # within this distance when the locality itself is unknown
+    SPATIAL_NEIGHBORS = 3
+    SPATIAL_MAX_DISTANCE_KM = float(os.environ.get('SPATIAL_MAX_DISTANCE_KM', 5))
+    
+    # Budget search: years with precomputed sorted price arrays
+    BUDGET_SEARCH_YEARS = range(2020, 2031)
+    BUDGET_SEARCH_MAX_LIMIT = 100
+    
+    # Price projections: default years and locations per request
+    PROJECTION_YEARS = range(2020, 2031)
+    PROJECTION_MAX_LOCATIONS = 10
+    
+    # What-if grids: most cells one request may ask for
+    WHAT_IF_MAX_CELLS = 10000
+    
+    # Comparable past estimates (comps): distance weights per unit of each
+    # input (plot size per log unit), the extra distance for another
+    # locality, and how often other workers' new estimates are picked up
+    COMPS_DEFAULT_K = 10
+    COMPS_MAX_K = 100
+    COMPS_REFRESH_SECONDS = 5
+    # Ids below the highest seen that each catch-up reads again, for rows
+    # whose transactions commit out of id order (Postgres sequences)
+    COMPS_CATCH_UP_WINDOW = 500
+    COMPS_WEIGHTS = {
+        'plot_size': 2.0,
+        'road_width': 0.05,
+        'nearby_schools': 1.0,
+        'nearby_metro': 1.0,
+        'commercial_area': 1.0,
+        'year': 0.5,
+        'locality': 1.0
+    }
+    
+    # Per-city price distribution sketches: relative accuracy of their
+    # quantiles (changing it needs flask estimates rebuild-sketches), size
+    # cap, how often each worker merges its buffered prices into the
+    # database, and the percentiles reported
+    SKETCH_RELATIVE_ACCURACY = 0.01
+    SKETCH_MAX_BUCKETS = 2048
+    SKETCH_FLUSH_SECONDS = int(os.environ.get('SKETCH_FLUSH_SECONDS', 30))
+    SKETCH_MERGE_RETRIES = 5
+    SKETCH_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+    SKETCH_MAX_CITIES = 500
+    
     # Estimation parameters
     BASE_YEAR = 2024
     INFLATION_RATE = 0.06  # 6% annual inflation
     
+    # Price history trends: series need this many observations over this
+    # many years to be fitted; fitted annual rates are clipped to the limits
+    TREND_MIN_OBSERVATIONS = 3
+    TREND_MIN_SPAN_YEARS = 1.0
+    TREND_RATE_LIMITS = (-0.2, 0.3)
+    
+    # Locality recalibration from price history (flask prices recalibrate):
+    # observations from each locality's latest this-many years, trimmed
+    # by this fraction at each end (0.5 = median), and the largest
+    # relative change one run may make to a base price
+    RECALIBRATION_WINDOW_YEARS = 1.0
+    RECALIBRATION_TRIM = 0.1
+    RECALIBRATION_MIN_OBSERVATIONS = 3
+    RECALIBRATION_MAX_CHANGE = 0.25
+    
+    # Optional learned pricing model (flask estimates train-model)
+    LEARNED_MODEL_PATH = os.environ.get('LEARNED_MODEL_PATH', os.path.join('instance', 'pricing_model.joblib'))
+    LEARNED_MODEL_CHUNK_SIZE = 5000
+    
+    # Monte Carlo price bands (P10/P50/P90). Each entry is (distribution,
+    # spread) with distribution normal, uniform or lognormal. Spreads are
+    # relative for multipliers and absolute for the annual growth rate; the
+    # base price spread is scaled by (1 - confidence_score).
+    PRICE_BAND_SAMPLES = int(os.environ.get('PRICE_BAND_SAMPLES', 10000))
+    PRICE_BAND_DISTRIBUTIONS = {
+        'base_price': ('lognormal', 1.0),
+        'location_multiplier': ('normal', 0.05),
+        'infrastructure_multiplier': ('normal', 0.03),
+        'area_type_multiplier': ('uniform', 0.05),
+        'growth_rate': ('normal', 0.02)
+    }
+    
+    # Live estimate feed (server-sent events). Each open stream holds one
+    # request thread, so it needs threaded or async workers; keep the cap
+    # well below a gthread worker's --threads.
+    LIVE_FEED_MAX_SUBSCRIBERS = int(os.environ.get('LIVE_FEED_MAX_SUBSCRIBERS', 4))
+    LIVE_FEED_BUFFER_SIZE = 256
+    LIVE_FEED_HEARTBEAT_SECONDS = 15
+    
+    # Estimate retention: older rows move to monthly archive tables
+    ESTIMATE_RETENTION_DAYS = int(os.environ.get('ESTIMATE_RETENTION_DAYS', 90))
+    ARCHIVE_BATCH_SIZE = 5000
+    
+    # Compact audit mode stores each distinct estimate once plus a small
+    # per-request row instead of one wide PriceEstimate row per request
+    COMPACT_AUDIT = os.environ.get('COMPACT_AUDIT', '').lower() in ['true', '1', 'yes']
+    AUDIT_HASH_CACHE_SIZE = 10000
+    
     # File upload limits
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB
     UPLOAD_FOLDER = 'uploads'
@@ -1,7 +1,11 @@
 import csv
 import io
+import os
 import logging
-from models import City, Locality, InfrastructureMultiplier, PriceEstimate
+from sqlalchemy import insert, select
+from models import City, Locality, InfrastructureMultiplier, PriceEstimate, PriceSeries
+from price_history import decimal_year, merge_observations, pack, unpack
+from pricing_snapshot import pricing_snapshot
 from app import db
 
 class DataManager:
@@ -43,6 +47,7 @@ class DataManager:
                         created_count += 1
                 
                 db.session.commit()
+                pricing_snapshot.invalidate()
                 return True, f"Successfully imported {created_count} new cities and updated {updated_count} existing cities"
                 
         except Exception as e:
@@ -80,6 +85,8 @@ class DataManager:
                         locality.location_multiplier = float(row.get('location_multiplier', 1.0))
                         locality.area_type = row.get('area_type', 'residential')
                         locality.pin_code = row.get('pin_code')
+                        locality.latitude = self._optional_float(row.get('latitude'))
+                        locality.longitude = self._optional_float(row.get('longitude'))
                         updated_count += 1
                     else:
                         # Create new locality
@@ -89,12 +96,15 @@ class DataManager:
                             price_per_sqft=float(row['price_per_sqft']),
                             location_multiplier=float(row.get('location_multiplier', 1.0)),
                             area_type=row.get('area_type', 'residential'),
-                            pin_code=row.get('pin_code')
+                            pin_code=row.get('pin_code'),
+                            latitude=self._optional_float(row.get('latitude')),
+                            longitude=self._optional_float(row.get('longitude'))
                         )
                         db.session.add(locality)
                         created_count += 1
                 
                 db.session.commit()
+                pricing_snapshot.invalidate()
                 return True, f"Successfully imported {created_count} new localities and updated {updated_count} existing localities"
                 
         except Exception as e:
@@ -133,6 +143,7 @@ class DataManager:
                         created_count += 1
                 
                 db.session.commit()
+                pricing_snapshot.invalidate()
                 return True, f"Successfully imported {created_count} new multipliers and updated {updated_count} existing multipliers"
                 
         except Exception as e:
@@ -140,6 +151,138 @@ class DataManager:
             logging.error(f"Error importing multipliers CSV: {e}")
             return False, f"Error importing multipliers: {str(e)}"
     
+    def import_price_history_csv(self, file_path):
+        """
+        Import price observations (state, city_name, locality, date,
+        price_per_sqft) into the price history. Rows without a locality
+        belong to the city's own series. Observations are merged into the
+        existing series; a repeated date replaces the earlier price.
+        """
+        try:
+            city_ids = {
+                (name, state): city_id
+                for city_id, name, state in db.session.execute(select(City.id, City.name, City.state))
+            }
+            locality_ids = {
+                (city_id, name): locality_id
+                for locality_id, city_id, name in db.session.execute(
+                    select(Locality.id, Locality.city_id, Locality.name))
+            }
+            
+            observations = {}
+            skipped_count = 0
+            with open(file_path, 'r', encoding='utf-8') as file:
+                for row in csv.DictReader(file):
+                    city_id = city_ids.get((row['city_name'], row['state']))
+                    locality_id = locality_ids.get((city_id, row['locality'])) if row.get('locality') else None
+                    price = float(row['price_per_sqft'])
+                    if city_id is None or (row.get('locality') and locality_id is None) or price <= 0:
+                        logging.warning(f"Skipping price observation: {row}")
+                        skipped_count += 1
+                        continue
+                    
+                    years, prices = observations.setdefault((city_id, locality_id), ([], []))
+                    years.append(decimal_year(row['date']))
+                    prices.append(price)
+            
+            existing = {
+                (series.city_id, series.locality_id): series
+                for series in PriceSeries.query.filter(
+                    PriceSeries.city_id.in_({city_id for city_id, _ in observations}))
+            }
+            created_count = 0
+            for key, (years, prices) in observations.items():
+                series = existing.get(key)
+                if series is None:
+                    series = PriceSeries(city_id=key[0], locality_id=key[1], years=b'', prices=b'')
+                    db.session.add(series)
+                    created_count += 1
+                merged_years, merged_prices = merge_observations(
+                    unpack(series.years), unpack(series.prices), years, prices)
+                series.years = pack(merged_years)
+                series.prices = pack(merged_prices)
+                series.observation_count = len(merged_years)
+            
+            db.session.commit()
+            pricing_snapshot.invalidate()
+            observation_count = sum(len(years) for years, _ in observations.values())
+            return True, (f"Successfully imported {observation_count} price observations into "
+                          f"{created_count} new and {len(observations) - created_count} existing series "
+                          f"({skipped_count} skipped)")
+            
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error importing price history CSV: {e}")
+            return False, f"Error importing price history: {str(e)}"
+    
+    def bulk_load_csvs(self, data_dir):
+        """
+        Bulk-insert cities, localities and multipliers from the CSVs in
+        data_dir. Intended for an empty database: rows are inserted with
+        executemany and city IDs for localities come from one preloaded
+        (name, state) -> id map. The caller owns the transaction.
+        """
+        counts = {'cities': 0, 'localities': 0, 'multipliers': 0}
+        
+        city_rows = [{
+            'name': row['name'],
+            'state': row['state'],
+            'base_price_per_sqft': float(row['base_price_per_sqft']),
+            'growth_rate': float(row.get('growth_rate') or 0.05),
+            'population': int(row['population']) if row.get('population') else None,
+            'tier': row.get('tier') or None
+        } for row in self._read_csv(os.path.join(data_dir, 'cities.csv'))]
+        if city_rows:
+            db.session.execute(insert(City), city_rows)
+        counts['cities'] = len(city_rows)
+        
+        city_ids = {
+            (name, state): city_id
+            for city_id, name, state in db.session.execute(select(City.id, City.name, City.state))
+        }
+        
+        locality_rows = []
+        for row in self._read_csv(os.path.join(data_dir, 'localities.csv')):
+            city_id = city_ids.get((row['city_name'], row['state']))
+            if city_id is None:
+                logging.warning(f"City not found: {row['city_name']}, {row['state']}")
+                continue
+            locality_rows.append({
+                'name': row['name'],
+                'city_id': city_id,
+                'price_per_sqft': float(row['price_per_sqft']),
+                'location_multiplier': float(row.get('location_multiplier') or 1.0),
+                'area_type': row.get('area_type') or 'residential',
+                'pin_code': row.get('pin_code') or None,
+                'latitude': self._optional_float(row.get('latitude')),
+                'longitude': self._optional_float(row.get('longitude'))
+            })
+        if locality_rows:
+            db.session.execute(insert(Locality), locality_rows)
+        counts['localities'] = len(locality_rows)
+        
+        multiplier_rows = [{
+            'factor_type': row['factor_type'],
+            'factor_value': row['factor_value'],
+            'multiplier': float(row['multiplier']),
+            'description': row.get('description', '')
+        } for row in self._read_csv(os.path.join(data_dir, 'infrastructure_multipliers.csv'))]
+        if multiplier_rows:
+            db.session.execute(insert(InfrastructureMultiplier), multiplier_rows)
+        counts['multipliers'] = len(multiplier_rows)
+        
+        return counts
+    
+    def _optional_float(self, value):
+        return float(value) if value not in (None, '') else None
+    
+    def _read_csv(self, file_path):
+        if not os.path.exists(file_path):
+            logging.warning(f"Seed file not found: {file_path}")
+            return []
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return list(csv.DictReader(file))
+    
     def export_cities_csv(self):
         """Export cities to CSV format"""
         output = io.StringIO()
@@ -168,7 +311,8 @@ class DataManager:
         writer = csv.writer(output)
         
         # Write header
-        writer.writerow(['name', 'city_name', 'state', 'price_per_sqft', 'location_multiplier', 'area_type', 'pin_code'])
+        writer.writerow(['name', 'city_name', 'state', 'price_per_sqft', 'location_multiplier', 'area_type', 'pin_code',
+                         'latitude', 'longitude'])
         
         # Write data
         localities = db.session.query(Locality, City).join(City).order_by(City.state, City.name, Locality.name).all()
@@ -180,7 +324,9 @@ class DataManager:
                 locality.price_per_sqft,
                 locality.location_multiplier,
                 locality.area_type or '',
-                locality.pin_code or ''
+                locality.pin_code or '',
+                '' if locality.latitude is None else locality.latitude,
+                '' if locality.longitude is None else locality.longitude
             ])
         
         return output.getvalue()
@@ -192,20 +338,25 @@ class DataManager:
         
         # Write header
         writer.writerow([
-            'id', 'state', 'city', 'locality', 'plot_size_sqft', 'road_width_ft',
+            'id', 'source', 'state', 'city', 'locality', 'pin_code', 'latitude', 'longitude',
+            'plot_size_sqft', 'road_width_ft',
             'nearby_schools', 'nearby_metro', 'commercial_area', 'year',
             'estimated_price_per_sqft', 'total_estimated_price', 'confidence_score',
             'api_key', 'ip_address', 'created_at'
         ])
         
-        # Write data
-        estimates = PriceEstimate.query.order_by(PriceEstimate.created_at.desc()).all()
-        for estimate in estimates:
+        # Write data, spanning the hot table and archived partitions
+        from archive import iter_estimates
+        for estimate in iter_estimates():
             writer.writerow([
                 estimate.id,
+                estimate.source,
                 estimate.state,
                 estimate.city,
                 estimate.locality or '',
+                estimate.pin_code or '',
+                '' if estimate.latitude is None else estimate.latitude,
+                '' if estimate.longitude is None else estimate.longitude,
                 estimate.plot_size_sqft,
                 estimate.road_width_ft,
                 estimate.nearby_schools,
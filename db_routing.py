@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, session, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.sql import Select
+from config import Config
+
+class ReplicaRouter:
+    """
+    Holds the optional read replica engine and decides, per statement,
+    whether a read may be served from it. Writes, flushes, locking reads
+    and anything after a write in the same session always go to the
+    primary.
+    """
+
+    def __init__(self):
+        self.replica_engine = None
+        self._syncer = None
+
+    @property
+    def enabled(self):
+        return self.replica_engine is not None
+
+    def init_app(self, app, replica_url=None):
+        replica_url = replica_url or Config.REPLICA_DATABASE_URL
+        if not replica_url:
+            return
+
+        self.replica_engine = create_engine(
+            replica_url, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        )
+
+        app.before_request(_load_read_your_writes)
+        app.after_request(_save_read_your_writes)
+
+        if Config.REPLICA_SYNC_SECONDS and self.replica_engine.dialect.name == 'sqlite':
+            self._syncer = SqliteReplicaSyncer(app, self, Config.REPLICA_SYNC_SECONDS)
+            self._syncer.sync_now()
+            self._syncer.start()
+
+        logging.info(f"Read replica enabled: {self.replica_engine.url}")
+
+    def sync_now(self):
+        """Copy the primary to a local SQLite stand-in replica immediately"""
+        if self._syncer:
+            self._syncer.sync_now()
+
+    def use_replica(self, db_session, clause):
+        if not self.enabled or db_session._wrote or db_session._flushing:
+            return False
+        if has_request_context() and g.get('read_primary'):
+            return False
+        if not isinstance(clause, Select) or clause._for_update_arg is not None:
+            return False
+        return True
+
+router = ReplicaRouter()
+
+class RoutingSession(Session):
+    """db.session that sends plain SELECTs to the replica when configured"""
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if router.use_replica(self, clause):
+                return router.replica_engine
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self._mark_written()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _mark_written(self):
+        self._wrote = True
+        if has_request_context() and not g.get('db_bookkeeping'):
+            g.db_wrote = True
+
+@contextmanager
+def use_primary():
+    """Force reads inside the block to the primary"""
+    previous = g.get('read_primary', False)
+    g.read_primary = True
+    try:
+        yield
+    finally:
+        g.read_primary = previous
+
+@contextmanager
+def bookkeeping_writes():
+    """
+    Writes inside the block (audit log, usage stamps) don't pin the
+    client to the primary; only edits it may want to read back do.
+    """
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('db_bookkeeping', False)
+    g.db_bookkeeping = True
+    try:
+        yield
+    finally:
+        g.db_bookkeeping = previous
+
+def _load_read_your_writes():
+    # A client that wrote recently keeps reading from the primary until
+    # the replica has had time to catch up
+    if session.get('read_primary_until', 0) > time.time():
+        g.read_primary = True
+
+def _save_read_your_writes(response):
+    if g.get('db_wrote'):
+        session['read_primary_until'] = time.time() + Config.REPLICA_MAX_LAG_SECONDS
+    return response
+
+class SqliteReplicaSyncer:
+    """
+    Local stand-in for a streaming replica: periodically copies the
+    primary SQLite database into the replica file with the online backup
+    API, so the replica lags by up to the sync interval.
+    """
+
+    def __init__(self, app, router, interval):
+        self.app = app
+        self.router = router
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='replica-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def sync_now(self):
+        from app import db
+
+        with self.app.app_context():
+            primary = db.engine.raw_connection()
+            replica = self.router.replica_engine.raw_connection()
+            try:
+                primary.driver_connection.backup(replica.driver_connection)
+            finally:
+                replica.close()
+                primary.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sync_now()
+            except Exception as e:
+                logging.error(f"Replica sync error: {e}")
@@ -0,0 +1,266 @@
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+import numpy as np
+from pricing_snapshot import pricing_snapshot
+from price_history import price_trends, unpack
+from metrics import metrics
+from config import Config
+
+AREA_TYPES = ['residential', 'commercial', 'agricultural', 'industrial']
+TIERS = ['Tier 1', 'Tier 2', 'Tier 3', 'Tier 4']
+FEATURES = (['log_base_price', 'years_from_base', 'trend_years', 'log_plot_size', 'road_width_ft',
+             'nearby_schools', 'nearby_metro', 'commercial_area']
+            + [f'area_{area_type}' for area_type in AREA_TYPES]
+            + [f'tier_{tier[-1]}' for tier in TIERS]
+            + ['log_population'])
+# Standardized before SGD; the 0/1 indicator features are left as they are
+# because rare ones (area type is missing from the estimates log) would
+# otherwise be scaled up to huge values and make SGD diverge
+CONTINUOUS = [FEATURES.index(name) for name in
+              ('log_base_price', 'years_from_base', 'trend_years', 'log_plot_size', 'road_width_ft',
+               'log_population')]
+
+class FeatureBuilder:
+    """
+    Turns estimate inputs into model feature rows using a PricingSnapshot:
+    the locality (or city) base price, the growth the rule-based estimator
+    would compound, and the plot and infrastructure inputs.
+    """
+
+    def __init__(self, snapshot):
+        self.cities = {(city.name, city.state): city for city in snapshot.cities}
+        self.localities = {(locality.city_id, locality.name): locality for locality in snapshot.localities}
+        self.trends = price_trends(snapshot)
+        self.base_year = Config.BASE_YEAR
+
+    @classmethod
+    def build(cls, snapshot):
+        return cls(snapshot)
+
+    def row(self, state, city_name, locality_name=None, plot_size_sqft=1000, road_width_ft=20,
+            nearby_schools=False, nearby_metro=False, commercial_area=False, year=None,
+            area_type='residential', **ignored):
+        """Feature list for one input, or None when the city is unknown"""
+        city = self.cities.get((city_name, state))
+        if city is None:
+            return None
+        locality = self.localities.get((city.id, locality_name)) if locality_name else None
+        base_price = locality.price_per_sqft if locality else city.base_price_per_sqft
+        trend = self.trends.for_location(city.id, locality.id if locality else None)
+        rate = trend.rate if trend else Config.INFLATION_RATE + (city.growth_rate or 0.0)
+        years = (year or self.base_year) - self.base_year
+
+        return ([math.log(base_price), years, years * math.log1p(rate), math.log(plot_size_sqft or 1000),
+                 road_width_ft or 0.0, float(bool(nearby_schools)), float(bool(nearby_metro)),
+                 float(bool(commercial_area))]
+                + [float(area_type == name) for name in AREA_TYPES]
+                + [float(city.tier == tier) for tier in TIERS]
+                + [math.log1p(city.population or 0)])
+
+    def matrix(self, requests):
+        """
+        Feature matrix for estimate_batch-style request dicts, plus a mask
+        of the requests that could be featurized
+        """
+        rows = [self.row(**request) for request in requests]
+        known = np.array([row is not None for row in rows], dtype=bool)
+        matrix = np.array([row for row in rows if row is not None], dtype=np.float64).reshape(-1, len(FEATURES))
+        return matrix, known
+
+def feature_builder(snapshot=None):
+    snapshot = snapshot or pricing_snapshot.current()
+    return snapshot.derived('learned_features', FeatureBuilder.build)
+
+def _reference_rows(snapshot):
+    """
+    Localities at the base year and every price history observation, as a
+    default parcel (1000 sqft, 20 ft road, no amenities) at that place
+    """
+    cities = snapshot.cities_by_id
+    localities = {locality.id: locality for locality in snapshot.localities}
+    for locality in snapshot.localities:
+        city = cities.get(locality.city_id)
+        if city:
+            yield ({'state': city.state, 'city_name': city.name, 'locality_name': locality.name,
+                    'area_type': locality.area_type or 'residential'}, locality.price_per_sqft)
+    for series in snapshot.series:
+        city = cities.get(series.city_id)
+        locality = localities.get(series.locality_id)
+        if city is None:
+            continue
+        for year, price in zip(unpack(series.years).tolist(), unpack(series.prices).tolist()):
+            yield ({'state': city.state, 'city_name': city.name,
+                    'locality_name': locality.name if locality else None,
+                    'year': int(round(year))}, price)
+
+def _estimate_rows(limit=None):
+    """Logged estimates, without area type (the log does not keep it)"""
+    from replay import iter_cases_from_db
+
+    for case in iter_cases_from_db(limit):
+        if case['estimated_price_per_sqft'] and case['year']:
+            yield ({'state': case['state'], 'city_name': case['city'], 'locality_name': case['locality'],
+                    'plot_size_sqft': case['plot_size_sqft'], 'road_width_ft': case['road_width_ft'],
+                    'nearby_schools': case['nearby_schools'], 'nearby_metro': case['nearby_metro'],
+                    'commercial_area': case['commercial_area'], 'year': case['year'],
+                    'area_type': None}, case['estimated_price_per_sqft'])
+
+def iter_training_chunks(snapshot, chunk_size=None, include_estimates=True, estimate_limit=None):
+    """(features, log prices) chunks: reference rows first, then the estimates log"""
+    chunk_size = chunk_size or Config.LEARNED_MODEL_CHUNK_SIZE
+    builder = feature_builder(snapshot)
+    sources = [_reference_rows(snapshot)]
+    if include_estimates:
+        sources.append(_estimate_rows(estimate_limit))
+
+    for source in sources:
+        while True:
+            chunk = list(islice(source, chunk_size))
+            if not chunk:
+                break
+            features, known = builder.matrix([request for request, _ in chunk])
+            prices = np.array([price for _, price in chunk], dtype=np.float64)[known]
+            valid = prices > 0
+            if valid.any():
+                yield features[valid], np.log(prices[valid])
+
+class LearnedPricingModel:
+    """
+    Linear model on log price, trained incrementally: a StandardScaler
+    and an SGDRegressor, both fed chunk by chunk through partial_fit so
+    the estimates log never has to fit in memory.
+    """
+
+    def __init__(self, random_state=0):
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.preprocessing import StandardScaler
+
+        self.features = list(FEATURES)
+        self.scaler = StandardScaler()
+        self.regressor = SGDRegressor(alpha=1e-6, learning_rate='invscaling', eta0=0.01,
+                                      random_state=random_state)
+        self.target_mean = 0.0
+        self.trained_rows = 0
+        self.trained_at = None
+        self.snapshot_version = None
+
+    def fit(self, chunks, epochs=1):
+        """
+        Train from a callable returning fresh (features, log prices) chunk
+        iterators: one pass for the scaler, then epochs passes of SGD.
+        Returns training stats.
+        """
+        started = time.perf_counter()
+        target_sum = target_count = 0.0
+        for features, targets in chunks():
+            self.scaler.partial_fit(features[:, CONTINUOUS])
+            target_sum += float(targets.sum())
+            target_count += len(targets)
+        # SGD starts from zero weights; centring the target keeps early steps small
+        self.target_mean = target_sum / target_count if target_count else 0.0
+
+        rows = 0
+        for _ in range(epochs):
+            rows = 0
+            for features, targets in chunks():
+                self.regressor.partial_fit(self._scale(features), targets - self.target_mean)
+                rows += len(targets)
+
+        self.trained_rows = rows
+        self.trained_at = datetime.utcnow().isoformat()
+        squared_error = count = 0.0
+        for features, targets in chunks():
+            squared_error += float(np.square(self.predict_log(features) - targets).sum())
+            count += len(targets)
+        return {
+            'rows': rows,
+            'epochs': epochs,
+            'rmse_log_price': round(math.sqrt(squared_error / count), 4) if count else None,
+            'seconds': round(time.perf_counter() - started, 2)
+        }
+
+    def _scale(self, features):
+        scaled = np.array(features, dtype=np.float64)
+        scaled[:, CONTINUOUS] = self.scaler.transform(features[:, CONTINUOUS])
+        return scaled
+
+    def predict_log(self, features):
+        return self.regressor.predict(self._scale(features)) + self.target_mean
+
+    def predict_batch(self, requests, snapshot=None):
+        """
+        Price per sqft for estimate_batch-style request dicts, in one
+        matrix product; None for requests whose city is unknown
+        """
+        features, known = feature_builder(snapshot).matrix(requests)
+        prices = np.exp(self.predict_log(features)) if len(features) else np.empty(0)
+        results = [None] * len(requests)
+        for index, price in zip(np.flatnonzero(known), prices.tolist()):
+            results[index] = price
+        return results
+
+    def save(self, path):
+        """
+        Uncompressed joblib pickle, so load_model() can memory-map the
+        numpy arrays and every worker shares one copy through the page cache
+        """
+        import joblib
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp"
+        joblib.dump(self, temporary, compress=0)
+        os.replace(temporary, path)
+
+def train_model(path=None, chunk_size=None, epochs=1, include_estimates=True, estimate_limit=None):
+    """Train on the current data, save to path and return (model, stats)"""
+    path = path or Config.LEARNED_MODEL_PATH
+    snapshot = pricing_snapshot.current()
+    model = LearnedPricingModel()
+    stats = model.fit(lambda: iter_training_chunks(snapshot, chunk_size, include_estimates, estimate_limit),
+                      epochs=epochs)
+    model.snapshot_version = snapshot.version
+    model.save(path)
+    logging.info(f"Trained pricing model on {stats['rows']} rows, saved to {path}")
+    return model, stats
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+def load_model(path=None):
+    """
+    The saved model, memory-mapped and cached per process; reloaded when
+    the file changes. None when there is no artifact or scikit-learn is
+    not installed.
+    """
+    path = path or Config.LEARNED_MODEL_PATH
+    try:
+        modified = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _loaded.get(path)
+    if cached and cached[0] == modified:
+        return cached[1]
+
+    with _load_lock:
+        cached = _loaded.get(path)
+        if cached and cached[0] == modified:
+            return cached[1]
+        try:
+            import joblib
+        except ImportError as e:
+            logging.warning(f"Learned pricing model not loaded: {e}")
+            return None
+
+        started = time.perf_counter()
+        model = joblib.load(path, mmap_mode='r')
+        metrics.observe('learned_model_load_seconds', time.perf_counter() - started)
+        _loaded[path] = (modified, model)
+        return model
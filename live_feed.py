@@ -0,0 +1,142 @@
+import json
+import threading
+from collections import deque
+from config import Config
+from metrics import metrics
+
+class EstimateFeed:
+    """
+    In-process fan-out of new price estimate summaries to server-sent
+    event subscribers.
+
+    Published events go into a single bounded ring buffer shared by every
+    subscriber, so memory does not grow with the number of open dashboards.
+    Subscribers block on a condition variable while nothing is published,
+    costing no CPU, but each one holds a request thread, so the number of
+    subscribers is capped. A subscriber that falls further behind than the
+    buffer holds skips ahead and is told how many events it missed instead
+    of holding the publisher back.
+
+    The feed lives in one process: subscribers only see estimates served
+    by the same worker.
+    """
+
+    def __init__(self, max_subscribers=None, buffer_size=None):
+        self.max_subscribers = max_subscribers or Config.LIVE_FEED_MAX_SUBSCRIBERS
+        self._events = deque(maxlen=buffer_size or Config.LIVE_FEED_BUFFER_SIZE)
+        self._condition = threading.Condition()
+        self._last_seq = 0
+        self._subscribers = 0
+
+    @property
+    def subscriber_count(self):
+        return self._subscribers
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    def publish(self, estimate):
+        """Publish a summary of a saved PriceEstimate to all subscribers"""
+        payload = json.dumps(self._summarize(estimate))
+        with self._condition:
+            self._last_seq += 1
+            self._events.append((self._last_seq, payload))
+            self._condition.notify_all()
+        return self._last_seq
+
+    def subscribe(self, last_event_id=None):
+        """
+        Register a subscriber. Returns None when the connection cap is
+        reached. A client reconnecting with Last-Event-ID resumes from there
+        as long as the events are still buffered.
+        """
+        with self._condition:
+            if self._subscribers >= self.max_subscribers:
+                return None
+            self._subscribers += 1
+            cursor = self._last_seq
+            if last_event_id is not None and 0 <= last_event_id <= self._last_seq:
+                cursor = last_event_id
+            return Subscription(self, cursor)
+
+    def _unsubscribe(self):
+        with self._condition:
+            self._subscribers -= 1
+
+    def _read_since(self, cursor, timeout):
+        """Wait for events newer than cursor; returns (events, missed)"""
+        with self._condition:
+            if self._last_seq <= cursor:
+                self._condition.wait_for(lambda: self._last_seq > cursor, timeout=timeout)
+            if self._last_seq <= cursor:
+                return [], 0
+
+            oldest = self._events[0][0] if self._events else self._last_seq + 1
+            missed = max(0, oldest - cursor - 1)
+            events = [event for event in self._events if event[0] > cursor]
+            return events, missed
+
+    def _summarize(self, estimate):
+        return {
+            'id': estimate.id,
+            'state': estimate.state,
+            'city': estimate.city,
+            'locality': estimate.locality,
+            'plot_size_sqft': estimate.plot_size_sqft,
+            'estimated_price_per_sqft': estimate.estimated_price_per_sqft,
+            'total_estimated_price': estimate.total_estimated_price,
+            'confidence_score': estimate.confidence_score,
+            'source': 'API' if estimate.api_key else 'Web',
+            'created_at': estimate.created_at.isoformat() if estimate.created_at else None
+        }
+
+
+class Subscription:
+    """A single subscriber's read cursor into an EstimateFeed"""
+
+    def __init__(self, feed, cursor):
+        self.feed = feed
+        self.cursor = cursor
+        self.missed = 0
+        self._closed = False
+
+    def poll(self, timeout=None):
+        """Block until new events arrive or timeout; returns [(seq, json)]"""
+        events, missed = self.feed._read_since(self.cursor, timeout)
+        if events:
+            self.cursor = events[-1][0]
+        self.missed += missed
+        return events, missed
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.feed._unsubscribe()
+
+
+def event_stream(subscription, heartbeat=None):
+    """Generate a text/event-stream body for a subscription"""
+    heartbeat = heartbeat or Config.LIVE_FEED_HEARTBEAT_SECONDS
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            events, missed = subscription.poll(timeout=heartbeat)
+            if missed:
+                yield f'event: overflow\ndata: {json.dumps({"missed": missed})}\n\n'
+            if not events:
+                # Keep proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            for seq, payload in events:
+                yield f'id: {seq}\nevent: estimate\ndata: {payload}\n\n'
+    finally:
+        subscription.close()
+
+
+estimate_feed = EstimateFeed()
+
+metrics.gauge('live_feed_subscribers', lambda: estimate_feed.subscriber_count,
+              'Open admin live estimate streams')
+metrics.gauge('live_feed_published_total', lambda: estimate_feed.last_seq,
+              'Estimates published to the live feed')
@@ -0,0 +1,320 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from config import Config
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Shard:
+    """One thread's private counters and histograms"""
+    __slots__ = ('counters', 'histograms', 'thread')
+
+    def __init__(self, thread=None):
+        self.counters = {}
+        self.histograms = {}
+        self.thread = thread
+
+    def merge(self, other):
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in other.histograms.items():
+            current = self.histograms.get(key)
+            self.histograms[key] = list(values) if current is None else [a + b for a, b in zip(current, values)]
+
+class MetricsRegistry:
+    """
+    Low-overhead counters and histograms with Prometheus text output.
+
+    Each thread records into its own shard, so the hot path never takes a
+    lock. Shards are only merged when metrics are scraped; shards of
+    threads that have exited are folded into one retired shard, so a
+    thread-per-request server doesn't grow the list. With a metrics
+    directory configured, every worker process also writes its merged
+    snapshot there and a scrape on any worker sums all of them. Files of
+    workers that are gone, or that haven't flushed for stale_seconds,
+    are left out.
+    """
+
+    def __init__(self, directory=None, flush_seconds=None, buckets=DEFAULT_BUCKETS, worker_id=None,
+                 stale_seconds=None):
+        self.directory = directory
+        self.worker_id = worker_id
+        self.flush_seconds = flush_seconds if flush_seconds is not None else Config.METRICS_FLUSH_SECONDS
+        self.stale_seconds = stale_seconds if stale_seconds is not None else Config.METRICS_STALE_SECONDS
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()
+        self._shards_lock = threading.Lock()
+        self._gauges = {}
+        self._descriptions = {}
+        self._flush_lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def describe(self, name, text):
+        self._descriptions[name] = text
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            with self._shards_lock:
+                self._fold_finished_threads()
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _fold_finished_threads(self):
+        # Called with _shards_lock held. A finished thread no longer
+        # writes to its shard, so it can be merged without a lock.
+        live = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                live.append(shard)
+            else:
+                self._retired.merge(shard)
+        self._shards = live
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        counters = self._shard().counters
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histograms = self._shard().histograms
+        histogram = histograms.get(key)
+        if histogram is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            histogram = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        histogram[bisect.bisect_left(self.buckets, value)] += 1
+        histogram[-1] += value
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def gauge(self, name, callback, description=None):
+        """Register a gauge whose value is read from callback at scrape time"""
+        self._gauges[name] = callback
+        if description:
+            self.describe(name, description)
+
+    def snapshot(self):
+        """Merge this process's thread shards into a JSON-friendly dict"""
+        counters = {}
+        histograms = {}
+        with self._shards_lock:
+            self._fold_finished_threads()
+            # Copied under the lock, folding changes the retired shard
+            retired = _Shard()
+            retired.merge(self._retired)
+            shards = [retired] + self._shards
+
+        for shard in shards:
+            for key, value in dict(shard.counters).items():
+                encoded = _encode_key(key)
+                counters[encoded] = counters.get(encoded, 0) + value
+            for key, values in dict(shard.histograms).items():
+                encoded = _encode_key(key)
+                merged = histograms.get(encoded)
+                histograms[encoded] = list(values) if merged is None else [a + b for a, b in zip(merged, values)]
+
+        gauges = {}
+        for name, callback in self._gauges.items():
+            try:
+                gauges[_encode_key((name, ()))] = float(callback())
+            except Exception as e:
+                logging.error(f"Metrics gauge {name} failed: {e}")
+
+        return {'counters': counters, 'histograms': histograms, 'gauges': gauges}
+
+    def maybe_flush(self):
+        """Write this worker's snapshot if the flush interval has passed"""
+        if not self.directory:
+            return
+        # One thread per interval claims the flush
+        with self._flush_lock:
+            now = time.monotonic()
+            if now - self._last_flush < self.flush_seconds:
+                return
+            self._last_flush = now
+        self._write()
+
+    def flush(self):
+        if not self.directory:
+            return
+        with self._flush_lock:
+            self._last_flush = time.monotonic()
+        self._write()
+
+    def _write(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # Resolved at flush time: gunicorn forks workers after import
+        path = os.path.join(self.directory, f'metrics_{self.worker_id or os.getpid()}.json')
+        # A temp file per write, so concurrent flushes never share one
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.metrics_', suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as file:
+                json.dump(self.snapshot(), file)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def collect(self):
+        """Snapshot merged across all workers sharing the metrics directory"""
+        if not self.directory:
+            return self.snapshot()
+
+        self.flush()
+        merged = {'counters': {}, 'histograms': {}, 'gauges': {}}
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            if self._expired(path):
+                continue
+            try:
+                with open(path) as handle:
+                    worker = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            for key, value in worker['counters'].items():
+                merged['counters'][key] = merged['counters'].get(key, 0) + value
+            for key, values in worker['histograms'].items():
+                current = merged['histograms'].get(key)
+                merged['histograms'][key] = values if current is None else [a + b for a, b in zip(current, values)]
+            for key, value in worker['gauges'].items():
+                merged['gauges'][key] = merged['gauges'].get(key, 0) + value
+        return merged
+
+    def _expired(self, path):
+        """Whether a worker's snapshot file belongs to a dead or silent worker"""
+        worker = os.path.basename(path)[len('metrics_'):-len('.json')]
+        if worker.isdigit() and not _pid_running(int(worker)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return True
+        try:
+            return time.time() - os.path.getmtime(path) > self.stale_seconds
+        except OSError:
+            return True
+
+    def render(self):
+        """Prometheus text exposition format"""
+        data = self.collect()
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self._descriptions:
+                    lines.append(f'# HELP {name} {self._descriptions[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for encoded in sorted(data['counters']):
+            name, labels = _decode_key(encoded)
+            header(name, 'counter')
+            lines.append(f'{name}{_format_labels(labels)} {data["counters"][encoded]}')
+
+        for encoded in sorted(data['gauges']):
+            name, labels = _decode_key(encoded)
+            header(name, 'gauge')
+            lines.append(f'{name}{_format_labels(labels)} {data["gauges"][encoded]}')
+
+        for encoded in sorted(data['histograms']):
+            name, labels = _decode_key(encoded)
+            values = data['histograms'][encoded]
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels + [("le", str(bound))])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {values[-1]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+        return '\n'.join(lines) + '\n'
+
+    def init_app(self, app):
+        """Record per-route request latency and per-statement DB timings"""
+        from flask import g, request
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        @app.before_request
+        def _start_request_timer():
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        def _record_request(response):
+            started = g.pop('metrics_started', None)
+            if started is not None:
+                route = request.url_rule.rule if request.url_rule else 'unmatched'
+                self.observe('http_request_duration_seconds', time.perf_counter() - started,
+                             route=route, method=request.method)
+                self.inc('http_requests_total', route=route, method=request.method,
+                         status=str(response.status_code))
+            try:
+                self.maybe_flush()
+            except OSError as e:
+                # A full or unwritable METRICS_DIR must not fail the request
+                logging.error(f"Metrics flush failed: {e}")
+            return response
+
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def _before_query(conn, cursor, statement, parameters, context, executemany):
+            conn.info['metrics_query_start'] = time.perf_counter()
+
+        @event.listens_for(Engine, 'after_cursor_execute')
+        def _after_query(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.pop('metrics_query_start', None)
+            if started is None:
+                return
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement else 'UNKNOWN'
+            self.observe('db_query_duration_seconds', time.perf_counter() - started, operation=operation)
+
+def _pid_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _encode_key(key):
+    name, labels = key
+    return json.dumps([name, [list(pair) for pair in labels]])
+
+def _decode_key(encoded):
+    name, labels = json.loads(encoded)
+    return name, [tuple(pair) for pair in labels]
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + escaped + '}'
+
+metrics = MetricsRegistry(directory=Config.METRICS_DIR)
+
+metrics.describe('http_request_duration_seconds', 'Request latency by route')
+metrics.describe('http_requests_total', 'Requests by route and status')
+metrics.describe('estimator_stage_seconds', 'Time spent in each PriceEstimator stage')
+metrics.describe('db_query_duration_seconds', 'Database statement latency by operation')
+metrics.describe('cache_requests_total', 'Cache lookups by cache and result')
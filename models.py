@@ -37,9 +37,58 @@ class Locality(db.Model):
     location_multiplier = db.Column(db.Float, default=1.0)
     area_type = db.Column(db.String(50))  # residential, commercial, agricultural
     pin_code = db.Column(db.String(10))
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class PriceSeries(db.Model):
+    """
+    Observed prices of one locality (or of the city, when locality_id is
+    empty) as two packed float64 arrays: decimal years, ascending, and
+    price per sqft. See price_history.py.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    city_id = db.Column(db.Integer, db.ForeignKey('city.id'), nullable=False)
+    locality_id = db.Column(db.Integer, db.ForeignKey('locality.id'))
+    years = db.Column(db.LargeBinary, nullable=False)
+    prices = db.Column(db.LargeBinary, nullable=False)
+    observation_count = db.Column(db.Integer, default=0, nullable=False)
+    # Clamped or skipped by the last recalibration, so the next one reads it again
+    recalibration_pending = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('city_id', 'locality_id'),)
+
+class PriceSketch(db.Model):
+    """
+    Quantile sketch of estimated price per sqft for one city, merged from
+    every worker's updates. counts is a packed int64 array of log-spaced
+    bucket counts starting at bucket min_key. See price_sketches.py.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    state = db.Column(db.String(100), nullable=False)
+    city = db.Column(db.String(100), nullable=False)
+    min_key = db.Column(db.Integer, default=0, nullable=False)
+    counts = db.Column(db.LargeBinary, nullable=False)
+    estimate_count = db.Column(db.Integer, default=0, nullable=False)
+    price_per_sqft_sum = db.Column(db.Float, default=0.0, nullable=False)
+    min_price_per_sqft = db.Column(db.Float)
+    max_price_per_sqft = db.Column(db.Float)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    generation = db.Column(db.Integer, default=0)  # bumped by every rebuild
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('state', 'city'),)
+
+class JobWatermark(db.Model):
+    """How far an incremental batch job has processed its input"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    watermark = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class InfrastructureMultiplier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     factor_type = db.Column(db.String(50), nullable=False)  # road_width, metro, school, etc.
@@ -65,7 +114,54 @@ class PriceEstimate(db.Model):
     confidence_score = db.Column(db.Float, nullable=False)
     api_key = db.Column(db.String(100))
     ip_address = db.Column(db.String(45))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    pin_code = db.Column(db.String(10))  # set when the location came from a pin code
+    latitude = db.Column(db.Float)  # parcel coordinates, when given
+    longitude = db.Column(db.Float)
+
+class EstimateResult(db.Model):
+    """Distinct estimate inputs and outputs, stored once in compact audit mode"""
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(32), unique=True, nullable=False)
+    state = db.Column(db.String(100), nullable=False)
+    city = db.Column(db.String(100), nullable=False)
+    locality = db.Column(db.String(100))
+    plot_size_sqft = db.Column(db.Float, nullable=False)
+    road_width_ft = db.Column(db.Float)
+    nearby_schools = db.Column(db.Boolean, default=False)
+    nearby_metro = db.Column(db.Boolean, default=False)
+    commercial_area = db.Column(db.Boolean, default=False)
+    year = db.Column(db.Integer, nullable=False)
+    estimated_price_per_sqft = db.Column(db.Float, nullable=False)
+    total_estimated_price = db.Column(db.Float, nullable=False)
+    confidence_score = db.Column(db.Float, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    pin_code = db.Column(db.String(10))
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+
+class EstimateRequest(db.Model):
+    """One estimate request in compact audit mode, pointing at its result"""
+    id = db.Column(db.Integer, primary_key=True)
+    result_id = db.Column(db.Integer, db.ForeignKey('estimate_result.id'), nullable=False)
+    api_key_id = db.Column(db.Integer, db.ForeignKey('api_key.id'))
+    ip_address = db.Column(db.String(45))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class EstimateRollup(db.Model):
+    """Monthly per-city summary of estimates moved to the archive"""
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    state = db.Column(db.String(100), nullable=False)
+    city = db.Column(db.String(100), nullable=False)
+    estimate_count = db.Column(db.Integer, default=0, nullable=False)
+    price_per_sqft_sum = db.Column(db.Float, default=0.0, nullable=False)
+    total_price_sum = db.Column(db.Float, default=0.0, nullable=False)
+    min_price_per_sqft = db.Column(db.Float)
+    max_price_per_sqft = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('month', 'state', 'city'),)
 
 class APIKey(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,65 @@
+from collections import namedtuple
+from pricing_snapshot import pricing_snapshot
+
+PinMatch = namedtuple('PinMatch', 'state city locality')
+
+class PinCodeError(LookupError):
+    """A pin code that is unknown, or shared by localities in different cities"""
+
+    def __init__(self, message, pin_code, candidates=()):
+        super().__init__(message)
+        self.pin_code = pin_code
+        self.candidates = list(candidates)
+
+    def to_dict(self):
+        return {
+            'error': str(self),
+            'pin_code': self.pin_code,
+            'candidates': [match._asdict() for match in self.candidates]
+        }
+
+def normalize_pin(pin_code):
+    return ''.join(str(pin_code or '').split())
+
+class PinIndex:
+    """Pin code -> localities carrying it, built from a PricingSnapshot"""
+
+    def __init__(self, snapshot):
+        self._matches = {}
+        for locality in snapshot.localities:
+            city = snapshot.cities_by_id.get(locality.city_id)
+            pin_code = normalize_pin(locality.pin_code)
+            if city and pin_code:
+                self._matches.setdefault(pin_code, []).append(PinMatch(city.state, city.name, locality.name))
+        self._matches = {pin_code: tuple(matches) for pin_code, matches in self._matches.items()}
+
+    @classmethod
+    def build(cls, snapshot):
+        return cls(snapshot)
+
+    def lookup(self, pin_code):
+        return self._matches.get(normalize_pin(pin_code), ())
+
+    def resolve(self, pin_code, state=None, city=None, locality=None):
+        """
+        Localities for a pin code, narrowed by whatever names the caller
+        also sent. Several matches are only returned when they share one
+        city; otherwise PinCodeError lists the candidates.
+        """
+        matches = self.lookup(pin_code)
+        if not matches:
+            raise PinCodeError('Pin code not found', normalize_pin(pin_code))
+
+        narrowed = [match for match in matches
+                    if (not state or match.state == state)
+                    and (not city or match.city == city)
+                    and (not locality or match.locality == locality)]
+        if not narrowed:
+            raise PinCodeError('Pin code does not match the given location', normalize_pin(pin_code), matches)
+        if len({(match.state, match.city) for match in narrowed}) > 1:
+            raise PinCodeError('Pin code is shared by several cities', normalize_pin(pin_code), narrowed)
+        return narrowed
+
+def pin_index(snapshot=None):
+    snapshot = snapshot or pricing_snapshot.current()
+    return snapshot.derived('pin_index', PinIndex.build)
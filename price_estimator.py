@@ -1,76 +1,477 @@
+import hashlib
 import math
+import numpy as np
 from datetime import datetime
 from models import City, Locality, InfrastructureMultiplier
 from config import Config
+from metrics import metrics
+from pin_index import pin_index, PinCodeError
+from spatial_index import spatial_index
+from price_history import price_trends
+from learned_model import load_model
+
+def _input_seed(key):
+    """Stable 64-bit seed from estimate inputs"""
+    digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+def _draw_noise(rng, distribution, spread, samples):
+    """Zero-centred relative noise; 1 + noise is the sampled factor"""
+    if distribution == 'normal':
+        return rng.normal(0.0, spread, samples)
+    if distribution == 'uniform':
+        return rng.uniform(-spread, spread, samples)
+    if distribution == 'lognormal':
+        return np.expm1(rng.normal(0.0, spread, samples))
+    raise ValueError(f"Unknown price band distribution: {distribution}")
+
+# What-if grid axes in result order, with the value used when one is not given
+GRID_AXES = {
+    'plot_size_sqft': 1000,
+    'road_width_ft': 20,
+    'nearby_schools': False,
+    'nearby_metro': False,
+    'commercial_area': False,
+    'area_type': 'residential',
+    'year': Config.BASE_YEAR
+}
 
 class PriceEstimator:
+    LOCALITY_CONFIDENCE = 0.9  # confidence when the locality's own price is known
+    
     def __init__(self):
         self.base_year = Config.BASE_YEAR
         self.inflation_rate = Config.INFLATION_RATE
+        self._lookup_cache = None  # shared lookups while a batch is running
     
     def estimate_price(self, state, city_name, locality_name=None, plot_size_sqft=1000, 
                       road_width_ft=20, nearby_schools=False, nearby_metro=False, 
-                      commercial_area=False, year=None, area_type='residential'):
+                      commercial_area=False, year=None, area_type='residential',
+                      latitude=None, longitude=None, price_bands=False):
         """
-        Estimate land price based on location and infrastructure factors
+        Estimate land price based on location and infrastructure factors.
+        With price_bands, the result also has Monte Carlo P10/P50/P90 prices.
         """
         if year is None:
             year = datetime.now().year
         
+        factors = self._resolve_factors(state, city_name, locality_name, road_width_ft,
+                                        nearby_schools, nearby_metro, commercial_area,
+                                        area_type, latitude, longitude)
+        if factors is None:
+            result = self._fallback_estimate(state, city_name, plot_size_sqft, year)
+            factors = self._fallback_factors(state)
+        else:
+            result = self._estimate_from_factors(factors, plot_size_sqft, year)
+        
+        if price_bands:
+            with metrics.timer('estimator_stage_seconds', stage='price_bands'):
+                result['price_bands'] = self._price_bands(
+                    factors, year, plot_size_sqft,
+                    (state, city_name, locality_name, plot_size_sqft, road_width_ft, nearby_schools,
+                     nearby_metro, commercial_area, year, area_type, latitude, longitude)
+                )
+        return result
+    
+    def _estimate_from_factors(self, factors, plot_size_sqft, year):
+        """Result dict for factors from _resolve_factors()"""
+        # Calculate year trend factor
+        with metrics.timer('estimator_stage_seconds', stage='year_trend'):
+            year_trend_factor = self._calculate_year_trend_factor(year, factors['growth_rate'],
+                                                                  factors['fitted_rate'])
+        
+        # Final calculation
+        estimated_price_per_sqft = (factors['base_price'] * factors['location_multiplier'] * 
+                                   factors['infrastructure_multiplier'] * year_trend_factor * 
+                                   factors['area_type_multiplier'])
+        
+        total_estimated_price = estimated_price_per_sqft * plot_size_sqft
+        
+        return {
+            'estimated_price_per_sqft': round(estimated_price_per_sqft, 2),
+            'total_estimated_price': round(total_estimated_price, 2),
+            'confidence_score': round(factors['confidence_score'], 2),
+            'data_sources': factors['data_sources'],
+            'calculation_breakdown': {
+                'base_price_per_sqft': round(factors['base_price'], 2),
+                'location_multiplier': round(factors['location_multiplier'], 2),
+                'infrastructure_multiplier': round(factors['infrastructure_multiplier'], 2),
+                'year_trend_factor': round(year_trend_factor, 2),
+                'area_type_multiplier': round(factors['area_type_multiplier'], 2)
+            }
+        }
+    
+    def _price_bands(self, factors, year, plot_size_sqft, seed_key, samples=None):
+        """
+        P10/P50/P90 of the estimate with every multiplier and the growth
+        rate drawn from PRICE_BAND_DISTRIBUTIONS. The generator is seeded
+        from the inputs, so the same estimate always gets the same bands.
+        """
+        samples = samples or Config.PRICE_BAND_SAMPLES
+        rng = np.random.default_rng(_input_seed(seed_key))
+        
+        drawn = {}
+        for name, (distribution, spread) in Config.PRICE_BAND_DISTRIBUTIONS.items():
+            if name == 'base_price':
+                spread *= 1 - factors['confidence_score']
+            drawn[name] = _draw_noise(rng, distribution, spread, samples)
+        
+        growth_rates = (factors['growth_rate'] or 0.0) + drawn['growth_rate']
+        fitted_rates = None if factors['fitted_rate'] is None else factors['fitted_rate'] + drawn['growth_rate']
+        prices = (factors['base_price'] * (1 + drawn['base_price']) *
+                  factors['location_multiplier'] * (1 + drawn['location_multiplier']) *
+                  factors['infrastructure_multiplier'] * (1 + drawn['infrastructure_multiplier']) *
+                  self._calculate_year_trend_factor(year, growth_rates, fitted_rates) *
+                  factors['area_type_multiplier'] * (1 + drawn['area_type_multiplier']))
+        p10, p50, p90 = np.percentile(prices, [10, 50, 90]).tolist()
+        
+        return {
+            'samples': samples,
+            'price_per_sqft': {'p10': round(p10, 2), 'p50': round(p50, 2), 'p90': round(p90, 2)},
+            'total_price': {
+                'p10': round(p10 * plot_size_sqft, 2),
+                'p50': round(p50 * plot_size_sqft, 2),
+                'p90': round(p90 * plot_size_sqft, 2)
+            }
+        }
+    
+    def _resolve_factors(self, state, city_name, locality_name, road_width_ft, nearby_schools,
+                         nearby_metro, commercial_area, area_type, latitude, longitude):
+        """
+        Everything in an estimate except the year trend, or None when the
+        city is unknown
+        """
         # Get base price from database
-        city = City.query.filter_by(name=city_name, state=state).first()
+        with metrics.timer('estimator_stage_seconds', stage='city_resolve'):
+            city = self._get_city(city_name, state)
         if not city:
-            return self._fallback_estimate(state, city_name, plot_size_sqft, year)
+            return None
         
         base_price = city.base_price_per_sqft
         confidence_score = 0.7  # Base confidence for city-level data
         data_sources = [f"City: {city_name}"]
         
         # Try to get locality-specific price
+        locality = None
         if locality_name:
-            locality = Locality.query.filter_by(name=locality_name, city_id=city.id).first()
+            with metrics.timer('estimator_stage_seconds', stage='locality_resolve'):
+                locality = self._get_locality(locality_name, city.id)
             if locality:
                 base_price = locality.price_per_sqft
-                confidence_score = 0.9  # Higher confidence for locality data
+                confidence_score = self.LOCALITY_CONFIDENCE  # Higher confidence for locality data
                 data_sources.append(f"Locality: {locality_name}")
             else:
                 confidence_score = 0.6  # Lower confidence when locality not found
         
-        # Calculate location multiplier
-        location_multiplier = self._calculate_location_multiplier(city, locality_name)
+        # Without an exact locality, blend the nearest known localities
+        if confidence_score < self.LOCALITY_CONFIDENCE and latitude is not None and longitude is not None:
+            with metrics.timer('estimator_stage_seconds', stage='spatial_blend'):
+                nearby = self._get_nearby_blend(latitude, longitude)
+            if nearby:
+                base_price = nearby['price_per_sqft']
+                radius_km = Config.SPATIAL_MAX_DISTANCE_KM
+                confidence_score = max(confidence_score,
+                                       0.6 + 0.25 * (1 - min(nearby['nearest_km'], radius_km) / radius_km))
+                data_sources.append("Nearby localities: " + ', '.join(
+                    f"{name} ({distance} km)" for name, distance in nearby['neighbors']))
+        
+        # Growth fitted from the price history, where there is enough of it
+        trend = self._get_price_trend(city.id, locality.id if locality else None)
+        if trend:
+            data_sources.append(f"Price trend: {trend.rate:.1%} a year from {trend.observations} observations")
         
         # Calculate infrastructure multiplier
-        infra_multiplier = self._calculate_infrastructure_multiplier(
-            road_width_ft, nearby_schools, nearby_metro, commercial_area
-        )
+        with metrics.timer('estimator_stage_seconds', stage='infrastructure_multiplier'):
+            infra_multiplier = self._calculate_infrastructure_multiplier(
+                road_width_ft, nearby_schools, nearby_metro, commercial_area
+            )
         
-        # Calculate year trend factor
-        year_trend_factor = self._calculate_year_trend_factor(year, city.growth_rate)
+        return {
+            'city': city,
+            'base_price': base_price,
+            'confidence_score': confidence_score,
+            'data_sources': data_sources,
+            'location_multiplier': self._calculate_location_multiplier(city, locality_name),
+            'infrastructure_multiplier': infra_multiplier,
+            'area_type_multiplier': self._get_area_type_multiplier(area_type),
+            'growth_rate': city.growth_rate,
+            'fitted_rate': trend.rate if trend else None
+        }
+    
+    def project_prices(self, state, city_name, locality_name=None, years=None, **factors):
+        """Price per year for one location; see project_batch()"""
+        return self.project_batch([dict(factors, state=state, city_name=city_name,
+                                        locality_name=locality_name)], years)[0]
+    
+    def project_batch(self, requests, years=None):
+        """
+        Price curves over several years for many locations. Each request
+        is a dict of estimate_price keyword arguments without year. The
+        year-independent factors are resolved once per location (lookups
+        shared across the batch) and every curve comes out of one
+        vectorized power over a locations x years matrix. Each point
+        equals estimate_price for that year.
+        """
+        years = np.asarray(years if years is not None else Config.PROJECTION_YEARS, dtype=np.int64)
         
-        # Apply area type multiplier
-        area_type_multiplier = self._get_area_type_multiplier(area_type)
+        self._lookup_cache = {}
+        try:
+            resolved = []
+            for request in requests:
+                factors = self._resolve_factors(
+                    request['state'], request['city_name'], request.get('locality_name'),
+                    request.get('road_width_ft', 20), request.get('nearby_schools', False),
+                    request.get('nearby_metro', False), request.get('commercial_area', False),
+                    request.get('area_type', 'residential'),
+                    request.get('latitude'), request.get('longitude'))
+                resolved.append(factors or self._fallback_factors(request['state']))
+        finally:
+            self._lookup_cache = None
         
-        # Final calculation
-        estimated_price_per_sqft = (base_price * location_multiplier * 
-                                   infra_multiplier * year_trend_factor * 
-                                   area_type_multiplier)
+        def column(name):
+            return np.array([np.nan if factors[name] is None else factors[name] for factors in resolved],
+                            dtype=np.float64)[:, None]
         
-        total_estimated_price = estimated_price_per_sqft * plot_size_sqft
+        with metrics.timer('estimator_stage_seconds', stage='year_trend'):
+            trends = self._calculate_year_trend_factor(years[None, :], column('growth_rate'),
+                                                       column('fitted_rate'))
+        prices = (column('base_price') * column('location_multiplier') *
+                  column('infrastructure_multiplier') * trends * column('area_type_multiplier'))
+        plot_sizes = np.array([request.get('plot_size_sqft', 1000) for request in requests],
+                              dtype=np.float64)[:, None]
+        totals = prices * plot_sizes
+        
+        def rounded(values):
+            return [round(value, 2) for value in values.tolist()]
+        
+        return [{
+            'years': years.tolist(),
+            'estimated_price_per_sqft': rounded(prices[row]),
+            'total_estimated_price': rounded(totals[row]),
+            'confidence_score': round(factors['confidence_score'], 2),
+            'data_sources': factors['data_sources'],
+            'calculation_breakdown': {
+                'base_price_per_sqft': round(factors['base_price'], 2),
+                'location_multiplier': round(factors['location_multiplier'], 2),
+                'infrastructure_multiplier': round(factors['infrastructure_multiplier'], 2),
+                'year_trend_factor': rounded(trends[row]),
+                'area_type_multiplier': round(factors['area_type_multiplier'], 2)
+            }
+        } for row, factors in enumerate(resolved)]
+    
+    def estimate_by_pin(self, pin_code, state=None, city_name=None, locality_name=None, **factors):
+        """
+        Estimate from a pin code instead of city and locality names. Any
+        names given narrow the match. A pin shared by several localities
+        of one city gives the average of their estimates at lower
+        confidence. Raises PinCodeError for unknown pins and for pins
+        shared across cities.
+        """
+        matches = pin_index().resolve(pin_code, state=state, city=city_name, locality=locality_name)
+        results = [self.estimate_price(state=match.state, city_name=match.city,
+                                       locality_name=match.locality, **factors)
+                   for match in matches]
+        
+        if len(results) == 1:
+            result = results[0]
+        else:
+            count = len(results)
+            result = {
+                'estimated_price_per_sqft': round(sum(r['estimated_price_per_sqft'] for r in results) / count, 2),
+                'total_estimated_price': round(sum(r['total_estimated_price'] for r in results) / count, 2),
+                'confidence_score': round(max(min(r['confidence_score'] for r in results) - 0.1, 0.1), 2),
+                'data_sources': [source for r in results for source in r['data_sources']],
+                'calculation_breakdown': {
+                    name: round(sum(r['calculation_breakdown'][name] for r in results) / count, 2)
+                    for name in results[0]['calculation_breakdown']
+                }
+            }
+            if 'price_bands' in results[0]:
+                # Mean of the localities' bands, not bands of the mean
+                result['price_bands'] = {
+                    'samples': results[0]['price_bands']['samples'],
+                    **{part: {band: round(sum(r['price_bands'][part][band] for r in results) / count, 2)
+                              for band in ('p10', 'p50', 'p90')}
+                       for part in ('price_per_sqft', 'total_price')}
+                }
+        
+        result['pin_code'] = {
+            'pin_code': pin_code,
+            'ambiguous': len(matches) > 1,
+            'matches': [match._asdict() for match in matches]
+        }
+        return result
+    
+    def estimate_batch(self, requests):
+        """
+        Estimate many plots at once. Each request is a dict of
+        estimate_price keyword arguments, or estimate_by_pin ones when it
+        has a pin_code; unresolvable pins give an error dict for that row.
+        City, locality and multiplier lookups are shared across the batch,
+        so repeated locations cost one query each instead of one per row,
+        and all coordinates are matched to nearby localities in one
+        vectorized spatial query.
+        """
+        self._lookup_cache = {}
+        try:
+            # Resolve every coordinate pair in the batch in one vectorized query
+            points = sorted({(request['latitude'], request['longitude']) for request in requests
+                             if request.get('latitude') is not None and request.get('longitude') is not None})
+            if points:
+                latitudes, longitudes = zip(*points)
+                for point, nearby in zip(points, spatial_index().resolve(latitudes, longitudes)):
+                    self._lookup_cache[('nearby',) + point] = nearby
+            
+            results = []
+            for request in requests:
+                if request.get('pin_code'):
+                    try:
+                        results.append(self.estimate_by_pin(**request))
+                    except PinCodeError as e:
+                        results.append(e.to_dict())
+                else:
+                    results.append(self.estimate_price(**request))
+            return results
+        finally:
+            self._lookup_cache = None
+    
+    def estimate_learned(self, requests):
+        """
+        Prices from the learned model (flask estimates train-model) for
+        estimate_batch-style requests, predicted in one batch. Each result
+        is None for unknown cities; all are None without a trained model.
+        """
+        model = load_model()
+        if model is None:
+            return [None] * len(requests)
+        
+        with metrics.timer('estimator_stage_seconds', stage='learned_model'):
+            prices = model.predict_batch(requests)
+        return [None if price is None else {
+            'estimated_price_per_sqft': round(price, 2),
+            'total_estimated_price': round(price * request.get('plot_size_sqft', 1000), 2),
+            'trained_at': model.trained_at
+        } for request, price in zip(requests, prices)]
+    
+    def estimate_grid(self, state, city_name, locality_name=None, latitude=None, longitude=None,
+                      max_cells=None, **axes):
+        """
+        What-if grid for one location: every combination of the values
+        given for plot_size_sqft, road_width_ft, nearby_schools,
+        nearby_metro, commercial_area, area_type and year (a list each, or
+        a single value). Each factor is computed once per value as an array
+        along its own axis and the grid comes out of numpy broadcasting.
+        Prices are flattened in row-major order over the axes as listed
+        in the result. Raises ValueError above max_cells cells.
+        """
+        unknown = set(axes) - set(GRID_AXES)
+        if unknown:
+            raise ValueError(f"Unknown grid axes: {', '.join(sorted(unknown))}")
+        
+        values = {}
+        for name, default in GRID_AXES.items():
+            given = axes.get(name, default)
+            values[name] = list(given) if isinstance(given, (list, tuple, range)) else [given]
+        
+        cells = math.prod(len(axis_values) for axis_values in values.values())
+        max_cells = max_cells or Config.WHAT_IF_MAX_CELLS
+        if cells > max_cells:
+            raise ValueError(f"Grid has {cells} cells; the limit is {max_cells}")
+        
+        self._lookup_cache = {}
+        try:
+            factors = self._resolve_factors(state, city_name, locality_name, 20, False, False, False,
+                                            'residential', latitude, longitude)
+            if factors is None:
+                factors = self._fallback_factors(state)
+            known_city = factors['city'] is not None
+            
+            def axis(name, multiplier=None):
+                array = np.array([multiplier(value) if multiplier else value for value in values[name]],
+                                 dtype=np.float64)
+                shape = [1] * len(GRID_AXES)
+                shape[list(GRID_AXES).index(name)] = len(array)
+                return array.reshape(shape)
+            
+            def amenity(name):
+                multiplier = self._amenity_multiplier(name) if known_city else 1.0
+                return axis(name, lambda present: multiplier if present else 1.0)
+            
+            # Same factors in the same order as estimate_price, so every cell matches it
+            infra_multiplier = 1.0
+            if known_city:
+                infra_multiplier = infra_multiplier * axis('road_width_ft', self._road_width_multiplier)
+            infra_multiplier = (infra_multiplier * amenity('nearby_schools') *
+                                amenity('nearby_metro') * amenity('commercial_area'))
+        finally:
+            self._lookup_cache = None
+        
+        trends = self._calculate_year_trend_factor(axis('year'), factors['growth_rate'], factors['fitted_rate'])
+        area_types = axis('area_type', self._get_area_type_multiplier if known_city else lambda value: 1.0)
+        prices = (factors['base_price'] * factors['location_multiplier'] *
+                  infra_multiplier * trends * area_types)
+        shape = tuple(len(axis_values) for axis_values in values.values())
+        prices = np.broadcast_to(prices, shape)
+        totals = prices * axis('plot_size_sqft')
         
         return {
-            'estimated_price_per_sqft': round(estimated_price_per_sqft, 2),
-            'total_estimated_price': round(total_estimated_price, 2),
-            'confidence_score': round(confidence_score, 2),
-            'data_sources': data_sources,
+            'axes': values,
+            'shape': list(shape),
+            'estimated_price_per_sqft': [round(value, 2) for value in prices.ravel().tolist()],
+            'total_estimated_price': [round(value, 2) for value in totals.ravel().tolist()],
+            'confidence_score': round(factors['confidence_score'], 2),
+            'data_sources': factors['data_sources'],
             'calculation_breakdown': {
-                'base_price_per_sqft': round(base_price, 2),
-                'location_multiplier': round(location_multiplier, 2),
-                'infrastructure_multiplier': round(infra_multiplier, 2),
-                'year_trend_factor': round(year_trend_factor, 2),
-                'area_type_multiplier': round(area_type_multiplier, 2)
+                'base_price_per_sqft': round(factors['base_price'], 2),
+                'location_multiplier': round(factors['location_multiplier'], 2)
             }
         }
     
+    def _cached_lookup(self, key, loader):
+        if self._lookup_cache is None:
+            return loader()
+        if key not in self._lookup_cache:
+            self._lookup_cache[key] = loader()
+        return self._lookup_cache[key]
+    
+    def _get_city(self, city_name, state):
+        return self._cached_lookup(
+            ('city', city_name, state),
+            lambda: City.query.filter_by(name=city_name, state=state).first()
+        )
+    
+    def _get_locality(self, locality_name, city_id):
+        return self._cached_lookup(
+            ('locality', locality_name, city_id),
+            lambda: Locality.query.filter_by(name=locality_name, city_id=city_id).first()
+        )
+    
+    def _get_nearby_blend(self, latitude, longitude):
+        return self._cached_lookup(
+            ('nearby', latitude, longitude),
+            lambda: spatial_index().resolve([latitude], [longitude])[0]
+        )
+    
+    def _get_price_trend(self, city_id, locality_id):
+        return self._cached_lookup(
+            ('trend', city_id, locality_id),
+            lambda: price_trends().for_location(city_id, locality_id)
+        )
+    
+    def _get_multipliers(self, factor_type):
+        return self._cached_lookup(
+            ('multipliers', factor_type),
+            lambda: InfrastructureMultiplier.query.filter_by(factor_type=factor_type).all()
+        )
+    
+    def _get_multiplier(self, factor_type, factor_value):
+        return self._cached_lookup(
+            ('multiplier', factor_type, factor_value),
+            lambda: InfrastructureMultiplier.query.filter_by(
+                factor_type=factor_type, factor_value=factor_value
+            ).first()
+        )
+    
     def _calculate_location_multiplier(self, city, locality_name):
         """Calculate multiplier based on city tier and locality demand"""
         base_multiplier = 1.0
@@ -97,59 +498,81 @@ class PriceEstimator:
         
         return base_multiplier
     
+    def site_multiplier(self, road_width_ft=20, nearby_schools=False, nearby_metro=False,
+                        commercial_area=False, area_type='residential', **_):
+        """Infrastructure x area type: the factors that do not depend on the location"""
+        return (self._calculate_infrastructure_multiplier(road_width_ft, nearby_schools,
+                                                          nearby_metro, commercial_area)
+                * self._get_area_type_multiplier(area_type))
+    
     def _calculate_infrastructure_multiplier(self, road_width_ft, nearby_schools, 
                                            nearby_metro, commercial_area):
         """Calculate multiplier based on infrastructure factors"""
         multiplier = 1.0
         
         # Road width factor
-        road_multipliers = InfrastructureMultiplier.query.filter_by(
-            factor_type='road_width'
-        ).all()
-        
-        for rm in road_multipliers:
-            if self._check_range_match(road_width_ft, rm.factor_value):
-                multiplier *= rm.multiplier
-                break
-        else:
-            # Default road width calculation if not in database
-            if road_width_ft >= 40:
-                multiplier *= 1.3
-            elif road_width_ft >= 30:
-                multiplier *= 1.2
-            elif road_width_ft >= 20:
-                multiplier *= 1.1
-            elif road_width_ft < 12:
-                multiplier *= 0.9
+        multiplier *= self._road_width_multiplier(road_width_ft)
         
         # Nearby amenities
         if nearby_schools:
-            school_mult = InfrastructureMultiplier.query.filter_by(
-                factor_type='nearby_schools', factor_value='yes'
-            ).first()
-            multiplier *= school_mult.multiplier if school_mult else 1.1
+            multiplier *= self._amenity_multiplier('nearby_schools')
         
         if nearby_metro:
-            metro_mult = InfrastructureMultiplier.query.filter_by(
-                factor_type='nearby_metro', factor_value='yes'
-            ).first()
-            multiplier *= metro_mult.multiplier if metro_mult else 1.25
+            multiplier *= self._amenity_multiplier('nearby_metro')
         
         if commercial_area:
-            commercial_mult = InfrastructureMultiplier.query.filter_by(
-                factor_type='commercial_area', factor_value='yes'
-            ).first()
-            multiplier *= commercial_mult.multiplier if commercial_mult else 1.15
+            multiplier *= self._amenity_multiplier('commercial_area')
         
         return multiplier
     
-    def _calculate_year_trend_factor(self, target_year, city_growth_rate):
-        """Calculate year trend factor based on inflation and growth"""
+    def _road_width_multiplier(self, road_width_ft):
+        road_multipliers = self._get_multipliers('road_width')
+        
+        for rm in road_multipliers:
+            if self._check_range_match(road_width_ft, rm.factor_value):
+                return rm.multiplier
+        
+        # Default road width calculation if not in database
+        if road_width_ft >= 40:
+            return 1.3
+        elif road_width_ft >= 30:
+            return 1.2
+        elif road_width_ft >= 20:
+            return 1.1
+        elif road_width_ft < 12:
+            return 0.9
+        return 1.0
+    
+    def _amenity_multiplier(self, factor_type):
+        default_multipliers = {
+            'nearby_schools': 1.1,
+            'nearby_metro': 1.25,
+            'commercial_area': 1.15
+        }
+        amenity = self._get_multiplier(factor_type, 'yes')
+        return amenity.multiplier if amenity else default_multipliers[factor_type]
+    
+    def _calculate_year_trend_factor(self, target_year, city_growth_rate, fitted_rate=None):
+        """
+        Calculate year trend factor from the growth fitted to the price
+        history when there is one, otherwise from inflation and the city's
+        growth rate. Arrays of years and rates broadcast into an array of
+        factors; NaN fitted rates fall back like None.
+        """
         year_diff = target_year - self.base_year
         
         # Combine inflation and city-specific growth
         combined_rate = self.inflation_rate + city_growth_rate
         
+        # Observed prices already include inflation
+        if fitted_rate is not None:
+            if np.ndim(fitted_rate):
+                combined_rate = np.where(np.isnan(fitted_rate), combined_rate, fitted_rate)
+            else:
+                combined_rate = fitted_rate
+        
+        if np.ndim(year_diff) or np.ndim(combined_rate):
+            return np.power(1 + combined_rate, year_diff)
         return math.pow(1 + combined_rate, year_diff)
     
     def _get_area_type_multiplier(self, area_type):
@@ -179,9 +602,8 @@ class PriceEstimator:
         except:
             return False
     
-    def _fallback_estimate(self, state, city_name, plot_size_sqft, year):
-        """Fallback estimation when city data is not available"""
-        # Use state averages or national averages
+    def _state_average_price(self, state):
+        """State average price per sqft, or the national average"""
         state_averages = {
             'Maharashtra': 8000,
             'Karnataka': 6500,
@@ -195,7 +617,26 @@ class PriceEstimator:
             'Haryana': 6000
         }
         
-        base_price = state_averages.get(state, 3500)  # National average fallback
+        return state_averages.get(state, 3500)  # National average fallback
+    
+    def _fallback_factors(self, state):
+        """_resolve_factors() equivalent of _fallback_estimate()"""
+        return {
+            'city': None,
+            'base_price': self._state_average_price(state),
+            'confidence_score': 0.3,
+            'data_sources': [f"State average: {state}"],
+            'location_multiplier': 1.0,
+            'infrastructure_multiplier': 1.0,
+            'area_type_multiplier': 1.0,
+            'growth_rate': 0.0,
+            'fitted_rate': None
+        }
+    
+    def _fallback_estimate(self, state, city_name, plot_size_sqft, year):
+        """Fallback estimation when city data is not available"""
+        # Use state averages or national averages
+        base_price = self._state_average_price(state)
         
         # Apply basic year trend
         year_diff = year - self.base_year
@@ -0,0 +1,101 @@
+from collections import namedtuple
+from datetime import date
+import numpy as np
+from pricing_snapshot import pricing_snapshot
+from config import Config
+
+PriceTrend = namedtuple('PriceTrend', 'rate cagr observations first_year last_year')
+
+def pack(values):
+    return np.asarray(values, dtype='<f8').tobytes()
+
+def unpack(blob):
+    return np.frombuffer(blob, dtype='<f8')
+
+def decimal_year(text):
+    """'2021', '2021-07' or '2021-07-15' as a fractional year"""
+    parts = [int(part) for part in str(text).strip().split('-')]
+    year, month, day = (parts + [1, 1])[:3]
+    start = date(year, 1, 1).toordinal()
+    days = date(year + 1, 1, 1).toordinal() - start
+    return year + (date(year, month, day).toordinal() - start) / days
+
+def merge_observations(years, prices, new_years, new_prices):
+    """
+    Union of two series, sorted by year; a new observation replaces an
+    existing one for the same date
+    """
+    merged = dict(zip(np.asarray(years).tolist(), np.asarray(prices).tolist()))
+    merged.update(zip(new_years, new_prices))
+    ordered = sorted(merged)
+    return np.array(ordered, dtype=np.float64), np.array([merged[year] for year in ordered], dtype=np.float64)
+
+def fit_trends(series, min_observations=None, min_span_years=None):
+    """
+    Annual growth for many price series at once. rate comes from a
+    least-squares line through log price against time (robust to noisy
+    single observations); cagr is the plain first-to-last compound rate.
+    All series are concatenated and the per-series sums come from
+    np.bincount, so the fit is a handful of array passes however many
+    series there are. Series that are too short or too close in time
+    get None.
+    """
+    min_observations = min_observations or Config.TREND_MIN_OBSERVATIONS
+    min_span_years = min_span_years or Config.TREND_MIN_SPAN_YEARS
+    if not series:
+        return []
+
+    years = [unpack(row.years) for row in series]
+    prices = [unpack(row.prices) for row in series]
+    counts = np.array([len(values) for values in years], dtype=np.int64)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    owner = np.repeat(np.arange(len(series)), counts)
+    t = np.concatenate(years)
+    y = np.log(np.concatenate(prices))
+
+    n = np.maximum(counts, 1)
+    t_centered = t - (np.bincount(owner, t, len(series)) / n)[owner]
+    y_centered = y - (np.bincount(owner, y, len(series)) / n)[owner]
+    sxx = np.bincount(owner, t_centered * t_centered, len(series))
+    sxy = np.bincount(owner, t_centered * y_centered, len(series))
+
+    valid = counts >= max(min_observations, 2)
+    last = np.where(valid, ends - 1, 0)
+    first = np.where(valid, starts, 0)
+    span = np.where(valid, t[last] - t[first], 0.0)
+    valid &= span >= min_span_years
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.expm1(sxy / sxx)
+        cagrs = np.power(np.exp(y[last] - y[first]), 1.0 / span) - 1.0
+
+    low, high = Config.TREND_RATE_LIMITS
+    rates = np.clip(rates, low, high)
+    return [PriceTrend(float(rates[i]), float(cagrs[i]), int(counts[i]), float(t[first[i]]), float(t[last[i]]))
+            if valid[i] else None for i in range(len(series))]
+
+class PriceTrends:
+    """Fitted trend per locality and per city, built from a PricingSnapshot"""
+
+    def __init__(self, snapshot):
+        self.localities = {}
+        self.cities = {}
+        for row, trend in zip(snapshot.series, fit_trends(snapshot.series)):
+            if trend is None:
+                continue
+            if row.locality_id is None:
+                self.cities[row.city_id] = trend
+            else:
+                self.localities[row.locality_id] = trend
+
+    @classmethod
+    def build(cls, snapshot):
+        return cls(snapshot)
+
+    def for_location(self, city_id, locality_id=None):
+        """The locality's trend, else the city's, else None"""
+        return self.localities.get(locality_id) or self.cities.get(city_id)
+
+def price_trends(snapshot=None):
+    snapshot = snapshot or pricing_snapshot.current()
+    return snapshot.derived('price_trends', PriceTrends.build)
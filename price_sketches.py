@@ -0,0 +1,356 @@
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+import numpy as np
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from models import PriceSketch
+from app import db
+from config import Config
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative error (DDSketch style).
+
+    A value x is counted in bucket ceil(log(x) / log(gamma)), with gamma
+    chosen so that every value in a bucket is within relative_accuracy of
+    the bucket's representative value. Counts live in one dense int64
+    array starting at min_key, so merging two sketches is an array
+    addition and the size depends on the spread of prices, not on how
+    many were added. Past max_buckets the lowest buckets are folded
+    together, which only costs accuracy at the bottom of the range.
+    """
+
+    def __init__(self, relative_accuracy=None, max_buckets=None):
+        accuracy = relative_accuracy or Config.SKETCH_RELATIVE_ACCURACY
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets or Config.SKETCH_MAX_BUCKETS
+        self.min_key = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    @classmethod
+    def from_row(cls, row):
+        """Sketch from a PriceSketch row (ORM object or Core row)"""
+        sketch = cls()
+        sketch.min_key = row.min_key
+        sketch.counts = np.frombuffer(row.counts, dtype='<i8').astype(np.int64)
+        sketch.count = row.estimate_count
+        sketch.total = row.price_per_sqft_sum
+        sketch.min = row.min_price_per_sqft
+        sketch.max = row.max_price_per_sqft
+        return sketch
+
+    def columns(self):
+        """PriceSketch column values for this sketch"""
+        return {
+            'min_key': self.min_key,
+            'counts': self.counts.astype('<i8').tobytes(),
+            'estimate_count': self.count,
+            'price_per_sqft_sum': self.total,
+            'min_price_per_sqft': self.min,
+            'max_price_per_sqft': self.max
+        }
+
+    def add(self, values):
+        """Count an array of prices; values that are not positive are ignored"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[values > 0]
+        if not len(values):
+            return
+        keys = np.ceil(np.log(values) / self.log_gamma).astype(np.int64)
+        low = int(keys.min())
+        self._add_counts(low, np.bincount(keys - low))
+        self._add_totals(len(values), float(values.sum()), float(values.min()), float(values.max()))
+
+    def merge(self, other):
+        if other.count:
+            self._add_counts(other.min_key, other.counts)
+            self._add_totals(other.count, other.total, other.min, other.max)
+
+    def _add_totals(self, count, total, low, high):
+        self.count += count
+        self.total += total
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def _add_counts(self, min_key, counts):
+        if not len(self.counts):
+            self.min_key, self.counts = min_key, np.array(counts, dtype=np.int64)
+        else:
+            low = min(self.min_key, min_key)
+            high = max(self.min_key + len(self.counts), min_key + len(counts))
+            merged = np.zeros(high - low, dtype=np.int64)
+            merged[self.min_key - low:self.min_key - low + len(self.counts)] += self.counts
+            merged[min_key - low:min_key - low + len(counts)] += counts
+            self.min_key, self.counts = low, merged
+
+        excess = len(self.counts) - self.max_buckets
+        if excess > 0:
+            self.counts[excess] += self.counts[:excess].sum()
+            self.counts = self.counts[excess:]
+            self.min_key += excess
+
+    def quantiles(self, qs):
+        """Values at each quantile in qs (0-1), None when empty"""
+        if not self.count:
+            return [None] * len(qs)
+        cumulative = np.cumsum(self.counts)
+        ranks = np.asarray(qs, dtype=np.float64) * (self.count - 1)
+        keys = self.min_key + np.searchsorted(cumulative, ranks, side='right')
+        values = 2.0 * np.power(self.gamma, keys.astype(np.float64)) / (self.gamma + 1.0)
+        return np.clip(values, self.min, self.max).tolist()
+
+    def summary(self, quantiles=None):
+        """count, mean, min, max, the configured percentiles and spread"""
+        quantiles = quantiles or Config.SKETCH_QUANTILES
+        result = {
+            'count': self.count,
+            'mean': round(self.total / self.count, 2) if self.count else None,
+            'min': self.min,
+            'max': self.max
+        }
+        values = self.quantiles(list(quantiles) + [0.1, 0.5, 0.9])
+        for q, value in zip(quantiles, values):
+            result[f'p{round(q * 100)}'] = round(value, 2) if value is not None else None
+
+        low, median, high = values[-3:]
+        # Relative P10-P90 width: comparable across cheap and expensive cities
+        result['spread'] = round((high - low) / median, 4) if median else None
+        return result
+
+class SketchStore:
+    """
+    Per-city price sketches shared by every worker through the database.
+
+    Each worker buffers the prices it records and, at most every
+    Config.SKETCH_FLUSH_SECONDS, folds them into one sketch per city and
+    merges that into the city's PriceSketch row. Once init_app() has run,
+    a background thread flushes on that interval even when no estimates
+    arrive, and the buffer is flushed when the process exits. Merges use
+    the row's version as an optimistic lock, so concurrent flushes from
+    several workers never overwrite each other. Reads load one row per
+    city, so their cost does not depend on how many estimates were logged.
+
+    rebuild() stamps the rows it writes with a new generation. A buffer
+    started under an older generation holds prices the rebuild already
+    counted from the log, so it is dropped instead of merged.
+    """
+
+    def __init__(self, flush_seconds=None):
+        self.flush_seconds = flush_seconds if flush_seconds is not None else Config.SKETCH_FLUSH_SECONDS
+        self._pending = {}
+        self._generation = None  # generation the buffered prices belong to
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._app = None
+        self._flusher_pid = None
+
+    def init_app(self, app):
+        """Flush from a background thread and when the process exits"""
+        self._app = app
+        atexit.register(self._flush_at_exit)
+
+    def add(self, estimate):
+        """Buffer a saved PriceEstimate's price; flushes when due"""
+        generation = self._current_generation() if self._generation is None else None
+        with self._lock:
+            if self._generation is None:
+                self._generation = generation
+            self._pending.setdefault((estimate.state, estimate.city), []).append(
+                estimate.estimated_price_per_sqft)
+        self._start_flusher()
+        self.maybe_flush()
+
+    def reset(self):
+        """Drop buffered prices without writing them"""
+        with self._lock:
+            self._pending = {}
+            self._generation = None
+            self._last_flush = time.monotonic()
+
+    def _current_generation(self):
+        return db.session.execute(select(func.max(PriceSketch.__table__.c.generation))).scalar() or 0
+
+    def _start_flusher(self):
+        # Threads do not survive a fork, so each worker process starts its own
+        if self._app is None or self._app.testing or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._run_flusher, name='sketch-flush', daemon=True).start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                with self._app.app_context():
+                    self.maybe_flush()
+                    db.session.remove()
+            except Exception as e:
+                logging.error(f"Price sketch background flush failed: {e}")
+
+    def _flush_at_exit(self):
+        if not self._pending or self._app is None or self._app.testing:
+            return
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception as e:
+            logging.error(f"Price sketch flush at exit failed: {e}")
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Merge buffered prices into the database; returns cities updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            generation = self._generation
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        try:
+            current = self._current_generation()
+            if current != generation:
+                self._drop_stale(current, pending)
+                return 0
+            for (state, city), prices in pending.items():
+                delta = QuantileSketch()
+                delta.add(prices)
+                self._merge_into_row(state, city, delta, generation)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logging.error(f"Price sketch flush failed, keeping {len(pending)} cities buffered: {e}")
+            with self._lock:
+                if self._generation == generation:
+                    for key, prices in pending.items():
+                        self._pending.setdefault(key, []).extend(prices)
+            return 0
+        return len(pending)
+
+    def _drop_stale(self, generation, pending):
+        with self._lock:
+            self._generation = generation
+        logging.info(f"Price sketches were rebuilt; dropped {sum(map(len, pending.values()))} "
+                     f"buffered prices already counted from the log")
+
+    def _merge_into_row(self, state, city, delta, generation=0):
+        table = PriceSketch.__table__
+        for _ in range(Config.SKETCH_MERGE_RETRIES):
+            row = db.session.execute(
+                select(table).where(table.c.state == state, table.c.city == city)
+            ).first()
+            if row is None:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(table.insert().values(state=state, city=city, version=1,
+                                                                 generation=generation, **delta.columns()))
+                    return
+                except IntegrityError:
+                    # Another worker created the row first
+                    continue
+            if (row.generation or 0) > generation:
+                # Rebuilt since this flush started; the rebuild counted these prices
+                return
+
+            merged = QuantileSketch.from_row(row)
+            merged.merge(delta)
+            updated = db.session.execute(
+                update(table).where(table.c.id == row.id, table.c.version == row.version)
+                .values(version=row.version + 1, **merged.columns())
+            ).rowcount
+            if updated:
+                return
+        raise SQLAlchemyError(f"Price sketch for {city}, {state} kept changing during merge")
+
+    def sketches(self, state=None, city=None):
+        """
+        {(state, city): QuantileSketch} from the database, including this
+        worker's buffered prices
+        """
+        table = PriceSketch.__table__
+        query = select(table)
+        if state:
+            query = query.where(table.c.state == state)
+        if city:
+            query = query.where(table.c.city == city)
+        rows = db.session.execute(query).all()
+        sketches = {(row.state, row.city): QuantileSketch.from_row(row) for row in rows}
+        newest = max((row.generation or 0 for row in rows), default=0)
+
+        with self._lock:
+            stale = self._generation is not None and newest > self._generation
+            pending = {key: list(prices) for key, prices in self._pending.items()
+                       if not stale and (not state or key[0] == state) and (not city or key[1] == city)}
+        for key, prices in pending.items():
+            sketches.setdefault(key, QuantileSketch()).add(prices)
+        return sketches
+
+    def distribution(self, state=None, city=None, limit=None):
+        """
+        Summaries for the matching cities, most estimates first (at most
+        limit of them), and for all of them merged
+        """
+        sketches = self.sketches(state, city)
+        overall = QuantileSketch()
+        for sketch in sketches.values():
+            overall.merge(sketch)
+        ranked = sorted(sketches.items(), key=lambda item: (-item[1].count, item[0]))
+        return {
+            'overall': overall.summary(),
+            'cities': [dict(state=key[0], city=key[1], **sketch.summary())
+                       for key, sketch in ranked[:limit]]
+        }
+
+    def rebuild(self, batch_size=None):
+        """
+        Recompute every sketch from the whole estimates log (compact log,
+        hot table and archives), replacing the stored ones. For backfills
+        and after changing SKETCH_RELATIVE_ACCURACY.
+        """
+        from archive import iter_estimates
+
+        batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+        sketches = {}
+        batch = {}
+        rows = 0
+        for row in iter_estimates(batch_size):
+            batch.setdefault((row.state, row.city), []).append(row.estimated_price_per_sqft)
+            rows += 1
+            if rows % batch_size == 0:
+                for key, prices in batch.items():
+                    sketches.setdefault(key, QuantileSketch()).add(prices)
+                batch = {}
+        for key, prices in batch.items():
+            sketches.setdefault(key, QuantileSketch()).add(prices)
+
+        generation = self._current_generation() + 1
+        db.session.execute(delete(PriceSketch))
+        if sketches:
+            db.session.execute(PriceSketch.__table__.insert(), [
+                dict(state=state, city=city, version=1, generation=generation, **sketch.columns())
+                for (state, city), sketch in sketches.items()
+            ])
+        db.session.commit()
+        # Buffered prices are in the log the rebuild read
+        with self._lock:
+            self._pending = {}
+            self._generation = generation
+            self._last_flush = time.monotonic()
+        logging.info(f"Rebuilt price sketches for {len(sketches)} cities from {rows} estimates")
+        return {'estimates': rows, 'cities': len(sketches)}
+
+price_sketches = SketchStore()
@@ -0,0 +1,158 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import select, func
+from models import City, Locality, InfrastructureMultiplier, PriceSeries
+from metrics import metrics
+from app import db
+from config import Config
+
+CityRow = namedtuple('CityRow', 'id name state base_price_per_sqft growth_rate population tier')
+LocalityRow = namedtuple('LocalityRow', 'id name city_id price_per_sqft location_multiplier area_type pin_code '
+                                       'latitude longitude')
+MultiplierRow = namedtuple('MultiplierRow', 'factor_type factor_value multiplier')
+SeriesRow = namedtuple('SeriesRow', 'city_id locality_id years prices')
+
+class PricingSnapshot:
+    """
+    Immutable in-memory copy of cities, localities, multipliers and
+    price history series.
+
+    The version is a digest of the content, so every worker that loads
+    the same data agrees on it. Structures derived from the snapshot
+    (bundles, indexes) are built once per snapshot via derived().
+    """
+
+    def __init__(self, cities, localities, multipliers, fingerprint=None, series=()):
+        self.cities = tuple(cities)
+        self.localities = tuple(localities)
+        self.multipliers = tuple(multipliers)
+        self.series = tuple(series)
+        self.fingerprint = fingerprint
+        self.built_at = time.time()
+        self.cities_by_id = {city.id: city for city in self.cities}
+
+        digest = hashlib.blake2b(digest_size=8)
+        for rows in (self.cities, self.localities, self.multipliers, self.series):
+            for row in rows:
+                digest.update(repr(tuple(row)).encode('utf-8'))
+            digest.update(b'\x1e')
+        self.version = digest.hexdigest()
+
+        self._derived = {}
+        self._derived_lock = threading.RLock()  # builders may use other derived structures
+
+    def derived(self, name, builder):
+        """Build (once) and return a structure computed from this snapshot"""
+        value = self._derived.get(name)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(name)
+                if value is None:
+                    started = time.perf_counter()
+                    value = builder(self)
+                    self._derived[name] = value
+                    metrics.observe('snapshot_build_seconds', time.perf_counter() - started, structure=name)
+        return value
+
+    @classmethod
+    def load(cls, session, fingerprint=None):
+        cities = [CityRow(*row) for row in session.execute(
+            select(City.id, City.name, City.state, City.base_price_per_sqft, City.growth_rate,
+                   City.population, City.tier).order_by(City.state, City.name, City.id))]
+        localities = [LocalityRow(*row) for row in session.execute(
+            select(Locality.id, Locality.name, Locality.city_id, Locality.price_per_sqft,
+                   Locality.location_multiplier, Locality.area_type, Locality.pin_code,
+                   Locality.latitude, Locality.longitude)
+            .order_by(Locality.city_id, Locality.name, Locality.id))]
+        multipliers = [MultiplierRow(*row) for row in session.execute(
+            select(InfrastructureMultiplier.factor_type, InfrastructureMultiplier.factor_value,
+                   InfrastructureMultiplier.multiplier)
+            .order_by(InfrastructureMultiplier.factor_type, InfrastructureMultiplier.id))]
+        series = [SeriesRow(*row) for row in session.execute(
+            select(PriceSeries.city_id, PriceSeries.locality_id, PriceSeries.years, PriceSeries.prices)
+            .order_by(PriceSeries.city_id, PriceSeries.locality_id, PriceSeries.id))]
+        return cls(cities, localities, multipliers, fingerprint, series)
+
+def data_fingerprint(session):
+    """Row counts and last update times of the pricing tables, in one query"""
+    parts = []
+    for model in (City, Locality, InfrastructureMultiplier, PriceSeries):
+        parts.append(select(func.count(model.id)).scalar_subquery())
+        parts.append(select(func.max(model.updated_at)).scalar_subquery())
+    return tuple(session.execute(select(*parts)).one())
+
+class SnapshotStore:
+    """
+    Hands out the current PricingSnapshot. At most every
+    SNAPSHOT_CHECK_SECONDS it compares a cheap fingerprint of the pricing
+    tables and reloads when it changed, so edits made through another
+    worker are picked up without any cross-process signalling.
+    """
+
+    def __init__(self, check_seconds=None):
+        self.check_seconds = Config.SNAPSHOT_CHECK_SECONDS if check_seconds is None else check_seconds
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return self._snapshot
+
+            fingerprint = data_fingerprint(db.session)
+            if self._snapshot is None or self._snapshot.fingerprint != fingerprint:
+                self._snapshot = PricingSnapshot.load(db.session, fingerprint)
+                logging.info(f"Loaded pricing snapshot {self._snapshot.version} "
+                             f"({len(self._snapshot.cities)} cities, {len(self._snapshot.localities)} localities)")
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self):
+        """Reload on the next current() call, e.g. after this process changed prices"""
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+    @property
+    def loaded_at(self):
+        return self._snapshot.built_at if self._snapshot else 0
+
+pricing_snapshot = SnapshotStore()
+
+metrics.gauge('pricing_snapshot_loaded_timestamp', lambda: pricing_snapshot.loaded_at,
+              'Unix time the current pricing snapshot was loaded')
+
+def _build_hierarchy_bundle(snapshot):
+    states = {}
+    for city in snapshot.cities:
+        states.setdefault(city.state, {})[city.name] = []
+    for locality in snapshot.localities:
+        city = snapshot.cities_by_id.get(locality.city_id)
+        if city:
+            states[city.state][city.name].append(locality.name)
+
+    body = json.dumps({'version': snapshot.version, 'states': states},
+                      separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return {
+        'etag': snapshot.version,
+        'body': body,
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0)
+    }
+
+def hierarchy_bundle(snapshot=None):
+    """
+    State -> city -> locality names as JSON, plus a precompressed copy.
+    Built once per snapshot version.
+    """
+    snapshot = snapshot or pricing_snapshot.current()
+    return snapshot.derived('hierarchy_bundle', _build_hierarchy_bundle)
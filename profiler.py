@@ -0,0 +1,128 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from config import Config
+
+_sampling_lock = threading.Lock()
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+def _collapse(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+def sample_stacks(seconds, interval=None, exclude_thread_ids=()):
+    """
+    Sample every thread's Python stack for the given number of seconds.
+    Returns a Counter of collapsed stacks (root;...;leaf) suitable for
+    flamegraph tools. Returns None if another sampler is already running.
+    """
+    interval = interval or Config.PROFILE_SAMPLE_INTERVAL
+    if not _sampling_lock.acquire(blocking=False):
+        return None
+
+    try:
+        samples = Counter()
+        own_id = threading.get_ident()
+        excluded = set(exclude_thread_ids) | {own_id}
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in excluded:
+                    samples[_collapse(frame)] += 1
+            time.sleep(interval)
+
+        return samples
+    finally:
+        _sampling_lock.release()
+
+class BackgroundProfile:
+    """
+    Runs sample_stacks on its own thread so the request that starts a
+    profile returns at once. The worker's request threads, including a
+    sync worker's only one, keep serving and are sampled meanwhile. The
+    last finished result is kept until the next profile starts; it lives
+    in this worker process only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self.samples = None
+        self.started_at = None
+        self.seconds = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds, interval=None):
+        """Start sampling; returns False if a profile is already running"""
+        with self._lock:
+            if self.running:
+                return False
+            self.samples = None
+            self.started_at = time.time()
+            self.seconds = seconds
+            self._thread = threading.Thread(target=self._run, args=(seconds, interval),
+                                            name='stack-sampler', daemon=True)
+            self._thread.start()
+            return True
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self, seconds, interval):
+        self.samples = sample_stacks(seconds, interval=interval) or Counter()
+
+background_profile = BackgroundProfile()
+
+def format_collapsed(samples):
+    """One 'stack count' line per distinct stack, most frequent first"""
+    return ''.join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+def profile_request(f):
+    """
+    Run the wrapped view under cProfile when an admin passes __profile=1,
+    returning the top functions by cumulative time instead of the usual
+    response. Other callers are unaffected.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from flask import request, session, Response
+
+        if request.args.get('__profile') != '1' or not session.get('admin_logged_in'):
+            return f(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            result = f(*args, **kwargs)
+        finally:
+            profile.disable()
+        elapsed = time.perf_counter() - started
+
+        status = result[1] if isinstance(result, tuple) else getattr(result, 'status_code', 200)
+        output = io.StringIO()
+        output.write(f"# {request.method} {request.path} -> {status} in {elapsed * 1000:.2f}ms\n")
+        stats = pstats.Stats(profile, stream=output)
+        stats.sort_stats('cumulative').print_stats(Config.PROFILE_TOP_FUNCTIONS)
+        return Response(output.getvalue(), mimetype='text/plain')
+
+    return decorated_function
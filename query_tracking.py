@@ -0,0 +1,111 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import Config
+
+_current_tracker = ContextVar('query_tracker', default=None)
+
+class QueryTracker:
+    """Counts and times the SQL statements executed while it is active"""
+
+    def __init__(self, parent=None):
+        self.started = time.perf_counter()
+        self.parent = parent
+        self.queries = []  # (statement, seconds)
+
+    def record(self, statement, seconds):
+        self.queries.append((statement, seconds))
+        if self.parent is not None:
+            self.parent.record(statement, seconds)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_seconds(self):
+        return sum(seconds for _, seconds in self.queries)
+
+    def slowest(self, limit=5):
+        return sorted(self.queries, key=lambda query: query[1], reverse=True)[:limit]
+
+    def describe(self):
+        return '\n'.join(
+            f"  {seconds * 1000:.2f}ms  {' '.join(statement.split())}"
+            for statement, seconds in self.queries
+        )
+
+@contextmanager
+def track_queries():
+    """Track every statement executed in the block"""
+    tracker = QueryTracker()
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+@contextmanager
+def max_queries(limit):
+    """
+    Test helper: fail if the block runs more than limit statements.
+
+        with max_queries(8):
+            client.post('/api/estimate', ...)
+    """
+    with track_queries() as tracker:
+        yield tracker
+    if tracker.count > limit:
+        raise AssertionError(
+            f"Expected at most {limit} queries, {tracker.count} were executed:\n{tracker.describe()}"
+        )
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_tracker.get() is not None:
+        conn.info['query_tracking_start'] = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = _current_tracker.get()
+    started = conn.info.pop('query_tracking_start', None)
+    if tracker is not None and started is not None:
+        tracker.record(statement, time.perf_counter() - started)
+
+def init_app(app):
+    """Track queries per request, log slow ones and add Server-Timing in debug"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_tracking():
+        # Nest inside an outer tracker, e.g. a test's max_queries() block
+        g.query_tracker = QueryTracker(parent=_current_tracker.get())
+        g.query_tracker_token = _current_tracker.set(g.query_tracker)
+
+    @app.after_request
+    def _report_queries(response):
+        tracker = g.get('query_tracker')
+        if tracker is None:
+            return response
+
+        threshold = Config.SLOW_QUERY_MS / 1000.0
+        for statement, seconds in tracker.queries:
+            if seconds >= threshold:
+                logging.warning(f"Slow query ({seconds * 1000:.1f}ms) on {request.path}: {' '.join(statement.split())}")
+
+        if app.debug or Config.SERVER_TIMING:
+            elapsed = time.perf_counter() - tracker.started
+            response.headers['Server-Timing'] = (
+                f'db;dur={tracker.total_seconds * 1000:.2f};desc="{tracker.count} queries", '
+                f'app;dur={elapsed * 1000:.2f}'
+            )
+        return response
+
+    @app.teardown_request
+    def _stop_tracking(exception=None):
+        token = g.pop('query_tracker_token', None)
+        if token is not None:
+            _current_tracker.reset(token)
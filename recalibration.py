@@ -0,0 +1,135 @@
+import logging
+from datetime import datetime
+import numpy as np
+from sqlalchemy import select, update, or_
+from models import City, Locality, PriceSeries, JobWatermark
+from price_estimator import PriceEstimator
+from price_history import price_trends, unpack
+from pricing_snapshot import pricing_snapshot
+from app import db
+from config import Config
+
+WATERMARK_NAME = 'locality_recalibration'
+
+def trimmed_means(values, owners, groups, trim):
+    """
+    Mean of each group's values after dropping the lowest and highest
+    trim fraction. owners gives each value's group (0..groups-1). At least
+    one value per non-empty group is kept, so trim=0.5 gives the median.
+    Groups without values get NaN.
+    """
+    order = np.lexsort((values, owners))
+    values, owners = values[order], owners[order]
+    counts = np.bincount(owners, minlength=groups)
+    starts = np.cumsum(counts) - counts
+    cut = np.minimum(np.floor(counts * trim).astype(np.int64), (counts - 1) // 2)
+
+    rank = np.arange(len(values)) - starts[owners]
+    kept = (rank >= cut[owners]) & (rank < (counts - cut)[owners])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (np.bincount(owners, values * kept, minlength=groups)
+                / np.bincount(owners, kept, minlength=groups))
+
+def _load_watermark():
+    row = JobWatermark.query.filter_by(name=WATERMARK_NAME).first()
+    return row.watermark if row else None
+
+def _store_watermark(watermark):
+    row = JobWatermark.query.filter_by(name=WATERMARK_NAME).first()
+    if row is None:
+        db.session.add(JobWatermark(name=WATERMARK_NAME, watermark=watermark))
+    else:
+        row.watermark = watermark
+
+def recalibrate_localities(full=False, dry_run=False):
+    """
+    Recalibrate locality base prices from their price history.
+
+    Only series updated since the last run's watermark, or left pending
+    by an earlier run, are read (all of them with full=True). For each locality, observations from its last
+    RECALIBRATION_WINDOW_YEARS are brought back to base-year terms with
+    the same growth the estimator compounds (fitted trend, else inflation
+    plus city growth). The new base price is their trimmed mean
+    (RECALIBRATION_TRIM; 0.5 gives the median), moved at most
+    RECALIBRATION_MAX_CHANGE from the current price per run. Localities
+    that were clamped, or had fewer than RECALIBRATION_MIN_OBSERVATIONS,
+    stay pending so later runs keep moving them towards their data. All
+    localities are computed together on concatenated arrays and written
+    with one executemany UPDATE. The pricing snapshot is then invalidated
+    so caches rebuild from the new prices.
+    Returns run stats; with dry_run nothing is written.
+    """
+    watermark = None if full else _load_watermark()
+    query = select(PriceSeries.id, PriceSeries.locality_id, PriceSeries.years, PriceSeries.prices,
+                   PriceSeries.updated_at, PriceSeries.recalibration_pending,
+                   Locality.price_per_sqft, City.growth_rate, City.id.label('city_id')) \
+        .join(Locality, PriceSeries.locality_id == Locality.id) \
+        .join(City, Locality.city_id == City.id)
+    if watermark is not None:
+        query = query.where(or_(PriceSeries.updated_at > watermark,
+                                PriceSeries.recalibration_pending.is_(True)))
+    rows = db.session.execute(query).all()
+
+    stats = {'series': len(rows), 'updated': 0, 'clamped': 0, 'skipped': 0, 'changes': []}
+    if not rows:
+        return stats
+
+    # Fitted rates from the latest series, not a cached snapshot
+    pricing_snapshot.invalidate()
+    trends = price_trends()
+    fitted = np.array([getattr(trends.for_location(row.city_id, row.locality_id), 'rate', np.nan)
+                       for row in rows])
+    current = np.array([row.price_per_sqft for row in rows], dtype=np.float64)
+    growth = np.array([row.growth_rate or 0.0 for row in rows], dtype=np.float64)
+
+    years = [unpack(row.years) for row in rows]
+    prices = [unpack(row.prices) for row in rows]
+    counts = np.array([len(values) for values in years], dtype=np.int64)
+    owners = np.repeat(np.arange(len(rows)), counts)
+    t = np.concatenate(years)
+    p = np.concatenate(prices)
+
+    # Each locality's recent window, ending at its latest observation
+    latest = np.full(len(rows), -np.inf)
+    np.maximum.at(latest, owners, t)
+    recent = t >= (latest - Config.RECALIBRATION_WINDOW_YEARS)[owners]
+    owners, t, p = owners[recent], t[recent], p[recent]
+
+    base_equivalent = p / PriceEstimator()._calculate_year_trend_factor(t, growth[owners], fitted[owners])
+    calibrated = trimmed_means(base_equivalent, owners, len(rows), Config.RECALIBRATION_TRIM)
+    observations = np.bincount(owners, minlength=len(rows))
+
+    change = Config.RECALIBRATION_MAX_CHANGE
+    bounded = np.clip(calibrated, current * (1 - change), current * (1 + change))
+    new_prices = np.round(bounded, 2)
+    eligible = (observations >= Config.RECALIBRATION_MIN_OBSERVATIONS) & np.isfinite(new_prices)
+    changed = eligible & (new_prices != np.round(current, 2))
+
+    now = datetime.utcnow()
+    updates = [{'id': rows[i].locality_id, 'price_per_sqft': float(new_prices[i]), 'updated_at': now}
+               for i in np.flatnonzero(changed)]
+    clamped = changed & (bounded != calibrated)
+    pending = clamped | ~eligible
+    stats.update({
+        'updated': len(updates),
+        'clamped': int(clamped.sum()),
+        'skipped': int((~eligible).sum()),
+        'changes': [(rows[i].locality_id, float(current[i]), float(new_prices[i]))
+                    for i in np.flatnonzero(changed)]
+    })
+    if dry_run:
+        return stats
+
+    if updates:
+        db.session.execute(update(Locality), updates)
+    # updated_at is kept so the pending flag alone does not count as new data
+    flags = [{'id': rows[i].id, 'recalibration_pending': bool(pending[i]), 'updated_at': rows[i].updated_at}
+             for i in range(len(rows)) if bool(pending[i]) != bool(rows[i].recalibration_pending)]
+    if flags:
+        db.session.execute(update(PriceSeries), flags)
+    _store_watermark(max(row.updated_at for row in rows))
+    db.session.commit()
+    pricing_snapshot.invalidate()
+    logging.info(f"Recalibrated {stats['updated']} of {stats['series']} localities "
+                 f"({stats['clamped']} clamped, {stats['skipped']} with too few observations)")
+    return stats
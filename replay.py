@@ -0,0 +1,176 @@
+import csv
+import logging
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from price_estimator import PriceEstimator
+
+# Fields compared between the stored estimate and the replayed one
+COMPARED_FIELDS = ['estimated_price_per_sqft', 'total_estimated_price']
+
+_worker_app = None
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ['true', '1', 'yes', 'on']
+    return bool(value)
+
+def _optional_float(value):
+    return None if value in (None, '') else float(value)
+
+def row_to_case(row):
+    """Plain dict of a logged estimate's inputs and stored outputs"""
+    get = row.get if isinstance(row, dict) else lambda name: getattr(row, name, None)
+    return {
+        'id': get('id'),
+        'state': get('state'),
+        'city': get('city'),
+        'locality': get('locality') or None,
+        'plot_size_sqft': float(get('plot_size_sqft') or 1000),
+        'road_width_ft': float(get('road_width_ft') or 20),
+        'nearby_schools': _flag(get('nearby_schools')),
+        'nearby_metro': _flag(get('nearby_metro')),
+        'commercial_area': _flag(get('commercial_area')),
+        'year': int(get('year')) if get('year') not in (None, '') else None,
+        'pin_code': get('pin_code') or None,
+        'latitude': _optional_float(get('latitude')),
+        'longitude': _optional_float(get('longitude')),
+        'estimated_price_per_sqft': _optional_float(get('estimated_price_per_sqft')),
+        'total_estimated_price': _optional_float(get('total_estimated_price'))
+    }
+
+def iter_cases_from_db(limit=None):
+    """Logged estimates from the hot table, compact log and archives"""
+    from archive import iter_estimates
+    return islice((row_to_case(row) for row in iter_estimates()), limit)
+
+def iter_cases_from_csv(path, limit=None):
+    """Logged estimates from an estimates CSV export"""
+    with open(path, newline='', encoding='utf-8') as file:
+        yield from islice((row_to_case(row) for row in csv.DictReader(file)), limit)
+
+def _is_mismatch(stored, replayed, tolerance):
+    if stored is None:
+        return False
+    return not math.isclose(stored, replayed, rel_tol=tolerance, abs_tol=0.01)
+
+def replay_cases(cases, tolerance, estimator=None, max_examples=20):
+    """
+    Recompute one batch of cases with the current estimator.
+    Returns counts and up to max_examples mismatching rows.
+    """
+    estimator = estimator or PriceEstimator()
+    requests = []
+    for case in cases:
+        request = {
+            'state': case['state'],
+            'city_name': case['city'],
+            'locality_name': case['locality'],
+            'plot_size_sqft': case['plot_size_sqft'],
+            'road_width_ft': case['road_width_ft'],
+            'nearby_schools': case['nearby_schools'],
+            'nearby_metro': case['nearby_metro'],
+            'commercial_area': case['commercial_area'],
+            'year': case['year'],
+            'latitude': case['latitude'],
+            'longitude': case['longitude']
+        }
+        if case['pin_code']:
+            # Resolved through the pin again, so a pin shared by several
+            # localities is averaged as it was when logged
+            request['pin_code'] = case['pin_code']
+        requests.append(request)
+    results = estimator.estimate_batch(requests)
+
+    outcome = {'rows': len(cases), 'mismatches': 0, 'by_field': dict.fromkeys(COMPARED_FIELDS, 0), 'examples': []}
+    for case, result in zip(cases, results):
+        # A logged pin that no longer resolves replays as an error
+        error = result if 'error' in result else None
+        differing = [] if error else [name for name in COMPARED_FIELDS
+                                      if _is_mismatch(case[name], result[name], tolerance)]
+        if not differing and not error:
+            continue
+        outcome['mismatches'] += 1
+        for name in differing:
+            outcome['by_field'][name] += 1
+        if len(outcome['examples']) < max_examples:
+            example = {
+                'id': case['id'],
+                'state': case['state'],
+                'city': case['city'],
+                'locality': case['locality'],
+                'year': case['year'],
+                'fields': {name: {'stored': case[name], 'replayed': result[name]} for name in differing}
+            }
+            if error:
+                example['error'] = error
+            outcome['examples'].append(example)
+    return outcome
+
+def _init_worker():
+    global _worker_app
+    from app import app, db
+
+    # Connections inherited from the parent process must not be reused
+    with app.app_context():
+        db.engine.dispose(close=False)
+    _worker_app = app
+
+def _replay_in_worker(cases, tolerance, max_examples):
+    with _worker_app.app_context():
+        return replay_cases(cases, tolerance, max_examples=max_examples)
+
+def _chunks(cases, batch_size):
+    iterator = iter(cases)
+    while True:
+        chunk = list(islice(iterator, batch_size))
+        if not chunk:
+            return
+        yield chunk
+
+def replay_estimates(cases, workers=1, batch_size=1000, tolerance=1e-6, max_examples=20):
+    """
+    Recompute logged estimates and compare them with what was stored.
+
+    Cases come from iter_cases_from_db or iter_cases_from_csv and are
+    replayed in batches through PriceEstimator.estimate_batch, in worker
+    processes when workers > 1. A value mismatches when it differs from
+    the stored one by more than the relative tolerance (and more than a
+    paisa). The log does not keep area_type, so rows estimated for a
+    non-residential area type will show up as mismatches.
+    """
+    started = time.perf_counter()
+    report = {'rows': 0, 'mismatches': 0, 'by_field': dict.fromkeys(COMPARED_FIELDS, 0), 'examples': []}
+
+    def merge(outcome):
+        report['rows'] += outcome['rows']
+        report['mismatches'] += outcome['mismatches']
+        for name, count in outcome['by_field'].items():
+            report['by_field'][name] += count
+        report['examples'].extend(outcome['examples'][:max_examples - len(report['examples'])])
+
+    if workers <= 1:
+        estimator = PriceEstimator()
+        for chunk in _chunks(cases, batch_size):
+            merge(replay_cases(chunk, tolerance, estimator=estimator, max_examples=max_examples))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            pending = set()
+            for chunk in _chunks(cases, batch_size):
+                # Keep a bounded number of batches in flight
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge(future.result())
+                pending.add(executor.submit(_replay_in_worker, chunk, tolerance, max_examples))
+            for future in pending:
+                merge(future.result())
+
+    elapsed = time.perf_counter() - started
+    report['seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(report['rows'] / elapsed, 1) if elapsed else None
+    report['mismatch_rate'] = round(report['mismatches'] / report['rows'], 6) if report['rows'] else 0.0
+    logging.info(f"Replayed {report['rows']} estimates: {report['mismatches']} mismatches, "
+                 f"{report['rows_per_second']} rows/s")
+    return report
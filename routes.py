@@ -1,16 +1,52 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, session, jsonify
-from models import City, Locality, PriceEstimate
+from flask import Blueprint, render_template, request, flash, redirect, url_for, session, jsonify, Response
+from models import Locality
+from pricing_snapshot import pricing_snapshot, hierarchy_bundle
+from autocomplete import autocomplete_index
 from price_estimator import PriceEstimator
+from audit import record_estimate
+from profiler import profile_request
+from app import limiter
 import logging
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
 def index():
-    cities = City.query.order_by(City.name).all()
-    return render_template('index.html', cities=cities)
+    snapshot = pricing_snapshot.current()
+    states = sorted({city.state for city in snapshot.cities})
+    hierarchy_url = url_for('main.hierarchy_data', version=snapshot.version)
+    return render_template('index.html', states=states, hierarchy_url=hierarchy_url)
+
+@main_bp.route('/data/hierarchy.<version>.json')
+def hierarchy_data(version):
+    """
+    State -> city -> locality bundle for the estimate form. The URL carries
+    the snapshot version, so it can be cached for a year; stale versions
+    redirect to the current one.
+    """
+    snapshot = pricing_snapshot.current()
+    if version != snapshot.version:
+        return redirect(url_for('main.hierarchy_data', version=snapshot.version))
+    
+    bundle = hierarchy_bundle(snapshot)
+    # The gzip body is a different representation and gets its own ETag
+    gzipped = 'gzip' in request.accept_encodings
+    etag = f"{bundle['etag']}-gzip" if gzipped else bundle['etag']
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    elif gzipped:
+        response = Response(bundle['gzip'], mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(bundle['body'], mimetype='application/json')
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
 
 @main_bp.route('/estimate', methods=['GET', 'POST'])
+@profile_request
 def estimate():
     if request.method == 'POST':
         try:
@@ -50,27 +86,23 @@ def estimate():
                 area_type=area_type
             )
             
-            # Save estimate to database
-            estimate_record = PriceEstimate(
-                state=state,
-                city=city,
-                locality=locality,
-                plot_size_sqft=plot_size,
-                road_width_ft=road_width,
-                nearby_schools=nearby_schools,
-                nearby_metro=nearby_metro,
-                commercial_area=commercial_area,
-                year=year,
-                estimated_price_per_sqft=result['estimated_price_per_sqft'],
-                total_estimated_price=result['total_estimated_price'],
-                confidence_score=result['confidence_score'],
+            # Save estimate to the audit log
+            estimate_record = record_estimate(
+                {
+                    'state': state,
+                    'city': city,
+                    'locality': locality,
+                    'plot_size_sqft': plot_size,
+                    'road_width_ft': road_width,
+                    'nearby_schools': nearby_schools,
+                    'nearby_metro': nearby_metro,
+                    'commercial_area': commercial_area,
+                    'year': year
+                },
+                result,
                 ip_address=request.remote_addr
             )
             
-            from app import db
-            db.session.add(estimate_record)
-            db.session.commit()
-            
             # Format prices for display
             result['formatted_price_per_sqft'] = format_indian_currency(result['estimated_price_per_sqft'])
             result['formatted_total_price'] = format_indian_currency(result['total_estimated_price'])
@@ -127,6 +159,29 @@ def get_localities(city_id):
         'name': locality.name
     } for locality in localities])
 
+@main_bp.route('/api/autocomplete')
+@limiter.limit("600 per hour")
+def autocomplete():
+    """Top city, locality and pin code matches for a prefix (?q=, optional limit)"""
+    from config import Config
+    
+    prefix = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', Config.AUTOCOMPLETE_MAX_RESULTS))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= Config.AUTOCOMPLETE_MAX_RESULTS:
+        return jsonify({'error': f'limit must be 1-{Config.AUTOCOMPLETE_MAX_RESULTS}'}), 400
+    index = autocomplete_index()
+    
+    response = jsonify({
+        'query': prefix,
+        'version': index.version,
+        'results': index.search(prefix, limit=limit)
+    })
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    return response
+
 @main_bp.route('/recent-searches')
 def recent_searches():
     """Get recent searches from session"""
@@ -140,3 +195,20 @@ def format_indian_currency(amount):
         return f"₹{amount/100000:.2f} L"
     else:
         return f"₹{amount:,.2f}"
+
+@main_bp.app_template_filter('format_currency')
+def format_indian_number(amount):
+    """Group digits the Indian way, e.g. 1234567 -> 12,34,567"""
+    digits = str(int(amount))
+    sign = '-' if digits.startswith('-') else ''
+    digits = digits.lstrip('-')
+    if len(digits) <= 3:
+        return sign + digits
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return sign + ','.join(groups + [tail])
@@ -0,0 +1,28 @@
+import logging
+from sqlalchemy import inspect, text
+
+def add_missing_columns(engine, metadata):
+    """
+    Add nullable columns that exist on the models but not yet in the
+    database. create_all() only creates missing tables, so this keeps
+    existing databases usable after a model gains an optional column.
+    Returns the (table, column) pairs that were added.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append((table.name, column.name))
+                logging.info(f"Added column {table.name}.{column.name}")
+
+    return added
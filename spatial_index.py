@@ -0,0 +1,190 @@
+import math
+import numpy as np
+from pricing_snapshot import pricing_snapshot
+from config import Config
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON = 111.320
+
+# Keeps a locality sitting right on the point from taking all the weight
+DISTANCE_SMOOTHING_KM = 0.25
+
+# Cell key = cell_x * _KEY_STRIDE + cell_y; cell_y stays well inside it
+_KEY_STRIDE = np.int64(1 << 32)
+_OFFSETS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+
+def _unit_vectors(latitudes, longitudes):
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+    cos_lat = np.cos(latitudes)
+    return np.stack([cos_lat * np.cos(longitudes), cos_lat * np.sin(longitudes), np.sin(latitudes)], axis=-1)
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; arguments in degrees, arrays broadcast"""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class SpatialIndex:
+    """
+    k-nearest-locality lookup over localities that have coordinates.
+
+    Localities are bucketed into a uniform lat/lon grid whose cells are at
+    least radius_km across everywhere in the data's latitude band, so all
+    neighbours within radius_km of a point lie in its 3x3 block of cells.
+    Queries take arrays of points. Points are grouped by cell, the nine
+    surrounding cells are found by binary search over the sorted cell
+    keys, and each group is ranked against its candidates with one matrix
+    product of unit vectors (chord length, no trigonometry). Only the k
+    neighbours kept get a great-circle distance.
+    """
+
+    def __init__(self, snapshot, k=None, radius_km=None):
+        self.k = k or Config.SPATIAL_NEIGHBORS
+        self.radius_km = radius_km or Config.SPATIAL_MAX_DISTANCE_KM
+        located = [locality for locality in snapshot.localities
+                   if locality.latitude is not None and locality.longitude is not None]
+        self.size = len(located)
+
+        latitudes = np.array([locality.latitude for locality in located], dtype=np.float64)
+        longitudes = np.array([locality.longitude for locality in located], dtype=np.float64)
+        max_abs_lat = min(float(np.abs(latitudes).max()) + 1.0, 85.0) if located else 0.0
+        self.lat_step = self.radius_km / KM_PER_DEGREE_LAT
+        self.lon_step = self.radius_km / (KM_PER_DEGREE_LON * math.cos(math.radians(max_abs_lat)))
+        # Squared chord length between unit vectors that are radius_km apart
+        self.max_chord2 = (2 * math.sin(self.radius_km / (2 * EARTH_RADIUS_KM))) ** 2
+
+        keys = self._cell_keys(*self._cells(latitudes, longitudes))
+        order = np.argsort(keys, kind='stable')
+        self.localities = [located[i] for i in order]
+        self.latitudes = latitudes[order]
+        self.longitudes = longitudes[order]
+        self.vectors = _unit_vectors(self.latitudes, self.longitudes)
+        self.prices = np.array([locality.price_per_sqft for locality in self.localities], dtype=np.float64)
+
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(
+            keys[order], return_index=True, return_counts=True)
+        self.max_per_cell = int(self.cell_counts.max()) if self.size else 0
+
+    @classmethod
+    def build(cls, snapshot):
+        return cls(snapshot)
+
+    def _cells(self, latitudes, longitudes):
+        return (np.floor(longitudes / self.lon_step).astype(np.int64),
+                np.floor(latitudes / self.lat_step).astype(np.int64))
+
+    @staticmethod
+    def _cell_keys(cell_x, cell_y):
+        return cell_x * _KEY_STRIDE + cell_y
+
+    def query(self, latitudes, longitudes, k=None):
+        """
+        Nearest localities within radius_km for each point. Returns
+        (indices, distances), both shaped (points, k) and sorted by
+        distance; missing neighbours have index -1 and distance inf.
+        """
+        k = k or self.k
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        indices = np.full((len(latitudes), k), -1, dtype=np.int64)
+        distances = np.full((len(latitudes), k), np.inf)
+        if not self.size or not len(latitudes):
+            return indices, distances
+
+        # Points sharing a cell share their candidates: group them
+        cell_x, cell_y = self._cells(latitudes, longitudes)
+        point_keys = self._cell_keys(cell_x, cell_y)
+        order = np.argsort(point_keys, kind='stable')
+        group_keys, group_starts = np.unique(point_keys[order], return_index=True)
+        group_ends = np.append(group_starts[1:], len(order))
+
+        # Start and size of the nine cells around each group
+        group_x, group_y = group_keys // _KEY_STRIDE, group_keys % _KEY_STRIDE
+        keys = self._cell_keys(group_x[:, None] + _OFFSETS[:, 0], group_y[:, None] + _OFFSETS[:, 1])
+        positions = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        found = self.cell_keys[positions] == keys
+        starts = np.where(found, self.cell_starts[positions], 0)
+        counts = np.where(found, self.cell_counts[positions], 0)
+
+        points = _unit_vectors(latitudes, longitudes)
+        for group in np.flatnonzero(counts.sum(axis=1)):
+            members = order[group_starts[group]:group_ends[group]]
+            candidates = np.concatenate([np.arange(start, start + count)
+                                         for start, count in zip(starts[group], counts[group]) if count])
+            indices[members], distances[members] = self._nearest(
+                points[members], latitudes[members], longitudes[members], candidates, k)
+        return indices, distances
+
+    def _nearest(self, points, latitudes, longitudes, candidates, k):
+        # Squared chord between unit vectors orders points like distance does
+        chord2 = np.maximum(2.0 - 2.0 * (points @ self.vectors[candidates].T), 0.0)
+        chord2[chord2 > self.max_chord2] = np.inf
+
+        take = min(k, len(candidates))
+        if take < len(candidates):
+            nearest = np.argpartition(chord2, take - 1, axis=1)[:, :take]
+        else:
+            nearest = np.broadcast_to(np.arange(take), (len(points), take))
+        nearest_chord2 = np.take_along_axis(chord2, nearest, axis=1)
+        ranked = np.argsort(nearest_chord2, axis=1)
+        nearest = candidates[np.take_along_axis(nearest, ranked, axis=1)]
+        missing = np.isinf(np.take_along_axis(nearest_chord2, ranked, axis=1))
+
+        indices = np.full((len(points), k), -1, dtype=np.int64)
+        distances = np.full((len(points), k), np.inf)
+        indices[:, :take] = np.where(missing, -1, nearest)
+        # Exact great-circle distances for the kept neighbours only
+        exact = haversine_km(latitudes[:, None], longitudes[:, None],
+                             self.latitudes[nearest], self.longitudes[nearest])
+        distances[:, :take] = np.where(missing, np.inf, exact)
+        return indices, distances
+
+    def blend(self, latitudes, longitudes, k=None):
+        """
+        Inverse-distance-weighted price of the nearest localities for each
+        point. Returns (prices, nearest_km, neighbour_counts); prices are
+        NaN where no locality lies within radius_km.
+        """
+        return self.weighted_prices(*self.query(latitudes, longitudes, k))
+
+    def weighted_prices(self, indices, distances):
+        """Blend query() results: (prices, nearest_km, neighbour_counts)"""
+        valid = indices >= 0
+        weights = np.where(valid, 1.0 / (distances + DISTANCE_SMOOTHING_KM), 0.0)
+        prices = self.prices[np.where(valid, indices, 0)] if self.size else np.zeros(indices.shape)
+        total = weights.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            blended = (weights * prices).sum(axis=1) / total
+        return blended, distances[:, 0], valid.sum(axis=1)
+
+    def resolve(self, latitudes, longitudes, k=None):
+        """
+        Per point, None when nothing is within radius_km, otherwise a dict
+        with the blended price, nearest distance and the neighbours used.
+        """
+        indices, distances = self.query(latitudes, longitudes, k)
+        prices, nearest_km, counts = self.weighted_prices(indices, distances)
+        resolved = []
+        for row in range(len(indices)):
+            if not counts[row]:
+                resolved.append(None)
+                continue
+            resolved.append({
+                'price_per_sqft': float(prices[row]),
+                'nearest_km': float(nearest_km[row]),
+                'neighbors': [(self.localities[index].name, round(float(distance), 2))
+                              for index, distance in zip(indices[row], distances[row]) if index >= 0]
+            })
+        return resolved
+
+    def nearest(self, latitude, longitude, k=None):
+        """[(LocalityRow, distance_km)] for one point, nearest first"""
+        indices, distances = self.query([latitude], [longitude], k)
+        return [(self.localities[index], float(distance))
+                for index, distance in zip(indices[0], distances[0]) if index >= 0]
+
+def spatial_index(snapshot=None):
+    snapshot = snapshot or pricing_snapshot.current()
+    return snapshot.derived('spatial_index', SpatialIndex.build)
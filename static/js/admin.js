@@ -353,29 +353,74 @@ function updateSystemStatus(status) {
 
 // Real-time updates for dashboard
 function initializeRealTimeUpdates() {
-    if (window.location.pathname.includes('dashboard')) {
-        // Check for new estimates every minute
-        setInterval(() => {
-            fetch('/admin/recent-estimates')
-                .then(response => response.json())
-                .then(data => {
-                    updateRecentEstimates(data);
-                })
-                .catch(error => {
-                    console.error('Error fetching recent estimates:', error);
-                });
-        }, 60000);
+    if (!window.location.pathname.includes('dashboard') || !window.EventSource) {
+        return;
     }
+    
+    // New estimates are pushed by the server, no polling needed
+    const source = new EventSource('/admin/live-estimates');
+    
+    source.addEventListener('estimate', event => {
+        updateRecentEstimates(JSON.parse(event.data));
+    });
+    
+    source.addEventListener('overflow', event => {
+        // We fell too far behind the live feed, reload for a consistent view
+        location.reload();
+    });
+    
+    source.onerror = function() {
+        console.error('Live estimate feed disconnected, retrying');
+    };
+    
+    window.addEventListener('beforeunload', () => source.close());
 }
 
-function updateRecentEstimates(estimates) {
+function updateRecentEstimates(estimate) {
     const tbody = document.querySelector('#recent-estimates tbody');
-    if (tbody && estimates.length > 0) {
-        // Update only if there are new estimates
-        const currentCount = tbody.children.length;
-        if (estimates.length > currentCount) {
-            location.reload(); // Simple refresh for now
-        }
+    if (!tbody) {
+        return;
+    }
+    
+    const confidence = Math.round(estimate.confidence_score * 100);
+    const confidenceClass = estimate.confidence_score >= 0.8 ? 'bg-success' :
+        (estimate.confidence_score >= 0.6 ? 'bg-warning' : 'bg-danger');
+    const createdAt = estimate.created_at ? estimate.created_at.slice(0, 16).replace('T', ' ') : '';
+    
+    const row = document.createElement('tr');
+    row.innerHTML = `
+        <td><small class="text-muted">${createdAt}</small></td>
+        <td>
+            <strong></strong>
+            ${estimate.locality ? '<br><small class="text-muted live-locality"></small>' : ''}
+        </td>
+        <td>${Math.floor(estimate.plot_size_sqft)} sq ft</td>
+        <td>
+            <span class="text-success fw-bold">₹${new Intl.NumberFormat('en-IN').format(Math.round(estimate.total_estimated_price))}</span>
+            <br>
+            <small class="text-muted">₹${Math.round(estimate.estimated_price_per_sqft)} per sq ft</small>
+        </td>
+        <td>
+            <div class="progress" style="height: 20px; width: 80px;">
+                <div class="progress-bar ${confidenceClass}" style="width: ${confidence}%">${confidence}%</div>
+            </div>
+        </td>
+        <td><span class="badge ${estimate.source === 'API' ? 'bg-info' : 'bg-secondary'}">${estimate.source}</span></td>
+    `;
+    // Location names are user input, set them as text
+    row.querySelector('strong').textContent = `${estimate.city}, ${estimate.state}`;
+    if (estimate.locality) {
+        row.querySelector('.live-locality').textContent = estimate.locality;
+    }
+    
+    tbody.insertBefore(row, tbody.firstChild);
+    while (tbody.children.length > 10) {
+        tbody.removeChild(tbody.lastChild);
+    }
+    
+    const counter = document.querySelector('[data-stat="total_estimates"]');
+    if (counter) {
+        counter.textContent = parseInt(counter.textContent) + 1;
     }
 }
 
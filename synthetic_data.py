@@ -0,0 +1,291 @@
+import csv
+import logging
+import os
+import time
+from datetime import datetime
+import numpy as np
+from sqlalchemy import insert, select
+
+STATES = [
+    ('Maharashtra', 40), ('Uttar Pradesh', 20), ('Karnataka', 56), ('Tamil Nadu', 60),
+    ('Gujarat', 38), ('Rajasthan', 30), ('West Bengal', 70), ('Madhya Pradesh', 45),
+    ('Telangana', 50), ('Andhra Pradesh', 52), ('Kerala', 67), ('Punjab', 14),
+    ('Haryana', 12), ('Bihar', 80), ('Odisha', 75), ('Assam', 78),
+    ('Jharkhand', 82), ('Chhattisgarh', 49), ('Uttarakhand', 24), ('Delhi', 11)
+]
+
+INDIA_LATITUDES = (9.0, 31.0)
+INDIA_LONGITUDES = (72.0, 88.0)
+
+TIERS = ['Tier 1', 'Tier 2', 'Tier 3', 'Tier 4']
+TIER_PRICE = {'Tier 1': 15000, 'Tier 2': 6500, 'Tier 3': 4000, 'Tier 4': 2500}
+TIER_MULTIPLIER = {'Tier 1': 1.5, 'Tier 2': 1.2, 'Tier 3': 1.0, 'Tier 4': 0.8}
+AREA_TYPES = ['residential', 'commercial', 'agricultural', 'industrial']
+AREA_TYPE_WEIGHTS = [0.7, 0.18, 0.07, 0.05]
+ROAD_WIDTHS = np.array([10.0, 15.0, 20.0, 25.0, 30.0, 40.0, 60.0])
+ROAD_WIDTH_WEIGHTS = np.array([0.12, 0.2, 0.25, 0.18, 0.13, 0.08, 0.04])
+
+ESTIMATE_COLUMNS = [
+    'state', 'city', 'locality', 'plot_size_sqft', 'road_width_ft',
+    'nearby_schools', 'nearby_metro', 'commercial_area', 'year',
+    'estimated_price_per_sqft', 'total_estimated_price', 'confidence_score',
+    'api_key', 'ip_address', 'created_at'
+]
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+def _zipf_weights(count, exponent):
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+class SyntheticDataset:
+    """
+    Deterministic, seeded national-scale dataset in the app's CSV schemas.
+
+    City size and popularity follow a Zipf distribution, so a few metros
+    dominate both the locality count and the estimate traffic, and
+    localities within a city are skewed the same way. The same seed always
+    produces the same rows. Estimates are generated in chunks so tens of
+    millions of rows never sit in memory at once.
+    """
+
+    def __init__(self, seed=42, cities=500, localities_per_city=40, days=365,
+                 city_skew=1.1, locality_skew=0.9, duplicate_name_rate=0.02):
+        self.seed = seed
+        self.city_count = cities
+        self.localities_per_city = localities_per_city
+        self.days = days
+        self.city_skew = city_skew
+        self.locality_skew = locality_skew
+        self.duplicate_name_rate = duplicate_name_rate
+        self._build_reference_data()
+
+    def _build_reference_data(self):
+        rng = np.random.default_rng(self.seed)
+
+        # Cities, largest first
+        self.cities = []
+        taken = set()
+        populations = (12_000_000 * _zipf_weights(self.city_count, self.city_skew)
+                       / _zipf_weights(self.city_count, self.city_skew)[0]).astype(int)
+        for index in range(self.city_count):
+            state, pin_prefix = STATES[rng.integers(len(STATES))]
+            population = max(int(populations[index] * rng.uniform(0.8, 1.2)), 50_000)
+            tier = TIERS[min(3, int(np.log10(12_000_000 / population) * 1.6))]
+            name = f'Synth City {index:05d}'
+            if index and rng.random() < self.duplicate_name_rate:
+                # Same city name in another state, as happens in real data
+                source = self.cities[int(rng.integers(index))]
+                if (source['name'], state) not in taken:
+                    name = source['name']
+            taken.add((name, state))
+            self.cities.append({
+                'name': name,
+                'state': state,
+                'base_price_per_sqft': round(TIER_PRICE[tier] * rng.lognormal(0, 0.25), 0),
+                'growth_rate': round(float(rng.uniform(0.03, 0.09)), 3),
+                'population': population,
+                'tier': tier,
+                'pin_prefix': pin_prefix
+            })
+
+        # Coordinates come from their own stream so adding them left the
+        # rest of the data unchanged for a given seed
+        geo_rng = np.random.default_rng([self.seed, 1])
+        for city in self.cities:
+            city['latitude'] = float(geo_rng.uniform(*INDIA_LATITUDES))
+            city['longitude'] = float(geo_rng.uniform(*INDIA_LONGITUDES))
+
+        # Localities: bigger cities get more of them, spread over a wider area
+        self.localities = []
+        self.city_locality_ranges = []
+        for index, city in enumerate(self.cities):
+            count = max(1, int(self.localities_per_city * (city['population'] / populations.mean()) ** 0.35))
+            spread_km = 2 + 10 * (city['population'] / 12_000_000) ** 0.5
+            offsets_km = geo_rng.normal(0, spread_km, size=(count, 2))
+            start = len(self.localities)
+            for number in range(count):
+                pin_code = f"{city['pin_prefix']}{int(rng.integers(0, 10000)):04d}"
+                if number and rng.random() < 0.05:
+                    # Some localities share a pin code with a neighbour
+                    pin_code = self.localities[-1]['pin_code']
+                self.localities.append({
+                    'name': f'Sector {number + 1}',
+                    'city_index': index,
+                    'city_name': city['name'],
+                    'state': city['state'],
+                    'price_per_sqft': round(city['base_price_per_sqft'] * rng.lognormal(0.1, 0.35), 0),
+                    'location_multiplier': round(float(rng.uniform(0.8, 2.0)), 2),
+                    'area_type': AREA_TYPES[rng.choice(len(AREA_TYPES), p=AREA_TYPE_WEIGHTS)],
+                    'pin_code': pin_code,
+                    'latitude': round(city['latitude'] + offsets_km[number, 0] / 110.574, 6),
+                    'longitude': round(city['longitude'] + offsets_km[number, 1]
+                                       / (111.320 * np.cos(np.radians(city['latitude']))), 6)
+                })
+            self.city_locality_ranges.append((start, len(self.localities)))
+
+        self.multipliers = []
+        with open(os.path.join(DATA_DIR, 'infrastructure_multipliers.csv'), encoding='utf-8') as file:
+            self.multipliers = list(csv.DictReader(file))
+
+    def iter_estimate_chunks(self, total, chunk_size=200_000, end=None):
+        """
+        Yield dicts of NumPy column arrays, chunk by chunk, for `total`
+        estimates. Chunk k always uses the same derived seed, so output
+        does not depend on how the caller consumes it.
+        """
+        end = end or datetime(2025, 1, 1)
+        city_weights = _zipf_weights(self.city_count, self.city_skew)
+        city_names = np.array([city['name'] for city in self.cities], dtype=object)
+        city_states = np.array([city['state'] for city in self.cities], dtype=object)
+        city_tiers = np.array([TIER_MULTIPLIER[city['tier']] for city in self.cities])
+        locality_names = np.array([locality['name'] for locality in self.localities], dtype=object)
+        locality_prices = np.array([locality['price_per_sqft'] for locality in self.localities])
+        ip_pool = np.array([f'10.{i >> 8}.{i & 255}.1' for i in range(65536)], dtype=object)
+        end_us = np.datetime64(end, 'us')
+        starts = np.array([start for start, _ in self.city_locality_ranges])
+        counts = np.array([stop - start for start, stop in self.city_locality_ranges])
+
+        produced = 0
+        chunk_index = 0
+        while produced < total:
+            size = min(chunk_size, total - produced)
+            rng = np.random.default_rng([self.seed, chunk_index])
+
+            city_index = rng.choice(self.city_count, size=size, p=city_weights)
+            # Zipf-ish locality choice within each city via a skewed uniform
+            offsets = np.floor(counts[city_index] * rng.random(size) ** (1 + self.locality_skew)).astype(int)
+            locality_index = starts[city_index] + np.minimum(offsets, counts[city_index] - 1)
+            has_locality = rng.random(size) < 0.8
+
+            plot_size = np.round(np.exp(rng.normal(7.0, 0.6, size)), 0)
+            road_width = ROAD_WIDTHS[rng.choice(len(ROAD_WIDTHS), size=size, p=ROAD_WIDTH_WEIGHTS)]
+            schools = rng.random(size) < 0.45
+            metro = rng.random(size) < 0.25
+            commercial = rng.random(size) < 0.15
+            year = rng.integers(2020, 2031, size)
+
+            base = np.where(has_locality, locality_prices[locality_index], locality_prices[locality_index] * 0.85)
+            price = (base * city_tiers[city_index]
+                     * np.where(schools, 1.1, 1.0) * np.where(metro, 1.25, 1.0)
+                     * np.where(commercial, 1.15, 1.0) * 1.12 ** (year - 2024))
+            price = np.round(price, 2)
+
+            # Recent days are busier than old ones
+            age_us = (self.days * 86_400e6 * rng.random(size) ** 1.5).astype('timedelta64[us]')
+            created_at = (end_us - age_us).astype(object)
+
+            yield {
+                'state': city_states[city_index],
+                'city': city_names[city_index],
+                'locality': np.where(has_locality, locality_names[locality_index], None),
+                'plot_size_sqft': plot_size,
+                'road_width_ft': road_width,
+                'nearby_schools': schools,
+                'nearby_metro': metro,
+                'commercial_area': commercial,
+                'year': year,
+                'estimated_price_per_sqft': price,
+                'total_estimated_price': np.round(price * plot_size, 2),
+                'confidence_score': np.where(has_locality, 0.9, 0.7),
+                'api_key': np.full(size, None, dtype=object),
+                'ip_address': ip_pool[rng.integers(0, len(ip_pool), size)],
+                'created_at': created_at
+            }
+
+            produced += size
+            chunk_index += 1
+
+    def write_csvs(self, directory, estimates=0, chunk_size=200_000):
+        """Write cities, localities, multipliers and optional estimates CSVs"""
+        os.makedirs(directory, exist_ok=True)
+        _write_rows(os.path.join(directory, 'cities.csv'),
+                    ['name', 'state', 'base_price_per_sqft', 'growth_rate', 'population', 'tier'],
+                    self.cities)
+        _write_rows(os.path.join(directory, 'localities.csv'),
+                    ['name', 'city_name', 'state', 'price_per_sqft', 'location_multiplier', 'area_type', 'pin_code',
+                     'latitude', 'longitude'],
+                    self.localities)
+        _write_rows(os.path.join(directory, 'infrastructure_multipliers.csv'),
+                    ['factor_type', 'factor_value', 'multiplier', 'description'],
+                    self.multipliers)
+
+        if estimates:
+            with open(os.path.join(directory, 'estimates.csv'), 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(['id'] + ESTIMATE_COLUMNS)
+                next_id = 1
+                for chunk in self.iter_estimate_chunks(estimates, chunk_size=chunk_size):
+                    columns = [chunk[name] for name in ESTIMATE_COLUMNS[:-1]]
+                    for offset, row in enumerate(zip(*columns)):
+                        writer.writerow([next_id + offset, *('' if value is None else value for value in row),
+                                         chunk['created_at'][offset].isoformat()])
+                    next_id += len(chunk['created_at'])
+
+    def load_into_db(self, db, estimates=0, chunk_size=200_000):
+        """
+        Bulk-insert the dataset into the app database. Reference data goes
+        through DataManager.bulk_load_csvs' column layout; estimates are
+        inserted chunk by chunk with executemany. Infrastructure multipliers
+        are only inserted into an empty table, so loading into an already
+        seeded database doesn't duplicate them.
+        """
+        from models import City, Locality, InfrastructureMultiplier, PriceEstimate
+
+        started = time.perf_counter()
+        db.session.execute(insert(City), [
+            {key: city[key] for key in ('name', 'state', 'base_price_per_sqft', 'growth_rate', 'population', 'tier')}
+            for city in self.cities
+        ])
+        city_ids = {
+            (name, state): city_id
+            for city_id, name, state in db.session.execute(select(City.id, City.name, City.state))
+        }
+        db.session.execute(insert(Locality), [{
+            'name': locality['name'],
+            'city_id': city_ids[(locality['city_name'], locality['state'])],
+            'price_per_sqft': locality['price_per_sqft'],
+            'location_multiplier': locality['location_multiplier'],
+            'area_type': locality['area_type'],
+            'pin_code': locality['pin_code'],
+            'latitude': locality['latitude'],
+            'longitude': locality['longitude']
+        } for locality in self.localities])
+        # Multipliers are shared reference data: keep an existing set
+        multipliers = [] if InfrastructureMultiplier.query.first() else self.multipliers
+        if multipliers:
+            db.session.execute(insert(InfrastructureMultiplier), [{
+                'factor_type': row['factor_type'],
+                'factor_value': row['factor_value'],
+                'multiplier': float(row['multiplier']),
+                'description': row.get('description', '')
+            } for row in multipliers])
+        db.session.commit()
+
+        inserted = 0
+        for chunk in self.iter_estimate_chunks(estimates, chunk_size=chunk_size):
+            columns = [chunk[name] for name in ESTIMATE_COLUMNS]
+            rows = [dict(zip(ESTIMATE_COLUMNS, _plain(values))) for values in zip(*columns)]
+            db.session.execute(insert(PriceEstimate), rows)
+            db.session.commit()
+            inserted += len(rows)
+
+        stats = {
+            'cities': len(self.cities),
+            'localities': len(self.localities),
+            'multipliers': len(multipliers),
+            'estimates': inserted,
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        logging.info(f"Loaded synthetic dataset: {stats}")
+        return stats
+
+def _plain(values):
+    # NumPy scalars -> Python types the DB driver understands
+    return [value.item() if isinstance(value, np.generic) else value for value in values]
+
+def _write_rows(path, columns, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,121 @@
+import unittest
+import csv
+import io
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import PriceEstimate, EstimateRollup
+from archive import (compact_estimates, archive_partitions, archive_table,
+                     count_estimates, iter_estimates)
+from data_manager import DataManager
+
+class TestEstimateArchive(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+        self.drop_partitions()
+
+        self.now = datetime(2024, 6, 15, 12, 0)
+        created = [
+            self.now - timedelta(days=1),
+            self.now - timedelta(days=100),   # early March
+            self.now - timedelta(days=101),
+            self.now - timedelta(days=130),   # early February
+        ]
+        for index, created_at in enumerate(created):
+            db.session.add(self.make_estimate(created_at, 1000.0 * (index + 1)))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        self.drop_partitions()
+        db.drop_all()
+        self.app_context.pop()
+
+    def drop_partitions(self):
+        for name in archive_partitions():
+            archive_table(name).drop(db.engine)
+
+    def make_estimate(self, created_at, price):
+        return PriceEstimate(
+            state='Test State',
+            city='Test City',
+            plot_size_sqft=1000,
+            year=2024,
+            estimated_price_per_sqft=price,
+            total_estimated_price=price * 1000,
+            confidence_score=0.7,
+            created_at=created_at
+        )
+
+    def test_compaction_moves_old_rows(self):
+        """Rows older than the cutoff move to monthly partitions."""
+        stats = compact_estimates(cutoff=self.now - timedelta(days=90), batch_size=1)
+
+        self.assertEqual(stats['archived'], 3)
+        self.assertEqual(PriceEstimate.query.count(), 1)
+        self.assertEqual(archive_partitions(), [
+            'price_estimate_archive_202403',
+            'price_estimate_archive_202402'
+        ])
+
+    def test_empty_months_get_no_partition(self):
+        """Months without estimates between old rows create no tables."""
+        db.session.add_all([self.make_estimate(datetime(2023, 1, 10), 500.0),
+                            self.make_estimate(datetime(2023, 6, 10), 600.0)])
+        db.session.commit()
+        stats = compact_estimates(cutoff=self.now - timedelta(days=90))
+
+        self.assertEqual(stats['archived'], 5)
+        self.assertEqual(archive_partitions(), [
+            'price_estimate_archive_202403',
+            'price_estimate_archive_202402',
+            'price_estimate_archive_202306',
+            'price_estimate_archive_202301'
+        ])
+
+    def test_rollups_summarize_archived_months(self):
+        """Monthly rollups keep counts and price ranges of archived rows."""
+        compact_estimates(cutoff=self.now - timedelta(days=90))
+
+        march = EstimateRollup.query.filter_by(month='2024-03').one()
+        self.assertEqual(march.estimate_count, 2)
+        self.assertEqual(march.min_price_per_sqft, 2000.0)
+        self.assertEqual(march.max_price_per_sqft, 3000.0)
+        self.assertEqual(march.price_per_sqft_sum, 5000.0)
+
+    def test_queries_span_hot_and_archive(self):
+        """Counts and exports include archived estimates."""
+        compact_estimates(cutoff=self.now - timedelta(days=90))
+
+        self.assertEqual(count_estimates(), 4)
+
+        created = [row.created_at for row in iter_estimates()]
+        self.assertEqual(created, sorted(created, reverse=True))
+
+        rows = list(csv.DictReader(io.StringIO(DataManager().export_estimates_csv())))
+        self.assertEqual(len(rows), 4)
+
+    def test_compaction_is_idempotent(self):
+        """Running compaction again with the same cutoff moves nothing."""
+        cutoff = self.now - timedelta(days=90)
+        compact_estimates(cutoff=cutoff)
+        stats = compact_estimates(cutoff=cutoff)
+
+        self.assertEqual(stats['archived'], 0)
+        self.assertEqual(count_estimates(), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import csv
+import io
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from config import Config
+from models import PriceEstimate, EstimateResult, EstimateRequest, APIKey
+from audit import record_estimate, recent_estimates, content_hash, estimate_fields, _store_compact, _result_ids
+from archive import count_estimates
+from data_manager import DataManager
+
+INPUTS = {
+    'state': 'Test State',
+    'city': 'Test City',
+    'locality': 'Test Locality',
+    'plot_size_sqft': 1000,
+    'road_width_ft': 20,
+    'nearby_schools': True,
+    'nearby_metro': False,
+    'commercial_area': False,
+    'year': 2024
+}
+
+RESULT = {
+    'estimated_price_per_sqft': 6000.0,
+    'total_estimated_price': 6000000.0,
+    'confidence_score': 0.9
+}
+
+class TestCompactAudit(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        _result_ids.clear()
+
+        self.api_key = APIKey(key='audit_test_key', name='Audit Test')
+        db.session.add(self.api_key)
+        db.session.commit()
+
+        self.original_mode = Config.COMPACT_AUDIT
+        Config.COMPACT_AUDIT = True
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        Config.COMPACT_AUDIT = self.original_mode
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_repeated_estimates_share_one_result(self):
+        """Identical inputs and outputs are stored once."""
+        first = record_estimate(INPUTS, RESULT, api_key=self.api_key, ip_address='10.0.0.1')
+        second = record_estimate(INPUTS, RESULT, ip_address='10.0.0.2')
+
+        self.assertNotEqual(first.id, second.id)
+        self.assertIsNotNone(first.created_at)
+        self.assertEqual(EstimateResult.query.count(), 1)
+        self.assertEqual(EstimateRequest.query.count(), 2)
+        self.assertEqual(PriceEstimate.query.count(), 0)
+
+        changed = dict(RESULT, estimated_price_per_sqft=6100.0)
+        record_estimate(INPUTS, changed)
+        self.assertEqual(EstimateResult.query.count(), 2)
+
+    def test_hash_stable_for_results_without_new_fields(self):
+        """Optional fields only change the hash when they are set."""
+        fields = estimate_fields(INPUTS, RESULT)
+        self.assertEqual(content_hash(fields), 'c14150c30eedc81e03086de3f393f545')
+        self.assertNotEqual(content_hash(dict(fields, pin_code='123456')), content_hash(fields))
+
+    def test_coordinates_recorded(self):
+        """Spatial estimates keep their coordinates in both audit layouts."""
+        inputs = dict(INPUTS, locality=None, latitude=19.07, longitude=72.87)
+        record_estimate(inputs, RESULT)
+        Config.COMPACT_AUDIT = False
+        record_estimate(inputs, RESULT)
+
+        self.assertEqual(EstimateResult.query.one().latitude, 19.07)
+        self.assertEqual(PriceEstimate.query.filter_by(latitude=19.07).one().longitude, 72.87)
+        rows = list(csv.DictReader(io.StringIO(DataManager().export_estimates_csv())))
+        self.assertEqual({(row['latitude'], row['longitude']) for row in rows if row['latitude']}, {('19.07', '72.87')})
+
+    def test_result_ids_cached_only_after_commit(self):
+        """A rolled-back result id never reaches the cache."""
+        digest = content_hash(estimate_fields(INPUTS, RESULT))
+        db.session.add(APIKey(key='rolled_back_key', name='Rolled Back'))
+        db.session.flush()
+        _store_compact(db.session, estimate_fields(INPUTS, RESULT), None, '10.0.0.1')
+        db.session.rollback()
+        self.assertIsNone(_result_ids.get(digest))
+        self.assertEqual(EstimateResult.query.count(), 0)
+
+        record = record_estimate(INPUTS, RESULT)
+        stored = EstimateResult.query.one()
+        self.assertEqual(_result_ids.get(digest), stored.id)
+        self.assertEqual(db.session.get(EstimateRequest, record.id).result_id, stored.id)
+
+    def test_recent_estimates_include_compact_rows(self):
+        """The dashboard's recent estimates read both audit layouts."""
+        record_estimate(INPUTS, RESULT, ip_address='10.0.0.1')
+        Config.COMPACT_AUDIT = False
+        record_estimate(INPUTS, RESULT, ip_address='10.0.0.2')
+
+        recent = recent_estimates(limit=10)
+        self.assertEqual([row.ip_address for row in recent], ['10.0.0.2', '10.0.0.1'])
+        self.assertEqual(recent[1].locality, 'Test Locality')
+
+    def test_export_re_expands_compact_rows(self):
+        """Exports show compact requests as full estimate rows."""
+        record_estimate(INPUTS, RESULT, api_key=self.api_key, ip_address='10.0.0.1')
+        Config.COMPACT_AUDIT = False
+        record_estimate(INPUTS, RESULT, ip_address='10.0.0.2')
+
+        self.assertEqual(count_estimates(), 2)
+
+        rows = list(csv.DictReader(io.StringIO(DataManager().export_estimates_csv())))
+        self.assertEqual(len(rows), 2)
+        compact_row = next(row for row in rows if row['ip_address'] == '10.0.0.1')
+        self.assertEqual(compact_row['locality'], 'Test Locality')
+        self.assertEqual(compact_row['api_key'], 'audit_test_key')
+        self.assertEqual(float(compact_row['total_estimated_price']), 6000000.0)
+        # Both rows have id 1; the source column tells them apart
+        self.assertEqual(sorted((row['source'], row['id']) for row in rows), [('compact', '1'), ('wide', '1')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from config import Config
+from autocomplete import AutocompleteIndex
+from pricing_snapshot import PricingSnapshot, CityRow, LocalityRow, pricing_snapshot
+import test_api
+
+def make_snapshot():
+    cities = [
+        CityRow(1, 'Pune', 'Maharashtra', 12000, 0.08, 3124458, 'Tier 1'),
+        CityRow(2, 'Panvel', 'Maharashtra', 6000, 0.07, 180000, 'Tier 3'),
+        CityRow(3, 'Patna', 'Bihar', 5000, 0.06, 1684222, 'Tier 2')
+    ]
+    localities = [
+        LocalityRow(1, 'Baner', 1, 18000, 1.3, 'residential', '411045', None, None),
+        LocalityRow(2, 'Balewadi', 1, 16000, 1.2, 'residential', '411045', None, None),
+        LocalityRow(3, 'Aundh', 1, 17000, 1.2, 'residential', '411007', None, None),
+        LocalityRow(4, 'Boring Road', 3, 9000, 1.1, 'residential', '800001', None, None),
+        LocalityRow(5, 'Panvel East', 2, 7000, 1.0, 'residential', '410206', None, None)
+    ]
+    return PricingSnapshot(cities, localities, [])
+
+class TestAutocomplete(unittest.TestCase):
+    def test_prefix_matches_ranked_by_population_then_price(self):
+        """Bigger cities come first; within a city, pricier localities first."""
+        index = AutocompleteIndex(make_snapshot(), max_results=10, depth=3)
+        names = [result['name'] for result in index.search('pa')]
+        self.assertEqual(names, ['Patna', 'Panvel', 'Panvel East'])
+
+        names = [result['name'] for result in index.search('ba')]
+        self.assertEqual(names, ['Baner', 'Balewadi'])
+
+    def test_long_prefixes_and_word_starts(self):
+        """Prefixes past the precomputed depth and inner words still match."""
+        index = AutocompleteIndex(make_snapshot(), max_results=10, depth=2)
+        self.assertEqual([r['name'] for r in index.search('Boring R')], ['Boring Road'])
+        self.assertEqual([r['name'] for r in index.search('road')], ['Boring Road'])
+        self.assertEqual([r['name'] for r in index.search('  EAST ')], ['Panvel East'])
+        self.assertEqual(index.search('zzz'), [])
+
+    def test_pin_code_prefixes(self):
+        """Pin prefixes return every locality on the matching pins."""
+        index = AutocompleteIndex(make_snapshot(), max_results=10, depth=3)
+        results = index.search('4110')
+        self.assertEqual([r['locality'] for r in results if r['type'] == 'pin_code'],
+                         ['Baner', 'Aundh', 'Balewadi'])
+        self.assertEqual(len(index.search('411', limit=2)), 2)
+
+class TestAutocompleteEndpoint(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        pricing_snapshot.invalidate()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_endpoint(self):
+        """The endpoint serves matches from the current snapshot."""
+        response = self.client.get('/api/autocomplete?q=test')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([r['type'] for r in data['results']], ['city', 'locality'])
+        self.assertEqual(data['version'], pricing_snapshot.current().version)
+
+        response = self.client.get('/api/autocomplete?q=test&limit=1')
+        self.assertEqual(len(response.get_json()['results']), 1)
+        for limit in ('-2', '0', Config.AUTOCOMPLETE_MAX_RESULTS + 1, 'many'):
+            response = self.client.get(f'/api/autocomplete?q=test&limit={limit}')
+            self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import City, Locality
+from budget_search import budget_index
+from price_estimator import PriceEstimator
+from pricing_snapshot import pricing_snapshot
+import test_api
+
+class TestBudgetSearch(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+
+        city = City.query.filter_by(name='Test City').first()
+        other = City(name='Other City', state='Other State', base_price_per_sqft=3000,
+                     growth_rate=0.05, tier='Tier 3')
+        db.session.add(other)
+        db.session.flush()
+        db.session.add_all([
+            Locality(name='East Side', city_id=city.id, price_per_sqft=8000),
+            Locality(name='West Side', city_id=city.id, price_per_sqft=6000),
+            Locality(name='Old Town', city_id=other.id, price_per_sqft=2500),
+            Locality(name='New Town', city_id=other.id, price_per_sqft=4000)
+        ])
+        db.session.commit()
+        pricing_snapshot.invalidate()
+        self.estimator = PriceEstimator()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _estimates(self, year):
+        estimates = {}
+        for city in City.query.all():
+            for locality in city.localities:
+                result = self.estimator.estimate_price(state=city.state, city_name=city.name,
+                                                       locality_name=locality.name, year=year)
+                estimates[locality.name] = result['estimated_price_per_sqft']
+        return estimates
+
+    def test_matches_estimator(self):
+        """Indexed prices and the budget cut-off agree with estimate_price."""
+        estimates = self._estimates(2027)
+        # The index leaves out the factors shared by every locality
+        shared = self.estimator._calculate_infrastructure_multiplier(20, False, False, False)
+        # Estimates are rounded to the paisa
+        budget = sorted(estimates.values())[2] + 0.01
+        expected = {name for name, price in estimates.items() if price <= budget}
+
+        total, matches = budget_index().search(budget / shared, 2027, limit=100)
+        self.assertEqual(total, len(expected))
+        self.assertEqual({locality.name for locality, _, _ in matches}, expected)
+        for locality, _, adjusted in matches:
+            self.assertAlmostEqual(adjusted * shared, estimates[locality.name], places=1)
+        prices = [adjusted for _, _, adjusted in matches]
+        self.assertEqual(prices, sorted(prices, reverse=True))
+
+    def test_scopes_and_pagination(self):
+        """State and city filters restrict results; pages do not overlap."""
+        total, matches = budget_index().search(1e9, 2024, state='Other State')
+        self.assertEqual(total, 2)
+        self.assertEqual({city.name for _, city, _ in matches}, {'Other City'})
+
+        total, matches = budget_index().search(1e9, 2024, state='Test State', city='Test City',
+                                               cheapest_first=True)
+        self.assertEqual({city.name for _, city, _ in matches}, {'Test City'})
+        prices = [adjusted for _, _, adjusted in matches]
+        self.assertEqual(prices, sorted(prices))
+
+        self.assertEqual(budget_index().search(1e9, 2024, state='Nowhere'), (0, []))
+
+        # A city name without its state still finds the city
+        total, _ = budget_index().search(1e9, 2024, city='Test City')
+        self.assertGreater(total, 0)
+
+        _, everything = budget_index().search(1e9, 2024, limit=100)
+        _, first = budget_index().search(1e9, 2024, limit=2)
+        _, second = budget_index().search(1e9, 2024, offset=2, limit=2)
+        self.assertEqual(first + second, everything[:4])
+
+    def test_api_budget_search(self):
+        """/api/budget-search applies plot size and shared factors to the budget."""
+        headers = {'X-API-Key': 'test_api_key_123'}
+        estimates = self._estimates(2024)
+        commercial = self.estimator._get_area_type_multiplier('commercial')
+        budget = estimates['Old Town'] * commercial * 1500 + 1
+
+        response = self.client.post('/api/budget-search', headers=headers, json={
+            'budget': budget, 'plot_size_sqft': 1500, 'area_type': 'commercial',
+            'year': 2024, 'limit': 5
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['pagination']['total'], 1)
+        self.assertEqual(data['data'][0]['locality'], 'Old Town')
+        self.assertLessEqual(data['data'][0]['total_estimated_price'], budget)
+        self.assertEqual(data['data'][0]['confidence_score'], self.estimator.LOCALITY_CONFIDENCE)
+
+        response = self.client.get('/api/budget-search?limit=5', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
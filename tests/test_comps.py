@@ -0,0 +1,161 @@
+import time
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from config import Config
+from models import PriceEstimate
+from audit import record_estimate
+from comps import CompsIndex, comps_index
+import test_api
+
+def estimate(locality='Test Locality', plot_size_sqft=1000.0, road_width_ft=20.0, nearby_metro=False,
+             year=2024, city='Test City', price=5000.0):
+    return {
+        'state': 'Test State', 'city': city, 'locality': locality, 'plot_size_sqft': plot_size_sqft,
+        'road_width_ft': road_width_ft, 'nearby_schools': False, 'nearby_metro': nearby_metro,
+        'commercial_area': False, 'year': year, 'estimated_price_per_sqft': price,
+        'total_estimated_price': price * plot_size_sqft, 'confidence_score': 0.9
+    }
+
+class TestComps(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        db.session.add_all([
+            PriceEstimate(**estimate(plot_size_sqft=1000.0, price=5000.0)),
+            PriceEstimate(**estimate(plot_size_sqft=1100.0, price=5100.0)),
+            PriceEstimate(**estimate(plot_size_sqft=4000.0, price=4500.0)),
+            PriceEstimate(**estimate(locality='Other Locality', plot_size_sqft=1000.0, price=4000.0)),
+            PriceEstimate(**estimate(plot_size_sqft=1000.0, year=2020, price=4200.0)),
+            PriceEstimate(**estimate(city='Elsewhere', plot_size_sqft=1000.0, price=9000.0))
+        ])
+        db.session.commit()
+        comps_index.reset()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        comps_index.reset()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_nearest_first_within_city(self):
+        """Comps come from the same city, most similar first."""
+        total, comps = comps_index.query('Test State', 'Test City', plot_size_sqft=1000, year=2024,
+                                         locality='Test Locality', k=4)
+        self.assertEqual(total, 5)
+        # Another locality (1.0) is closer than four years apart (2.0)
+        self.assertEqual([comp['estimated_price_per_sqft'] for comp in comps], [5000.0, 5100.0, 4000.0, 4200.0])
+        self.assertEqual(comps[0]['distance'], 0.0)
+        self.assertLess(comps[1]['distance'], comps[2]['distance'])
+
+        _, comps = comps_index.query('Test State', 'Test City', plot_size_sqft=1000, year=2024,
+                                     locality='Other Locality', k=1)
+        self.assertEqual(comps[0]['locality'], 'Other Locality')
+        self.assertEqual(comps_index.query('Test State', 'No Such City'), (0, []))
+
+    def test_new_estimates_are_added(self):
+        """Estimates written by this worker are searchable right away."""
+        comps_index.query('Test State', 'Test City')
+        record = record_estimate(estimate(plot_size_sqft=2500.0, nearby_metro=True, price=6100.0),
+                                 {'estimated_price_per_sqft': 6100.0, 'total_estimated_price': 6100.0 * 2500,
+                                  'confidence_score': 0.9})
+        _, comps = comps_index.query('Test State', 'Test City', plot_size_sqft=2500, nearby_metro=True, k=1)
+        self.assertEqual(comps[0]['id'], record.id)
+        self.assertTrue(comps[0]['nearby_metro'])
+
+    def test_compact_audit_estimates_are_added(self):
+        """The compact audit log is indexed too."""
+        with patch.object(Config, 'COMPACT_AUDIT', True):
+            record_estimate(estimate(plot_size_sqft=3000.0), {'estimated_price_per_sqft': 5300.0,
+                            'total_estimated_price': 5300.0 * 3000, 'confidence_score': 0.9})
+            index = CompsIndex()
+            _, comps = index.query('Test State', 'Test City', plot_size_sqft=3000, k=1)
+        self.assertEqual(comps[0]['estimated_price_per_sqft'], 5300.0)
+
+    def test_catches_up_with_other_workers(self):
+        """Rows written elsewhere are picked up once, after the refresh interval."""
+        index = CompsIndex(refresh_seconds=0)
+        index.query('Test State', 'Test City')
+        db.session.add(PriceEstimate(**estimate(plot_size_sqft=7000.0, price=3900.0)))
+        db.session.commit()
+        # Also written by this worker: must not be indexed twice
+        index.add(PriceEstimate.query.order_by(PriceEstimate.id.desc()).first())
+
+        total, comps = index.query('Test State', 'Test City', plot_size_sqft=7000, k=1)
+        self.assertEqual(total, 6)
+        self.assertEqual(comps[0]['estimated_price_per_sqft'], 3900.0)
+        self.assertEqual(index.query('Test State', 'Test City')[0], 6)
+
+    def test_late_commits_are_picked_up(self):
+        """A row committed after a higher id is indexed once, not skipped."""
+        index = CompsIndex(refresh_seconds=0)
+        index.query('Test State', 'Test City')
+        top = index._watermarks['wide']
+        db.session.add(PriceEstimate(id=top + 5, **estimate(plot_size_sqft=7000.0, price=3900.0)))
+        db.session.commit()
+        self.assertEqual(index.query('Test State', 'Test City')[0], 6)
+
+        db.session.add(PriceEstimate(id=top + 2, **estimate(plot_size_sqft=8000.0, price=3800.0)))
+        db.session.commit()
+        self.assertEqual(index.query('Test State', 'Test City')[0], 7)
+        self.assertEqual(index.query('Test State', 'Test City')[0], 7)
+
+    def test_own_writes_advance_the_watermark(self):
+        """Catch-up moves past rows this worker indexed itself and forgets old ids."""
+        index = CompsIndex(refresh_seconds=0)
+        index.query('Test State', 'Test City')
+        start = index._watermarks['wide']
+        with patch('audit.comps_index', index), patch.object(Config, 'COMPS_CATCH_UP_WINDOW', 5), \
+                patch.object(Config, 'COMPACT_AUDIT', False):
+            for number in range(12):
+                record_estimate(dict(estimate(plot_size_sqft=2000.0 + number), locality='Test Locality'),
+                                {'estimated_price_per_sqft': 5000.0, 'total_estimated_price': 1e7,
+                                 'confidence_score': 0.9})
+                index.query('Test State', 'Test City')
+
+            self.assertEqual(index._watermarks['wide'], start + 12)
+            self.assertLessEqual(len(index._recent_ids['wide']), 5)
+            self.assertEqual(index.query('Test State', 'Test City')[0], 17)
+
+    def test_query_latency(self):
+        """A 20k-estimate city answers in a few milliseconds."""
+        index = CompsIndex()
+        index.query('Test State', 'Test City')
+        index._extend([PriceEstimate(id=100000 + i, **estimate(plot_size_sqft=500.0 + i % 3000,
+                                                                road_width_ft=float(i % 60), year=2020 + i % 11))
+                       for i in range(20000)])
+        started = time.perf_counter()
+        for _ in range(20):
+            index.query('Test State', 'Test City', plot_size_sqft=1500, road_width_ft=30, k=10)
+        self.assertLess((time.perf_counter() - started) / 20, 0.02)
+
+    def test_api_comps(self):
+        """/api/comps returns the nearest estimates and validates k."""
+        headers = {'X-API-Key': 'test_api_key_123'}
+        response = self.client.get('/api/comps?state=Test State&city=Test City&plot_size_sqft=1000&k=2',
+                                   headers=headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data['data']), 2)
+        self.assertEqual(data['searched'], 5)
+        self.assertIn('created_at', data['data'][0])
+
+        response = self.client.get('/api/comps?state=Test State&city=Test City&k=0', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/comps?state=Test State', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from app import app, db
+from models import City
+from flask import g
+from audit import record_estimate
+from db_routing import router, use_primary, SqliteReplicaSyncer
+
+class TestReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        """Set up a primary with one city and a replica copied from it."""
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+        db.session.add(City(name='Replica City', state='Test State', base_price_per_sqft=5000))
+        db.session.commit()
+
+        handle, self.replica_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        router.replica_engine = create_engine(f'sqlite:///{self.replica_path}')
+        self.syncer = SqliteReplicaSyncer(app, router, interval=0)
+        self.syncer.sync_now()
+        db.session.remove()
+
+    def tearDown(self):
+        """Detach the replica and clean up."""
+        db.session.remove()
+        router.replica_engine.dispose()
+        router.replica_engine = None
+        os.remove(self.replica_path)
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_city_on_primary(self):
+        db.session.add(City(name='New City', state='Test State', base_price_per_sqft=6000))
+        db.session.commit()
+        db.session.remove()
+
+    def test_reads_go_to_lagging_replica(self):
+        """Plain reads see the replica until it is synced."""
+        self.add_city_on_primary()
+
+        self.assertEqual(City.query.count(), 1)
+        self.syncer.sync_now()
+        db.session.remove()
+        self.assertEqual(City.query.count(), 2)
+
+    def test_reads_after_write_use_primary(self):
+        """A session that has written reads its own writes."""
+        db.session.add(City(name='New City', state='Test State', base_price_per_sqft=6000))
+        db.session.flush()
+
+        self.assertEqual(City.query.count(), 2)
+        db.session.rollback()
+
+    def test_use_primary_pins_reads(self):
+        """Reads inside use_primary() bypass the replica."""
+        self.add_city_on_primary()
+
+        with app.test_request_context():
+            with use_primary():
+                self.assertEqual(City.query.count(), 2)
+            db.session.remove()
+            self.assertEqual(City.query.count(), 1)
+
+    def test_audit_writes_do_not_pin_client(self):
+        """Logging an estimate doesn't keep the client on the primary; edits do."""
+        with app.test_request_context():
+            record_estimate({'state': 'Test State', 'city': 'Replica City', 'plot_size_sqft': 1000, 'year': 2024},
+                            {'estimated_price_per_sqft': 5000.0, 'total_estimated_price': 5000000.0,
+                             'confidence_score': 0.7})
+            self.assertFalse(g.get('db_wrote'))
+
+            self.add_city_on_primary()
+            self.assertTrue(g.get('db_wrote'))
+
+if __name__ == '__main__':
+    unittest.main()
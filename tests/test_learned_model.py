@@ -0,0 +1,102 @@
+import tempfile
+import unittest
+import os
+import sys
+from unittest.mock import patch
+import numpy as np
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from config import Config
+from price_estimator import PriceEstimator
+from pricing_snapshot import pricing_snapshot
+import learned_model
+import test_api
+
+try:
+    import sklearn  # noqa: F401
+except ImportError:
+    sklearn = None
+
+@unittest.skipIf(sklearn is None, 'scikit-learn is not installed')
+class TestLearnedModel(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        pricing_snapshot.invalidate()
+        self.estimator = PriceEstimator()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'pricing_model.joblib')
+        learned_model._loaded.clear()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        learned_model._loaded.clear()
+        self.temp_dir.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _train(self):
+        return learned_model.train_model(self.path, chunk_size=50, epochs=5, include_estimates=False)
+
+    def test_feature_rows(self):
+        """Known cities become full feature rows; unknown cities are masked out."""
+        features, known = learned_model.feature_builder().matrix([
+            {'state': 'Test State', 'city_name': 'Test City', 'locality_name': 'Test Locality'},
+            {'state': 'Nowhere', 'city_name': 'Nowhere'}
+        ])
+        self.assertEqual(features.shape, (1, len(learned_model.FEATURES)))
+        self.assertEqual(known.tolist(), [True, False])
+
+    def test_train_and_predict(self):
+        """A trained model prices known places near the rule-based estimate."""
+        model, stats = self._train()
+        self.assertTrue(os.path.exists(self.path))
+        self.assertGreater(stats['rows'], 0)
+
+        prices = model.predict_batch([
+            {'state': 'Test State', 'city_name': 'Test City', 'locality_name': 'Test Locality'},
+            {'state': 'Nowhere', 'city_name': 'Nowhere'}
+        ])
+        self.assertIsNone(prices[1])
+        expected = self.estimator.estimate_price('Test State', 'Test City', 'Test Locality')
+        ratio = prices[0] / expected['estimated_price_per_sqft']
+        self.assertTrue(0.5 < ratio < 2.0, ratio)
+
+    def test_load_is_memory_mapped_and_cached(self):
+        """The artifact's arrays are memory-mapped and loaded once per file version."""
+        self._train()
+        model = learned_model.load_model(self.path)
+        self.assertIsInstance(model.regressor.coef_, np.memmap)
+        self.assertIs(learned_model.load_model(self.path), model)
+
+    def test_without_artifact(self):
+        """No trained model means no learned prices, not an error."""
+        with patch.object(Config, 'LEARNED_MODEL_PATH', self.path):
+            self.assertIsNone(learned_model.load_model())
+            results = self.estimator.estimate_learned([{'state': 'Test State', 'city_name': 'Test City'}])
+        self.assertEqual(results, [None])
+
+    def test_api_learned_model(self):
+        """/api/estimate adds the learned price only when asked."""
+        self._train()
+        headers = {'X-API-Key': 'test_api_key_123'}
+        with patch.object(Config, 'LEARNED_MODEL_PATH', self.path):
+            response = self.client.get('/api/estimate?state=Test State&city=Test City&learned_model=true',
+                                       headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertGreater(response.get_json()['data']['learned_model']['estimated_price_per_sqft'], 0)
+
+            response = self.client.get('/api/estimate?state=Test State&city=Test City', headers=headers)
+            self.assertNotIn('learned_model', response.get_json()['data'])
+
+if __name__ == '__main__':
+    unittest.main()
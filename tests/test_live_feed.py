@@ -0,0 +1,122 @@
+import unittest
+import json
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from live_feed import EstimateFeed, event_stream
+
+def make_estimate(estimate_id, city='Test City'):
+    return SimpleNamespace(
+        id=estimate_id,
+        state='Test State',
+        city=city,
+        locality=None,
+        plot_size_sqft=1000,
+        estimated_price_per_sqft=5000,
+        total_estimated_price=5000000,
+        confidence_score=0.7,
+        api_key=None,
+        ip_address='127.0.0.1',
+        created_at=datetime(2024, 1, 1, 12, 0)
+    )
+
+class TestEstimateFeed(unittest.TestCase):
+    def test_publish_reaches_all_subscribers(self):
+        """Every subscriber sees each published estimate once."""
+        feed = EstimateFeed(max_subscribers=5, buffer_size=10)
+        first = feed.subscribe()
+        second = feed.subscribe()
+
+        feed.publish(make_estimate(1))
+
+        for subscription in (first, second):
+            events, missed = subscription.poll(timeout=0)
+            self.assertEqual(len(events), 1)
+            self.assertEqual(missed, 0)
+            self.assertEqual(json.loads(events[0][1])['id'], 1)
+
+            # Nothing new since the last poll
+            events, _ = subscription.poll(timeout=0)
+            self.assertEqual(events, [])
+
+    def test_subscriber_cap(self):
+        """Subscriptions beyond the cap are refused until one closes."""
+        feed = EstimateFeed(max_subscribers=1, buffer_size=10)
+        subscription = feed.subscribe()
+        self.assertIsNotNone(subscription)
+        self.assertIsNone(feed.subscribe())
+
+        subscription.close()
+        subscription.close()  # closing twice must not free two slots
+        self.assertEqual(feed.subscriber_count, 0)
+        self.assertIsNotNone(feed.subscribe())
+
+    def test_slow_subscriber_skips_ahead(self):
+        """A subscriber that falls behind the buffer is told what it missed."""
+        feed = EstimateFeed(max_subscribers=1, buffer_size=3)
+        subscription = feed.subscribe()
+
+        for estimate_id in range(1, 8):
+            feed.publish(make_estimate(estimate_id))
+
+        events, missed = subscription.poll(timeout=0)
+        self.assertEqual([seq for seq, _ in events], [5, 6, 7])
+        self.assertEqual(missed, 4)
+
+    def test_resume_from_last_event_id(self):
+        """Reconnecting clients resume from their Last-Event-ID."""
+        feed = EstimateFeed(max_subscribers=2, buffer_size=10)
+        for estimate_id in range(1, 4):
+            feed.publish(make_estimate(estimate_id))
+
+        subscription = feed.subscribe(last_event_id=1)
+        events, _ = subscription.poll(timeout=0)
+        self.assertEqual([seq for seq, _ in events], [2, 3])
+
+    def test_event_stream_format(self):
+        """The stream emits SSE frames and releases its slot when closed."""
+        feed = EstimateFeed(max_subscribers=1, buffer_size=10)
+        subscription = feed.subscribe()
+        feed.publish(make_estimate(42))
+
+        stream = event_stream(subscription, heartbeat=0.01)
+        self.assertTrue(next(stream).startswith('retry:'))
+        frame = next(stream)
+        self.assertIn('event: estimate', frame)
+        self.assertIn('id: 1', frame)
+        self.assertEqual(next(stream), ': keepalive\n\n')
+
+        stream.close()
+        self.assertEqual(feed.subscriber_count, 0)
+
+    def test_endpoint_requires_admin(self):
+        """The live feed endpoint is only available to admins."""
+        app.config['TESTING'] = True
+        client = app.test_client()
+        response = client.get('/admin/live-estimates')
+        self.assertEqual(response.status_code, 302)
+
+    def test_endpoint_refuses_sync_workers(self):
+        """Streams are only served by threaded or async workers."""
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['admin_logged_in'] = True
+
+        response = client.get('/admin/live-estimates', environ_overrides={'wsgi.multithread': False})
+        self.assertEqual(response.status_code, 503)
+
+        response = client.get('/admin/live-estimates', environ_overrides={'wsgi.multithread': True},
+                              buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        response.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from config import Config
+from metrics import MetricsRegistry, metrics
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_counters_merge_across_threads(self):
+        """Each thread records privately; scrapes see the sum."""
+        registry = MetricsRegistry()
+
+        def work():
+            for _ in range(1000):
+                registry.inc('jobs_total', kind='test')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn('jobs_total{kind="test"} 4000', registry.render())
+        # Finished threads are folded away, their counts kept
+        self.assertEqual(registry._shards, [])
+        self.assertIn('jobs_total{kind="test"} 4000', registry.render())
+
+    def test_histogram_rendering(self):
+        """Histograms render cumulative buckets, sum and count."""
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.observe('latency_seconds', 0.05, route='/x')
+        registry.observe('latency_seconds', 0.5, route='/x')
+        registry.observe('latency_seconds', 5.0, route='/x')
+
+        text = registry.render()
+        self.assertIn('# TYPE latency_seconds histogram', text)
+        self.assertIn('latency_seconds_bucket{route="/x",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{route="/x",le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{route="/x",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count{route="/x"} 3', text)
+
+    def test_workers_merge_through_directory(self):
+        """Snapshots from every worker in the metrics directory are summed."""
+        with tempfile.TemporaryDirectory() as directory:
+            first = MetricsRegistry(directory=directory, worker_id='a')
+            second = MetricsRegistry(directory=directory, worker_id='b')
+            first.inc('requests_total', 2)
+            second.inc('requests_total', 3)
+            second.flush()
+
+            self.assertIn('requests_total 5', first.render())
+
+    def test_dead_and_stale_workers_are_dropped(self):
+        """Snapshots of exited or silent workers no longer count."""
+        with tempfile.TemporaryDirectory() as directory:
+            live = MetricsRegistry(directory=directory, worker_id='live', stale_seconds=60)
+            live.inc('requests_total', 1)
+            for worker_id in ('silent', '999999999'):
+                other = MetricsRegistry(directory=directory, worker_id=worker_id)
+                other.inc('requests_total', 10)
+                other.flush()
+            silent = os.path.join(directory, 'metrics_silent.json')
+            os.utime(silent, (time.time() - 120, time.time() - 120))
+
+            self.assertIn('requests_total 1\n', live.render())
+            self.assertFalse(os.path.exists(os.path.join(directory, 'metrics_999999999.json')))
+
+    def test_concurrent_flushes(self):
+        """Threads flushing at once each use their own temp file."""
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(directory=directory, worker_id='w')
+            registry.inc('requests_total')
+            errors = []
+
+            def work():
+                try:
+                    for _ in range(50):
+                        registry.flush()
+                except OSError as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(os.listdir(directory), ['metrics_w.json'])
+
+    def test_flush_errors_do_not_fail_requests(self):
+        """An unwritable metrics directory is logged, not returned as a 500."""
+        app.config['TESTING'] = True
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(metrics, 'directory', directory), patch.object(metrics, '_last_flush', 0.0), \
+                patch.object(metrics, '_write', side_effect=OSError(28, 'No space left on device')):
+            response = app.test_client().get('/api/health')
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_endpoint(self):
+        """The metrics endpoint exposes request and estimator timings."""
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            client = app.test_client()
+            client.get('/api/health')
+            self.assertEqual(client.get('/api/metrics').status_code, 404)
+            with patch.object(Config, 'METRICS_TOKEN', 'secret'):
+                self.assertEqual(client.get('/api/metrics').status_code, 401)
+                response = client.get('/api/metrics', headers={'Authorization': 'Bearer secret'})
+            db.session.remove()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_requests_total{method="GET",route="/api/health",status="200"}',
+                      response.get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
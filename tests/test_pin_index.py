@@ -0,0 +1,131 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import City, Locality, PriceEstimate
+from pin_index import PinCodeError, pin_index
+from price_estimator import PriceEstimator
+from pricing_snapshot import pricing_snapshot
+import test_api
+
+class TestPinIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+
+        # Two localities share 123457; another city reuses 999999
+        city = City.query.filter_by(name='Test City').first()
+        other = City(name='Other City', state='Test State', base_price_per_sqft=4000, tier='Tier 3')
+        db.session.add(other)
+        db.session.flush()
+        db.session.add_all([
+            Locality(name='East Side', city_id=city.id, price_per_sqft=8000, pin_code='123457'),
+            Locality(name='West Side', city_id=city.id, price_per_sqft=6000, pin_code='123457'),
+            Locality(name='North Side', city_id=city.id, price_per_sqft=7000, pin_code='999999'),
+            Locality(name='Old Town', city_id=other.id, price_per_sqft=5000, pin_code='999999')
+        ])
+        db.session.commit()
+        pricing_snapshot.invalidate()
+        self.estimator = PriceEstimator()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_unique_pin_matches_named_estimate(self):
+        """A unique pin gives the same estimate as the names it maps to."""
+        by_pin = self.estimator.estimate_by_pin('123456', year=2024)
+        by_name = self.estimator.estimate_price(state='Test State', city_name='Test City',
+                                                locality_name='Test Locality', year=2024)
+        self.assertEqual(by_pin['estimated_price_per_sqft'], by_name['estimated_price_per_sqft'])
+        self.assertFalse(by_pin['pin_code']['ambiguous'])
+
+    def test_shared_pin_in_one_city_is_averaged(self):
+        """Localities sharing a pin in one city are averaged at lower confidence."""
+        result = self.estimator.estimate_by_pin('123457', year=2024)
+        east = self.estimator.estimate_price(state='Test State', city_name='Test City',
+                                             locality_name='East Side', year=2024)
+        west = self.estimator.estimate_price(state='Test State', city_name='Test City',
+                                             locality_name='West Side', year=2024)
+        expected = (east['estimated_price_per_sqft'] + west['estimated_price_per_sqft']) / 2
+        self.assertAlmostEqual(result['estimated_price_per_sqft'], expected, places=1)
+        self.assertTrue(result['pin_code']['ambiguous'])
+        self.assertLess(result['confidence_score'], east['confidence_score'])
+
+        narrowed = self.estimator.estimate_by_pin('123457', locality_name='East Side', year=2024)
+        self.assertEqual(narrowed['estimated_price_per_sqft'], east['estimated_price_per_sqft'])
+
+    def test_pin_shared_across_cities(self):
+        """A pin spanning cities needs a city to disambiguate."""
+        with self.assertRaises(PinCodeError) as context:
+            pin_index().resolve('999999')
+        self.assertEqual(len(context.exception.candidates), 2)
+
+        matches = pin_index().resolve(' 999 999 ', city='Other City')
+        self.assertEqual([match.locality for match in matches], ['Old Town'])
+
+    def test_batch_with_pins(self):
+        """Batch rows may use pin codes; bad pins become per-row errors."""
+        results = self.estimator.estimate_batch([
+            {'pin_code': '123456', 'year': 2024},
+            {'state': 'Test State', 'city_name': 'Test City', 'year': 2024},
+            {'pin_code': '000000', 'year': 2024}
+        ])
+        self.assertIn('estimated_price_per_sqft', results[0])
+        self.assertIn('estimated_price_per_sqft', results[1])
+        self.assertEqual(results[2]['error'], 'Pin code not found')
+
+    def test_api_estimate_by_pin(self):
+        """/api/estimate accepts pin_code in place of state and city."""
+        headers = {'X-API-Key': 'test_api_key_123'}
+        response = self.client.post('/api/estimate', json={'pin_code': '123456'}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['data']['pin_code']['matches'][0]['locality'], 'Test Locality')
+
+        response = self.client.post('/api/estimate', json={'pin_code': '999999'}, headers=headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(response.get_json()['candidates']), 2)
+
+        response = self.client.post('/api/estimate', json={'pin_code': '000000'}, headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_shared_pin_estimates_replay(self):
+        """An averaged pin estimate is logged with its pin and replays cleanly."""
+        from replay import iter_cases_from_db, replay_estimates
+
+        headers = {'X-API-Key': 'test_api_key_123'}
+        response = self.client.post('/api/estimate', json={'pin_code': '123457'}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        logged = PriceEstimate.query.one()
+        self.assertEqual((logged.locality, logged.pin_code), (None, '123457'))
+
+        report = replay_estimates(iter_cases_from_db())
+        self.assertEqual((report['rows'], report['mismatches']), (1, 0))
+
+    def test_unresolvable_pin_replays_as_mismatch(self):
+        """A logged pin that no longer resolves is reported, not fatal."""
+        from replay import iter_cases_from_db, replay_estimates
+
+        headers = {'X-API-Key': 'test_api_key_123'}
+        self.client.post('/api/estimate', json={'pin_code': '123457'}, headers=headers)
+        PriceEstimate.query.update({'pin_code': '000001'})
+        db.session.commit()
+
+        report = replay_estimates(iter_cases_from_db())
+        self.assertEqual((report['rows'], report['mismatches']), (1, 1))
+        self.assertEqual(report['by_field']['estimated_price_per_sqft'], 0)
+        self.assertIn('error', report['examples'][0]['error'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import time
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from price_estimator import PriceEstimator
+from pricing_snapshot import pricing_snapshot
+import test_api
+
+class TestPriceBands(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        pricing_snapshot.invalidate()
+        self.estimator = PriceEstimator()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_bands_are_ordered_around_estimate(self):
+        """P10 < P50 < P90 and the median sits near the point estimate."""
+        result = self.estimator.estimate_price('Test State', 'Test City', 'Test Locality',
+                                               year=2028, price_bands=True)
+        bands = result['price_bands']['price_per_sqft']
+        self.assertLess(bands['p10'], bands['p50'])
+        self.assertLess(bands['p50'], bands['p90'])
+        self.assertAlmostEqual(bands['p50'] / result['estimated_price_per_sqft'], 1.0, delta=0.05)
+        self.assertAlmostEqual(result['price_bands']['total_price']['p50'], bands['p50'] * 1000, delta=10)
+
+    def test_bands_are_reproducible_per_input(self):
+        """The same input always gets the same bands; another input does not."""
+        first = self.estimator.estimate_price('Test State', 'Test City', year=2026, price_bands=True)
+        again = self.estimator.estimate_price('Test State', 'Test City', year=2026, price_bands=True)
+        other = self.estimator.estimate_price('Test State', 'Test City', year=2027, price_bands=True)
+        self.assertEqual(first['price_bands'], again['price_bands'])
+        self.assertNotEqual(first['price_bands'], other['price_bands'])
+
+        batch = self.estimator.estimate_batch([
+            {'state': 'Test State', 'city_name': 'Test City', 'year': 2026, 'price_bands': True},
+            {'state': 'Test State', 'city_name': 'Test City', 'year': 2027}
+        ])
+        self.assertEqual(batch[0]['price_bands'], first['price_bands'])
+        self.assertNotIn('price_bands', batch[1])
+
+    def test_lower_confidence_gives_wider_bands(self):
+        """City-level and fallback estimates get wider bands than locality ones."""
+        def width(result):
+            bands = result['price_bands']['price_per_sqft']
+            return (bands['p90'] - bands['p10']) / bands['p50']
+
+        locality = self.estimator.estimate_price('Test State', 'Test City', 'Test Locality', price_bands=True)
+        fallback = self.estimator.estimate_price('Karnataka', 'Nowhere', price_bands=True)
+        self.assertLess(width(locality), width(fallback))
+
+    def test_latency(self):
+        """10k-sample bands stay within a few milliseconds."""
+        self.estimator.estimate_price('Test State', 'Test City', price_bands=True)
+        factors = self.estimator._resolve_factors('Test State', 'Test City', None, 20, False, False,
+                                                  False, 'residential', None, None)
+        started = time.perf_counter()
+        for year in range(2020, 2030):
+            self.estimator._price_bands(factors, year, 1000, ('latency', year), samples=10000)
+        self.assertLess((time.perf_counter() - started) / 10, 0.02)
+
+    def test_api_price_bands(self):
+        """/api/estimate adds bands only when asked."""
+        headers = {'X-API-Key': 'test_api_key_123'}
+        response = self.client.get('/api/estimate?state=Test State&city=Test City&price_bands=true',
+                                   headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('p90', response.get_json()['data']['price_bands']['price_per_sqft'])
+
+        response = self.client.get('/api/estimate?state=Test State&city=Test City', headers=headers)
+        self.assertNotIn('price_bands', response.get_json()['data'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import csv
+import tempfile
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import City, Locality, PriceSeries
+from data_manager import DataManager
+from price_estimator import PriceEstimator
+from price_history import decimal_year, fit_trends, pack, price_trends, unpack
+from pricing_snapshot import SeriesRow, pricing_snapshot
+import test_api
+
+def series_row(years, prices, locality_id=None):
+    return SeriesRow(1, locality_id, pack(years), pack(prices))
+
+class TestPriceHistory(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        pricing_snapshot.invalidate()
+        self.estimator = PriceEstimator()
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.temp_dir.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _import(self, rows):
+        path = os.path.join(self.temp_dir.name, 'history.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['state', 'city_name', 'locality', 'date', 'price_per_sqft'])
+            writer.writerows(rows)
+        success, message = DataManager().import_price_history_csv(path)
+        self.assertTrue(success, message)
+        return message
+
+    def test_decimal_year(self):
+        """Dates become fractional years."""
+        self.assertEqual(decimal_year('2021'), 2021.0)
+        self.assertAlmostEqual(decimal_year('2021-07-02'), 2021.5, places=2)
+
+    def test_fit_trends(self):
+        """Steady growth is recovered exactly; series too short to fit get None."""
+        years = [2018, 2019, 2020, 2021, 2022]
+        steady = [1000 * 1.08 ** (year - 2018) for year in years]
+        noisy = [1000, 1150, 1100, 1300, 1350]
+        trends = fit_trends([
+            series_row(years, steady),
+            series_row(years, noisy),
+            series_row([2020, 2021], [1000, 1100]),
+            series_row([2020.0, 2020.25, 2020.5], [1000, 1010, 1020])
+        ])
+        self.assertAlmostEqual(trends[0].rate, 0.08, places=9)
+        self.assertAlmostEqual(trends[0].cagr, 0.08, places=9)
+        self.assertEqual(trends[0].observations, 5)
+        self.assertAlmostEqual(trends[1].cagr, (1350 / 1000) ** 0.25 - 1, places=9)
+        self.assertNotAlmostEqual(trends[1].rate, trends[1].cagr, places=3)
+        self.assertIsNone(trends[2])  # too few observations
+        self.assertIsNone(trends[3])  # spans less than a year
+
+    def test_import_merges_series(self):
+        """Imports merge into existing series and a repeated date replaces the price."""
+        self._import([
+            ['Test State', 'Test City', 'Test Locality', '2020', 4000],
+            ['Test State', 'Test City', 'Test Locality', '2021', 4400],
+            ['Test State', 'Test City', '', '2021', 4000],
+            ['Test State', 'Nowhere', '', '2021', 4000]
+        ])
+        message = self._import([
+            ['Test State', 'Test City', 'Test Locality', '2021', 4300],
+            ['Test State', 'Test City', 'Test Locality', '2022', 4800]
+        ])
+        self.assertIn('0 new and 1 existing', message)
+
+        locality = Locality.query.filter_by(name='Test Locality').first()
+        series = PriceSeries.query.filter_by(locality_id=locality.id).one()
+        self.assertEqual(unpack(series.years).tolist(), [2020.0, 2021.0, 2022.0])
+        self.assertEqual(unpack(series.prices).tolist(), [4000.0, 4300.0, 4800.0])
+        self.assertEqual(PriceSeries.query.count(), 2)
+
+    def test_estimates_use_fitted_trends(self):
+        """Locality trend first, then the city's, then the static city rate."""
+        city = City.query.filter_by(name='Test City').first()
+        other = Locality(name='Other Locality', city_id=city.id, price_per_sqft=3000)
+        db.session.add(other)
+        db.session.commit()
+        before = pricing_snapshot.current().version
+
+        self._import([['Test State', 'Test City', 'Test Locality', str(year), 4000 * 1.1 ** (year - 2019)]
+                      for year in range(2019, 2024)] +
+                     [['Test State', 'Test City', '', str(year), 3000 * 1.03 ** (year - 2019)]
+                      for year in range(2019, 2024)])
+        self.assertNotEqual(pricing_snapshot.current().version, before)
+        self.assertAlmostEqual(price_trends().for_location(city.id).rate, 0.03)
+
+        for name, rate in (('Test Locality', 0.1), ('Other Locality', 0.03)):
+            now = self.estimator.estimate_price('Test State', 'Test City', name, year=2024)
+            later = self.estimator.estimate_price('Test State', 'Test City', name, year=2027)
+            self.assertAlmostEqual(later['estimated_price_per_sqft'] / now['estimated_price_per_sqft'],
+                                   (1 + rate) ** 3, places=4)
+            curve = self.estimator.project_prices('Test State', 'Test City', name, years=[2027])
+            self.assertEqual(curve['estimated_price_per_sqft'], [later['estimated_price_per_sqft']])
+
+        db.session.delete(PriceSeries.query.filter_by(locality_id=None).one())
+        db.session.commit()
+        pricing_snapshot.invalidate()
+        now = self.estimator.estimate_price('Test State', 'Test City', 'Other Locality', year=2024)
+        later = self.estimator.estimate_price('Test State', 'Test City', 'Other Locality', year=2027)
+        self.assertAlmostEqual(later['estimated_price_per_sqft'] / now['estimated_price_per_sqft'],
+                               (1 + self.estimator.inflation_rate + city.growth_rate) ** 3, places=4)
+
+if __name__ == '__main__':
+    unittest.main()
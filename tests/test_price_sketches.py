@@ -0,0 +1,192 @@
+import unittest
+import os
+import sys
+import time
+from unittest.mock import patch
+import numpy as np
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import PriceEstimate, PriceSketch
+from audit import record_estimate
+from price_sketches import QuantileSketch, SketchStore, price_sketches
+import test_api
+
+def estimate(city, price):
+    return PriceEstimate(state='Test State', city=city, locality=None, plot_size_sqft=1000.0,
+                         road_width_ft=20.0, nearby_schools=False, nearby_metro=False,
+                         commercial_area=False, year=2024, estimated_price_per_sqft=price,
+                         total_estimated_price=price * 1000, confidence_score=0.9)
+
+class TestQuantileSketch(unittest.TestCase):
+    def setUp(self):
+        self.prices = np.random.default_rng(7).lognormal(np.log(8000), 0.6, 100000)
+
+    def test_relative_accuracy(self):
+        """Quantiles are within the configured relative error of the exact ones."""
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        sketch.add(self.prices)
+        qs = [0.01, 0.1, 0.5, 0.9, 0.99]
+        for approximate, exact in zip(sketch.quantiles(qs), np.quantile(self.prices, qs)):
+            self.assertLess(abs(approximate - exact) / exact, 0.011)
+        self.assertEqual(sketch.count, len(self.prices))
+        self.assertLess(len(sketch.counts), 500)
+
+    def test_merge_equals_single_sketch(self):
+        """Merging sketches of two halves gives the sketch of the whole."""
+        whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        whole.add(self.prices)
+        left.add(self.prices[:30000])
+        right.add(self.prices[30000:])
+        left.merge(right)
+        self.assertEqual(left.min_key, whole.min_key)
+        np.testing.assert_array_equal(left.counts, whole.counts)
+        self.assertEqual((left.count, left.min, left.max), (whole.count, whole.min, whole.max))
+
+    def test_bucket_cap_folds_lowest_buckets(self):
+        """Past max_buckets the bottom is folded; upper quantiles stay accurate."""
+        sketch = QuantileSketch(relative_accuracy=0.01, max_buckets=100)
+        sketch.add(self.prices)
+        self.assertEqual(len(sketch.counts), 100)
+        exact = np.quantile(self.prices, 0.9)
+        self.assertLess(abs(sketch.quantiles([0.9])[0] - exact) / exact, 0.011)
+
+    def test_summary(self):
+        sketch = QuantileSketch()
+        self.assertIsNone(sketch.summary()['p50'])
+        sketch.add([1000, 2000, 3000, 4000, 5000])
+        summary = sketch.summary()
+        self.assertEqual(summary['count'], 5)
+        self.assertEqual(summary['mean'], 3000)
+        self.assertAlmostEqual(summary['p50'], 3000, delta=30)
+        self.assertGreater(summary['spread'], 0)
+
+class TestSketchStore(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        price_sketches.reset()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        price_sketches.reset()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_workers_merge_into_one_row(self):
+        """Flushes from several workers add up instead of overwriting each other."""
+        workers = [SketchStore(flush_seconds=3600) for _ in range(3)]
+        for number, worker in enumerate(workers):
+            for price in range(1000, 2000, 10):
+                worker.add(estimate('Test City', price + number))
+        self.assertEqual(PriceSketch.query.count(), 0)
+        self.assertEqual(workers[0].sketches()[('Test State', 'Test City')].count, 100)
+
+        for worker in workers:
+            self.assertEqual(worker.flush(), 1)
+        row = PriceSketch.query.one()
+        self.assertEqual((row.estimate_count, row.version), (300, 3))
+        self.assertEqual(row.min_price_per_sqft, 1000)
+
+    def test_stale_version_is_retried(self):
+        """A row changed between read and write is re-read and merged again."""
+        store = SketchStore(flush_seconds=3600)
+        store.add(estimate('Test City', 1000))
+        store.flush()
+
+        merge = store._merge_into_row
+        raced = []
+
+        def racing_merge(state, city, delta, generation=0):
+            if not raced:
+                # Another worker bumps the row right after we read it
+                raced.append(True)
+                db.session.execute(PriceSketch.__table__.update().values(
+                    version=PriceSketch.__table__.c.version + 1,
+                    estimate_count=PriceSketch.__table__.c.estimate_count + 5))
+            return merge(state, city, delta, generation)
+
+        store._merge_into_row = racing_merge
+        store.add(estimate('Test City', 2000))
+        store.flush()
+        self.assertEqual(PriceSketch.query.one().estimate_count, 7)
+
+    def test_recorded_estimates_and_rebuild(self):
+        """record_estimate feeds the sketches; rebuild recomputes them from the log."""
+        result = {'estimated_price_per_sqft': 5000.0, 'total_estimated_price': 5000000.0,
+                  'confidence_score': 0.9}
+        for _ in range(4):
+            record_estimate({'state': 'Test State', 'city': 'Test City', 'plot_size_sqft': 1000,
+                             'road_width_ft': 20, 'year': 2024}, result)
+        distribution = price_sketches.distribution(state='Test State')
+        self.assertEqual(distribution['cities'][0]['count'], 4)
+
+        db.session.add(estimate('Other City', 9000.0))
+        db.session.commit()
+        stats = price_sketches.rebuild()
+        self.assertEqual(stats, {'estimates': 5, 'cities': 2})
+        distribution = price_sketches.distribution()
+        self.assertEqual([row['city'] for row in distribution['cities']], ['Test City', 'Other City'])
+        self.assertEqual(distribution['overall']['count'], 5)
+
+    def test_rebuild_discards_other_workers_buffers(self):
+        """Prices buffered before a rebuild are not merged on top of it."""
+        other = SketchStore(flush_seconds=3600)
+        entry = estimate('Test City', 5000.0)
+        db.session.add(entry)
+        db.session.commit()
+        other.add(entry)
+
+        price_sketches.rebuild()
+        self.assertEqual(other.sketches()[('Test State', 'Test City')].count, 1)
+        self.assertEqual(other.flush(), 0)
+        self.assertEqual(PriceSketch.query.one().estimate_count, 1)
+
+        # Prices recorded after the rebuild merge as usual
+        other.add(estimate('Test City', 6000.0))
+        self.assertEqual(other.flush(), 1)
+        self.assertEqual(PriceSketch.query.one().estimate_count, 2)
+
+    def test_background_flush(self):
+        """Buffered prices reach the database without further estimates."""
+        store = SketchStore(flush_seconds=0.05)
+        with patch.dict(app.config, {'TESTING': False}):
+            store.init_app(app)
+            store.add(estimate('Test City', 5000.0))
+        deadline = time.monotonic() + 5
+        while not PriceSketch.query.count() and time.monotonic() < deadline:
+            db.session.rollback()
+            time.sleep(0.05)
+        self.assertEqual(PriceSketch.query.one().estimate_count, 1)
+
+    def test_api_and_dashboard(self):
+        """/api/price-distribution and the dashboard read the sketches."""
+        store_prices = [4000.0, 5000.0, 6000.0]
+        for price in store_prices:
+            price_sketches.add(estimate('Test City', price))
+        price_sketches.flush()
+
+        headers = {'X-API-Key': 'test_api_key_123'}
+        response = self.client.get('/api/price-distribution?state=Test State&limit=5', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        self.assertEqual(data['cities'][0]['count'], 3)
+        self.assertAlmostEqual(data['cities'][0]['p50'], 5000, delta=50)
+        self.assertEqual(self.client.get('/api/price-distribution?limit=0', headers=headers).status_code, 400)
+
+        with self.client.session_transaction() as session:
+            session['admin_logged_in'] = True
+        response = self.client.get('/admin/dashboard')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'price-distribution', response.data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import os
+import sys
+import gzip
+import json
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import City, Locality
+from pricing_snapshot import pricing_snapshot, SnapshotStore
+import test_api
+
+class TestPricingSnapshot(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        pricing_snapshot.invalidate()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def bundle_url(self):
+        return f'/data/hierarchy.{pricing_snapshot.current().version}.json'
+
+    def test_snapshot_reloads_when_data_changes(self):
+        """A fingerprint change produces a new snapshot with a new version."""
+        store = SnapshotStore(check_seconds=0)
+        first = store.current()
+        self.assertIs(store.current(), first)
+
+        city = City.query.first()
+        db.session.add(Locality(name='New Locality', city_id=city.id, price_per_sqft=7000))
+        db.session.commit()
+
+        second = store.current()
+        self.assertNotEqual(first.version, second.version)
+        self.assertEqual(len(second.localities), len(first.localities) + 1)
+
+    def test_index_uses_bundle(self):
+        """The form lists states from the snapshot and links the versioned bundle."""
+        response = self.client.get('/')
+        html = response.get_data(as_text=True)
+        self.assertIn('<option value="Test State">Test State</option>', html)
+        self.assertIn(self.bundle_url(), html)
+        self.assertNotIn('/api/localities/1', html)
+
+    def test_bundle_contents_and_caching(self):
+        """The bundle is gzip-encoded, long-cached and revalidates by ETag."""
+        url = self.bundle_url()
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        data = json.loads(gzip.decompress(response.data))
+        self.assertEqual(data['states'], {'Test State': {'Test City': ['Test Locality']}})
+
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(json.loads(plain.data), data)
+
+        # Each encoding has its own ETag and revalidates against it
+        etag = response.headers['ETag']
+        self.assertNotEqual(etag, plain.headers['ETag'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        cached = self.client.get(url, headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': plain.headers['ETag']}).status_code, 304)
+
+    def test_stale_version_redirects(self):
+        """Old bundle URLs redirect to the current version."""
+        response = self.client.get('/data/hierarchy.0000.json')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.headers['Location'].endswith(self.bundle_url()))
+
+if __name__ == '__main__':
+    unittest.main()
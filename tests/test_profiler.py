@@ -0,0 +1,97 @@
+import unittest
+import os
+import sys
+import threading
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from profiler import sample_stacks, format_collapsed, background_profile
+import test_api
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_sampler_collects_collapsed_stacks(self):
+        """Busy threads show up as root-first collapsed stacks."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        try:
+            samples = sample_stacks(0.2, interval=0.005)
+        finally:
+            stop.set()
+            worker.join()
+
+        output = format_collapsed(samples)
+        busy_lines = [line for line in output.splitlines() if 'busy_loop (test_profiler.py' in line]
+        self.assertTrue(busy_lines)
+        stack, count = busy_lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertTrue(stack.index('busy_loop') > stack.index('run ('))
+
+    def test_profile_endpoint_runs_in_background(self):
+        """Only admins can profile; sampling runs off the request thread."""
+        response = self.client.post('/admin/profile?seconds=0.05')
+        self.assertEqual(response.status_code, 302)
+
+        with self.client.session_transaction() as session:
+            session['admin_logged_in'] = True
+        background_profile.wait()
+        response = self.client.post('/admin/profile?seconds=0.3')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.post('/admin/profile?seconds=0.3').status_code, 409)
+
+        # Requests served while sampling show up in the profile
+        self.assertEqual(self.client.get('/admin/profile').status_code, 202)
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        background_profile.wait()
+        stop.set()
+        worker.join()
+
+        response = self.client.get('/admin/profile')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+        self.assertIn('busy_loop', response.get_data(as_text=True))
+
+        response = self.client.post('/admin/profile?seconds=3600')
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_request_profile(self):
+        """__profile=1 returns cProfile output for admins only."""
+        url = '/api/estimate?state=Test State&city=Test City&__profile=1'
+        headers = {'X-API-Key': 'test_api_key_123'}
+
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.mimetype, 'application/json')
+
+        with self.client.session_transaction() as session:
+            session['admin_logged_in'] = True
+        response = self.client.get(url, headers=headers)
+        text = response.get_data(as_text=True)
+        self.assertEqual(response.mimetype, 'text/plain')
+        self.assertIn('/api/estimate -> 200', text)
+        self.assertIn('estimate_price', text)
+
+if __name__ == '__main__':
+    unittest.main()
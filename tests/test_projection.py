@@ -0,0 +1,85 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from price_estimator import PriceEstimator
+from pricing_snapshot import pricing_snapshot
+import test_api
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        pricing_snapshot.invalidate()
+        self.estimator = PriceEstimator()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_curve_matches_estimates(self):
+        """Every point of a curve equals estimate_price for that year."""
+        factors = {'plot_size_sqft': 1200, 'road_width_ft': 30, 'nearby_metro': True,
+                   'area_type': 'commercial'}
+        curve = self.estimator.project_prices('Test State', 'Test City', 'Test Locality', **factors)
+        self.assertEqual(curve['years'], list(range(2020, 2031)))
+
+        for index, year in enumerate(curve['years']):
+            result = self.estimator.estimate_price('Test State', 'Test City', 'Test Locality',
+                                                   year=year, **factors)
+            self.assertEqual(curve['estimated_price_per_sqft'][index], result['estimated_price_per_sqft'])
+            self.assertEqual(curve['total_estimated_price'][index], result['total_estimated_price'])
+            self.assertEqual(curve['calculation_breakdown']['year_trend_factor'][index],
+                             result['calculation_breakdown']['year_trend_factor'])
+        self.assertEqual(curve['confidence_score'], result['confidence_score'])
+
+    def test_batch_mixes_known_and_unknown_cities(self):
+        """Unknown cities follow the fallback estimate; years may be any list."""
+        years = [2021, 2026]
+        curves = self.estimator.project_batch([
+            {'state': 'Test State', 'city_name': 'Test City'},
+            {'state': 'Karnataka', 'city_name': 'Nowhere'}
+        ], years)
+        for curve, (state, city) in zip(curves, [('Test State', 'Test City'), ('Karnataka', 'Nowhere')]):
+            expected = [self.estimator.estimate_price(state, city, year=year)['estimated_price_per_sqft']
+                        for year in years]
+            self.assertEqual(curve['estimated_price_per_sqft'], expected)
+        self.assertEqual(curves[1]['confidence_score'], 0.3)
+
+    def test_api_projection(self):
+        """/api/projection returns one curve per requested location."""
+        headers = {'X-API-Key': 'test_api_key_123'}
+        response = self.client.post('/api/projection', headers=headers, json={
+            'locations': [
+                {'state': 'Test State', 'city': 'Test City', 'locality': 'Test Locality'},
+                {'state': 'Test State', 'city': 'Test City'}
+            ],
+            'years': [2030, 2025, 2025]
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        self.assertEqual([curve['locality'] for curve in data], ['Test Locality', None])
+        self.assertEqual(data[0]['years'], [2025, 2030])
+
+        response = self.client.get('/api/projection?state=Test State&city=Test City&years=2020,2024',
+                                   headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['data'][0]['estimated_price_per_sqft']), 2)
+
+        response = self.client.get('/api/projection?state=Test State&city=Test City&years=2019',
+                                   headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from query_tracking import max_queries
+import test_api
+
+# Statement budgets per page. Lower these when a change removes queries;
+# raising one needs a reason in review.
+API_ESTIMATE_BUDGET = 12
+WEB_ESTIMATE_BUDGET = 8
+DASHBOARD_BUDGET = 8  # +1: price distribution from the PriceSketch rows
+DATA_MANAGEMENT_BUDGET = 3
+
+class TestQueryBudget(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_api_estimate_budget(self):
+        """/api/estimate stays within its query budget with every factor set."""
+        with max_queries(API_ESTIMATE_BUDGET):
+            response = self.client.post('/api/estimate',
+                                        json={
+                                            'state': 'Test State',
+                                            'city': 'Test City',
+                                            'locality': 'Test Locality',
+                                            'road_width_ft': 25,
+                                            'nearby_schools': 'true',
+                                            'nearby_metro': 'true',
+                                            'commercial_area': 'true'
+                                        },
+                                        headers={'X-API-Key': 'test_api_key_123'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_web_estimate_budget(self):
+        """/estimate stays within its query budget with every factor set."""
+        with max_queries(WEB_ESTIMATE_BUDGET):
+            response = self.client.post('/estimate', data={
+                'state': 'Test State',
+                'city': 'Test City',
+                'locality': 'Test Locality',
+                'road_width': 25,
+                'nearby_schools': 'on',
+                'nearby_metro': 'on',
+                'commercial_area': 'on'
+            })
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_page_budgets(self):
+        """Admin pages stay within their query budgets."""
+        with self.client.session_transaction() as session:
+            session['admin_logged_in'] = True
+
+        with max_queries(DASHBOARD_BUDGET):
+            self.assertEqual(self.client.get('/admin/dashboard').status_code, 200)
+        with max_queries(DATA_MANAGEMENT_BUDGET):
+            self.assertEqual(self.client.get('/admin/data-management').status_code, 200)
+
+    def test_budget_violation_lists_statements(self):
+        """Exceeding a budget fails with the offending statements."""
+        with self.assertRaises(AssertionError) as context:
+            with max_queries(0):
+                self.client.get('/admin/login')
+                db.session.execute(db.select(db.func.count()).select_from(db.table('city')))
+        self.assertIn('SELECT', str(context.exception))
+
+    def test_server_timing_header_in_debug(self):
+        """Debug responses carry a Server-Timing header with DB time."""
+        app.debug = True
+        try:
+            response = self.client.get('/')
+        finally:
+            app.debug = False
+        self.assertIn('db;dur=', response.headers.get('Server-Timing', ''))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import csv
+import tempfile
+import unittest
+import os
+import sys
+from unittest.mock import patch
+import numpy as np
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from config import Config
+from models import City, Locality, JobWatermark
+from data_manager import DataManager
+from price_estimator import PriceEstimator
+from pricing_snapshot import pricing_snapshot
+from recalibration import recalibrate_localities, trimmed_means
+import test_api
+
+class TestRecalibration(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        city = City.query.filter_by(name='Test City').first()
+        db.session.add(Locality(name='Quiet Locality', city_id=city.id, price_per_sqft=4000,
+                                area_type='residential'))
+        db.session.commit()
+        pricing_snapshot.invalidate()
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.temp_dir.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _import(self, locality, prices, month=1):
+        path = os.path.join(self.temp_dir.name, 'history.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['state', 'city_name', 'locality', 'date', 'price_per_sqft'])
+            for day, price in enumerate(prices, start=1):
+                writer.writerow(['Test State', 'Test City', locality, f'2024-{month:02d}-{day:02d}', price])
+        success, message = DataManager().import_price_history_csv(path)
+        self.assertTrue(success, message)
+
+    def _price(self, name):
+        return Locality.query.filter_by(name=name).first().price_per_sqft
+
+    def test_trimmed_means(self):
+        """Per-group trimmed means; trim 0.5 is the median; empty groups are NaN."""
+        values = np.array([1.0, 2.0, 3.0, 100.0, 10.0, 20.0, 30.0, 40.0, 5.0])
+        owners = np.array([0, 0, 0, 0, 1, 1, 1, 1, 3])
+        np.testing.assert_allclose(trimmed_means(values, owners, 4, 0.25)[[0, 1, 3]], [2.5, 25.0, 5.0])
+        np.testing.assert_allclose(trimmed_means(values, owners, 4, 0.0)[[0, 1]], [26.5, 25.0])
+        medians = trimmed_means(values, owners, 4, 0.5)
+        np.testing.assert_allclose(medians[[0, 1, 3]], [2.5, 25.0, 5.0])
+        self.assertTrue(np.isnan(medians[2]))
+
+    def test_recalibrates_with_outliers_trimmed(self):
+        """Recent observations set the base price; an outlier is trimmed away."""
+        self._import('Test Locality', [6500, 6480, 6520, 6510, 6490, 6505, 6495, 6515, 6485, 60000])
+        stats = recalibrate_localities()
+        self.assertEqual((stats['series'], stats['updated'], stats['clamped']), (1, 1, 0))
+        self.assertAlmostEqual(self._price('Test Locality'), 6500, delta=65)
+        self.assertEqual(self._price('Quiet Locality'), 4000)
+
+        # Caches see the new price straight away
+        estimate = PriceEstimator().estimate_price('Test State', 'Test City', 'Test Locality')
+        self.assertEqual(estimate['calculation_breakdown']['base_price_per_sqft'], self._price('Test Locality'))
+
+    def test_changes_are_bounded_and_need_observations(self):
+        """One run moves a price at most RECALIBRATION_MAX_CHANGE; thin series are skipped."""
+        self._import('Test Locality', [20000, 21000, 22000])
+        self._import('Quiet Locality', [9000, 9100])
+        stats = recalibrate_localities()
+        self.assertEqual((stats['updated'], stats['clamped'], stats['skipped']), (1, 1, 1))
+        self.assertEqual(self._price('Test Locality'), 6000 * (1 + Config.RECALIBRATION_MAX_CHANGE))
+        self.assertEqual(self._price('Quiet Locality'), 4000)
+
+    def test_watermark_limits_work_to_new_data(self):
+        """Later runs only read series changed since the previous run."""
+        self._import('Test Locality', [6500, 6500, 6500])
+        self.assertEqual(recalibrate_localities()['series'], 1)
+        self.assertIsNotNone(JobWatermark.query.filter_by(name='locality_recalibration').first().watermark)
+        self.assertEqual(recalibrate_localities()['series'], 0)
+
+        self._import('Quiet Locality', [4200, 4200, 4200], month=2)
+        stats = recalibrate_localities()
+        self.assertEqual((stats['series'], stats['updated']), (1, 1))
+        self.assertEqual(recalibrate_localities(full=True)['series'], 2)
+
+    def test_clamped_and_skipped_localities_stay_pending(self):
+        """Later incremental runs keep moving localities a clamp held back."""
+        self._import('Quiet Locality', [8000, 8000, 8000])
+        self._import('Test Locality', [9000, 9000])
+        self.assertEqual(recalibrate_localities()['clamped'], 1)
+        self.assertEqual(self._price('Quiet Locality'), 5000)
+
+        stats = recalibrate_localities()
+        self.assertEqual((stats['series'], stats['updated'], stats['skipped']), (2, 1, 1))
+        self.assertEqual(self._price('Quiet Locality'), 6250)
+        recalibrate_localities()
+        self.assertEqual(self._price('Quiet Locality'), 7812.5)
+        self.assertAlmostEqual(recalibrate_localities()['changes'][0][2], 8000, delta=80)
+
+        # Settled localities drop out; the thin series stays pending
+        self.assertEqual(recalibrate_localities()['series'], 1)
+
+    def test_dry_run_writes_nothing(self):
+        self._import('Test Locality', [6500, 6500, 6500])
+        stats = recalibrate_localities(dry_run=True)
+        self.assertEqual(stats['updated'], 1)
+        self.assertEqual(self._price('Test Locality'), 6000)
+        self.assertIsNone(JobWatermark.query.first())
+
+    def test_cli(self):
+        """flask prices recalibrate reports what it changed."""
+        self._import('Test Locality', [6500, 6500, 6500])
+        with patch.object(Config, 'RECALIBRATION_TRIM', 0.5):
+            result = app.test_cli_runner().invoke(args=['prices', 'recalibrate', '--dry-run'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Would update 1 of 1 localities', result.output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from audit import record_estimate
+from data_manager import DataManager
+from models import PriceEstimate
+from price_estimator import PriceEstimator
+from replay import iter_cases_from_csv, iter_cases_from_db, replay_estimates
+import test_api
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+
+        estimator = PriceEstimator()
+        for index in range(30):
+            inputs = {
+                'state': 'Test State',
+                'city': 'Test City',
+                'locality': 'Test Locality' if index % 2 else None,
+                'plot_size_sqft': 1000 + index * 10,
+                'road_width_ft': 10 + index,
+                'nearby_schools': index % 3 == 0,
+                'nearby_metro': index % 4 == 0,
+                'commercial_area': False,
+                'year': 2024 + index % 3
+            }
+            result = estimator.estimate_price(
+                state=inputs['state'], city_name=inputs['city'], locality_name=inputs['locality'],
+                plot_size_sqft=inputs['plot_size_sqft'], road_width_ft=inputs['road_width_ft'],
+                nearby_schools=inputs['nearby_schools'], nearby_metro=inputs['nearby_metro'],
+                year=inputs['year']
+            )
+            record_estimate(inputs, result)
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_unchanged_estimator_matches(self):
+        """Replaying the log with the same estimator finds no mismatches."""
+        report = replay_estimates(iter_cases_from_db(), batch_size=7)
+        self.assertEqual(report['rows'], 30)
+        self.assertEqual(report['mismatches'], 0)
+        self.assertGreater(report['rows_per_second'], 0)
+
+    def test_changed_price_is_reported(self):
+        """A stored price that no longer reproduces is listed with both values."""
+        estimate = PriceEstimate.query.first()
+        estimate.estimated_price_per_sqft += 100
+        db.session.commit()
+
+        report = replay_estimates(iter_cases_from_db())
+        self.assertEqual(report['mismatches'], 1)
+        self.assertEqual(report['by_field']['estimated_price_per_sqft'], 1)
+        self.assertEqual(report['examples'][0]['id'], estimate.id)
+
+        loose = replay_estimates(iter_cases_from_db(), tolerance=0.5)
+        self.assertEqual(loose['mismatches'], 0)
+
+    def test_replay_from_csv_export(self):
+        """The CSV export replays the same as the database log."""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(DataManager().export_estimates_csv())
+        try:
+            report = replay_estimates(iter_cases_from_csv(file.name))
+        finally:
+            os.remove(file.name)
+        self.assertEqual(report['rows'], 30)
+        self.assertEqual(report['mismatches'], 0)
+
+    def test_parallel_replay(self):
+        """Worker processes give the same totals as a single process."""
+        report = replay_estimates(iter_cases_from_db(), workers=2, batch_size=5)
+        self.assertEqual(report['rows'], 30)
+        self.assertEqual(report['mismatches'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
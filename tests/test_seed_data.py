@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import City, Locality, InfrastructureMultiplier
+from seed_data import seed_initial_data
+
+class TestSeedData(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def write_csvs(self, directory, cities, localities, multipliers):
+        files = {
+            'cities.csv': 'name,state,base_price_per_sqft,growth_rate,population,tier\n' + cities,
+            'localities.csv': 'name,city_name,state,price_per_sqft,location_multiplier,area_type,pin_code\n' + localities,
+            'infrastructure_multipliers.csv': 'factor_type,factor_value,multiplier,description\n' + multipliers
+        }
+        for filename, content in files.items():
+            with open(os.path.join(directory, filename), 'w', encoding='utf-8') as handle:
+                handle.write(content)
+
+    def test_seeds_shipped_csvs(self):
+        """The data/ CSVs are loaded and seed time is reported."""
+        counts = seed_initial_data()
+
+        self.assertEqual(counts['cities'], City.query.count())
+        self.assertEqual(counts['localities'], Locality.query.count())
+        self.assertEqual(counts['multipliers'], InfrastructureMultiplier.query.count())
+        self.assertGreaterEqual(counts['cities'], 50)
+        self.assertIn('seconds', counts)
+
+        # A populated database is left alone
+        self.assertIsNone(seed_initial_data())
+
+    def test_duplicate_city_names_resolve_by_state(self):
+        """Localities attach to the city in their own state."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_csvs(
+                directory,
+                'Aurangabad,Maharashtra,5000,0.05,1175116,Tier 2\n'
+                'Aurangabad,Bihar,2500,0.04,102244,Tier 4\n',
+                'Cidco,Aurangabad,Maharashtra,6000,1.1,residential,431003\n'
+                'Obra,Aurangabad,Bihar,2000,0.9,residential,824124\n'
+                'Nowhere,Missing City,Nowhere,1000,1.0,residential,000000\n',
+                'nearby_metro,yes,1.25,Metro station within 1km\n'
+            )
+            counts = seed_initial_data(data_dir=directory)
+
+        self.assertEqual(counts['localities'], 2)
+        obra = Locality.query.filter_by(name='Obra').one()
+        self.assertEqual(obra.city.state, 'Bihar')
+        cidco = Locality.query.filter_by(name='Cidco').one()
+        self.assertEqual(cidco.city.state, 'Maharashtra')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+import csv
+import os
+import sys
+import tempfile
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import City, Locality
+from price_estimator import PriceEstimator
+from pricing_snapshot import PricingSnapshot, CityRow, LocalityRow, pricing_snapshot
+from schema import add_missing_columns
+from spatial_index import SpatialIndex, haversine_km
+import test_api
+
+def random_snapshot(count, seed=0):
+    rng = np.random.default_rng(seed)
+    cities = [CityRow(1, 'Grid City', 'Test State', 5000, 0.05, 1000000, 'Tier 2')]
+    localities = [LocalityRow(i, f'L{i}', 1, float(1000 + i), 1.0, 'residential', None,
+                              float(rng.uniform(18.4, 18.7)), float(rng.uniform(73.7, 74.0)))
+                  for i in range(count)]
+    return PricingSnapshot(cities, localities, [])
+
+class TestSpatialIndex(unittest.TestCase):
+    def test_matches_brute_force(self):
+        """Grid k-nearest within the radius equals an exhaustive search."""
+        index = SpatialIndex(random_snapshot(400), k=4, radius_km=3)
+        rng = np.random.default_rng(1)
+        latitudes = rng.uniform(18.3, 18.8, 300)
+        longitudes = rng.uniform(73.6, 74.1, 300)
+        indices, distances = index.query(latitudes, longitudes)
+
+        all_distances = haversine_km(latitudes[:, None], longitudes[:, None],
+                                     index.latitudes[None, :], index.longitudes[None, :])
+        for row in range(len(latitudes)):
+            within = np.sort(all_distances[row][all_distances[row] <= 3])[:4]
+            found = distances[row][indices[row] >= 0]
+            np.testing.assert_allclose(found, within, atol=1e-6)
+
+    def test_blend_prefers_nearer_localities(self):
+        """The blended price leans towards the closest locality."""
+        cities = [CityRow(1, 'C', 'S', 5000, 0.05, None, None)]
+        localities = [
+            LocalityRow(1, 'Near', 1, 10000.0, 1.0, None, None, 18.500, 73.800),
+            LocalityRow(2, 'Far', 1, 20000.0, 1.0, None, None, 18.520, 73.800)
+        ]
+        index = SpatialIndex(PricingSnapshot(cities, localities, []), k=2, radius_km=5)
+        prices, nearest_km, counts = index.blend([18.501], [73.800])
+        self.assertEqual(counts[0], 2)
+        self.assertLess(prices[0], 15000)
+        self.assertLess(nearest_km[0], 0.2)
+
+        prices, _, counts = index.blend([19.5], [73.8])
+        self.assertEqual(counts[0], 0)
+        self.assertTrue(np.isnan(prices[0]))
+
+    def test_add_missing_columns(self):
+        """Existing tables gain new nullable model columns."""
+        engine = create_engine('sqlite://')
+        with engine.begin() as connection:
+            connection.execute(text('CREATE TABLE locality (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL)'))
+        added = add_missing_columns(engine, Locality.metadata)
+        columns = {column['name'] for column in inspect(engine).get_columns('locality')}
+        self.assertIn(('locality', 'latitude'), added)
+        self.assertIn('longitude', columns)
+
+class TestSpatialEstimates(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+
+        city = City.query.filter_by(name='Test City').first()
+        db.session.add_all([
+            Locality(name='River Side', city_id=city.id, price_per_sqft=9000, latitude=18.50, longitude=73.80),
+            Locality(name='Hill Top', city_id=city.id, price_per_sqft=12000, latitude=18.51, longitude=73.81)
+        ])
+        db.session.commit()
+        pricing_snapshot.invalidate()
+        self.estimator = PriceEstimator()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_unknown_locality_uses_nearby_prices(self):
+        """Coordinates near known localities lift an unknown-locality estimate."""
+        plain = self.estimator.estimate_price(state='Test State', city_name='Test City',
+                                              locality_name='Unmapped Colony', year=2024)
+        nearby = self.estimator.estimate_price(state='Test State', city_name='Test City',
+                                               locality_name='Unmapped Colony', year=2024,
+                                               latitude=18.502, longitude=73.802)
+        self.assertEqual(plain['confidence_score'], 0.6)
+        self.assertGreater(nearby['confidence_score'], 0.6)
+        self.assertTrue(9000 <= nearby['calculation_breakdown']['base_price_per_sqft'] <= 12000)
+        self.assertIn('River Side', nearby['data_sources'][-1])
+
+        far = self.estimator.estimate_price(state='Test State', city_name='Test City',
+                                            locality_name='Unmapped Colony', year=2024,
+                                            latitude=20.0, longitude=75.0)
+        self.assertEqual(far['estimated_price_per_sqft'], plain['estimated_price_per_sqft'])
+
+    def test_batch_matches_single_estimates(self):
+        """Vectorized batch resolution gives the same prices as single calls."""
+        requests = [{'state': 'Test State', 'city_name': 'Test City', 'locality_name': 'Unmapped',
+                     'year': 2024, 'latitude': 18.5 + i * 0.002, 'longitude': 73.8 + i * 0.002}
+                    for i in range(10)]
+        batch = self.estimator.estimate_batch(requests)
+        single = [self.estimator.estimate_price(**request) for request in requests]
+        self.assertEqual([r['estimated_price_per_sqft'] for r in batch],
+                         [r['estimated_price_per_sqft'] for r in single])
+
+    def test_api_coordinates(self):
+        """/api/estimate takes latitude and longitude together."""
+        headers = {'X-API-Key': 'test_api_key_123'}
+        payload = {'state': 'Test State', 'city': 'Test City', 'latitude': 18.505, 'longitude': 73.805}
+        response = self.client.post('/api/estimate', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.get_json()['data']['confidence_score'], 0.6)
+
+        response = self.client.post('/api/estimate', json={**payload, 'longitude': None}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_geo_resolve_skips_bad_coordinates(self):
+        """flask estimates geo-resolve writes rows without coordinates unresolved."""
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'parcels.csv')
+            output = os.path.join(directory, 'resolved.csv')
+            with open(source, 'w', newline='', encoding='utf-8') as file:
+                file.write('parcel,latitude,longitude\nA,18.502,73.802\nB,,73.8\nC,north,73.8\nD,95,73.8\n')
+
+            result = app.test_cli_runner().invoke(args=['estimates', 'geo-resolve', source, output])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn('Resolved 1 of 4 parcels', result.output)
+            self.assertIn('3 without valid coordinates', result.output)
+            with open(output, newline='', encoding='utf-8') as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual(rows[0]['nearest_locality'], 'River Side')
+        self.assertEqual([row['blended_price_per_sqft'] for row in rows[1:]], ['', '', ''])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import os
+import sys
+import csv
+import tempfile
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import City, Locality, PriceEstimate, InfrastructureMultiplier
+from data_manager import DataManager
+from synthetic_data import SyntheticDataset
+
+class TestSyntheticData(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_same_seed_same_data(self):
+        """A seed fully determines reference data and estimates."""
+        first = SyntheticDataset(seed=7, cities=30, localities_per_city=5)
+        second = SyntheticDataset(seed=7, cities=30, localities_per_city=5)
+        other = SyntheticDataset(seed=8, cities=30, localities_per_city=5)
+        self.assertEqual(first.cities, second.cities)
+        self.assertEqual(first.localities, second.localities)
+        self.assertNotEqual(first.cities, other.cities)
+
+        a = next(first.iter_estimate_chunks(500))
+        b = next(second.iter_estimate_chunks(500))
+        self.assertEqual(list(a['city']), list(b['city']))
+        self.assertEqual(list(a['estimated_price_per_sqft']), list(b['estimated_price_per_sqft']))
+
+    def test_traffic_is_skewed(self):
+        """The most popular city gets far more than its even share."""
+        dataset = SyntheticDataset(seed=1, cities=50, localities_per_city=5)
+        chunk = next(dataset.iter_estimate_chunks(20000))
+        top_share = (chunk['city'] == dataset.cities[0]['name']).mean()
+        self.assertGreater(top_share, 5 / 50)
+
+    def test_csvs_load_through_data_manager(self):
+        """Generated CSVs use the same schemas the importers expect."""
+        dataset = SyntheticDataset(seed=3, cities=20, localities_per_city=4)
+        with tempfile.TemporaryDirectory() as directory:
+            dataset.write_csvs(directory, estimates=100)
+            stats = DataManager().bulk_load_csvs(directory)
+            with open(os.path.join(directory, 'estimates.csv'), newline='') as file:
+                rows = list(csv.DictReader(file))
+
+        self.assertEqual(stats['cities'], 20)
+        self.assertEqual(Locality.query.count(), len(dataset.localities))
+        self.assertEqual(len(rows), 100)
+
+    def test_load_into_db(self):
+        """Bulk load inserts reference data and estimates."""
+        dataset = SyntheticDataset(seed=5, cities=10, localities_per_city=3)
+        stats = dataset.load_into_db(db, estimates=1200, chunk_size=500)
+
+        self.assertEqual(City.query.count(), 10)
+        self.assertEqual(PriceEstimate.query.count(), 1200)
+        self.assertEqual(stats['estimates'], 1200)
+
+        # A second dataset loads next to the first without new multipliers
+        multipliers = InfrastructureMultiplier.query.count()
+        stats = SyntheticDataset(seed=6, cities=5, localities_per_city=3).load_into_db(db)
+        self.assertEqual(stats['multipliers'], 0)
+        self.assertEqual(InfrastructureMultiplier.query.count(), multipliers)
+
+    def test_city_names_unique_per_state(self):
+        """Duplicate-name picks never repeat a (name, state) pair."""
+        dataset = SyntheticDataset(seed=11, cities=400, localities_per_city=1, duplicate_name_rate=0.5)
+        pairs = [(city['name'], city['state']) for city in dataset.cities]
+        self.assertEqual(len(pairs), len(set(pairs)))
+        self.assertLess(len({city['name'] for city in dataset.cities}), len(pairs))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import itertools
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from price_estimator import PriceEstimator
+from pricing_snapshot import pricing_snapshot
+import test_api
+
+class TestWhatIf(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        test_api.TestAPI.setup_test_data(self)
+        pricing_snapshot.invalidate()
+        self.estimator = PriceEstimator()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _check_grid(self, state, city, locality=None, **axes):
+        grid = self.estimator.estimate_grid(state, city, locality, **axes)
+        names = list(grid['axes'])
+        combinations = list(itertools.product(*grid['axes'].values()))
+        self.assertEqual(len(combinations), len(grid['estimated_price_per_sqft']))
+        for index, combination in enumerate(combinations):
+            result = self.estimator.estimate_price(state, city, locality, **dict(zip(names, combination)))
+            self.assertEqual(grid['estimated_price_per_sqft'][index], result['estimated_price_per_sqft'])
+            self.assertEqual(grid['total_estimated_price'][index], result['total_estimated_price'])
+        return grid
+
+    def test_grid_matches_estimates(self):
+        """Every cell equals estimate_price for its combination of inputs."""
+        grid = self._check_grid('Test State', 'Test City', 'Test Locality',
+                                plot_size_sqft=[800, 1200], road_width_ft=[10, 25, 45],
+                                nearby_metro=[False, True], nearby_schools=True,
+                                area_type=['residential', 'commercial'], year=[2024, 2030])
+        self.assertEqual(grid['shape'], [2, 3, 1, 2, 1, 2, 2])
+
+    def test_unknown_city_grid(self):
+        """Unknown cities follow the fallback estimate across the grid."""
+        self._check_grid('Karnataka', 'Nowhere', road_width_ft=[10, 45], area_type=['commercial'],
+                         year=[2022, 2026])
+
+    def test_cell_cap(self):
+        """Grids above the cell cap are refused."""
+        with self.assertRaises(ValueError):
+            self.estimator.estimate_grid('Test State', 'Test City', max_cells=10,
+                                         plot_size_sqft=list(range(100, 1200, 100)))
+
+    def test_api_what_if(self):
+        """/api/what-if takes lists or comma-separated values per axis."""
+        headers = {'X-API-Key': 'test_api_key_123'}
+        response = self.client.get('/api/what-if?state=Test State&city=Test City'
+                                   '&road_width_ft=10,30&nearby_metro=false,true', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        self.assertEqual(data['axes']['nearby_metro'], [False, True])
+        self.assertEqual(len(data['estimated_price_per_sqft']), 4)
+
+        response = self.client.post('/api/what-if', headers=headers, json={
+            'state': 'Test State', 'city': 'Test City', 'plot_size_sqft': list(range(1, 102)),
+            'road_width_ft': list(range(100))
+        })
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/what-if', headers=headers, json={
+            'state': 'Test State', 'city': 'Test City', 'area_type': ['residential', 'moon']
+        })
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/what-if', headers=headers, json={
+            'state': 'Test State', 'city': 'Test City', 'latitude': 95, 'longitude': 72.8
+        })
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()